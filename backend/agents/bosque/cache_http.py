@@ -0,0 +1,302 @@
+"""
+Caché HTTP persistente para las páginas que lee el Agente Bosque
+
+Guarda en disco (y en memoria) el texto ya extraído de cada página junto con
+sus validadores (ETag y Last-Modified). Mientras la copia es reciente se sirve
+sin tocar la red; pasado el TTL se revalida con una petición condicional
+(304 = la copia sigue vigente) y, si la fuente falla, se sirve la copia
+obsoleta. Con BOSQUE_OFFLINE=1 solo se usa la copia local, por ejemplo desde
+una carpeta sembrada de antemano con:
+
+    python -m agents.bosque.cache_http --sembrar      (desde backend/)
+
+Variables de entorno:
+    BOSQUE_CACHE_DIR   carpeta de la caché (por defecto backend/cache/bosque)
+    BOSQUE_CACHE_TTL   segundos que una copia se considera fresca (por defecto 1 día)
+    BOSQUE_OFFLINE     "1" para no hacer ninguna petición de red
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import httpx
+
+try:
+    from .cliente_http import obtener_cliente
+    from .extraccion import LIMITE_CARACTERES, MAX_BYTES, ExtractorTexto
+except ImportError:
+    from cliente_http import obtener_cliente
+    from extraccion import LIMITE_CARACTERES, MAX_BYTES, ExtractorTexto
+
+CARPETA_CACHE = Path(os.getenv("BOSQUE_CACHE_DIR", Path(__file__).parent.parent.parent / "cache" / "bosque"))
+TTL_SEGUNDOS = float(os.getenv("BOSQUE_CACHE_TTL", 24 * 3600))
+MODO_OFFLINE = os.getenv("BOSQUE_OFFLINE", "").lower() in ("1", "true", "si", "sí")
+
+# Plazos (segundos) de las lecturas concurrentes: por fuente y para el conjunto
+PLAZO_FUENTE = 8.0
+PLAZO_TOTAL = 12.0
+
+# Estados con los que se resuelve una lectura
+FRESCO = "fresco"            # copia reciente, sin red
+REVALIDADO = "revalidado"    # la fuente respondió 304
+DESCARGADO = "descargado"    # contenido nuevo
+OBSOLETO = "obsoleto"        # la fuente falló: se sirve la copia vieja
+OFFLINE = "offline"          # modo sin red: se sirve la copia local
+
+
+class SinCopiaLocal(Exception):
+    """No hay red (o está desactivada) y la página nunca se guardó en la caché"""
+
+
+@dataclass
+class EntradaCache:
+    """Texto extraído de una página y sus validadores HTTP"""
+    url: str
+    texto: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    obtenido: float = 0.0
+
+
+class CacheHTTP:
+    """
+    Caché de texto de páginas web con revalidación condicional
+    """
+
+    def __init__(self, carpeta: Path = CARPETA_CACHE, ttl: float = TTL_SEGUNDOS, offline: bool = MODO_OFFLINE):
+        self.carpeta = Path(carpeta)
+        self.ttl = ttl
+        self.offline = offline
+        self._memoria: Dict[str, EntradaCache] = {}
+        self._candado = threading.Lock()
+
+    def _ruta(self, url: str) -> Path:
+        return self.carpeta / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]}.json"
+
+    def leer(self, url: str) -> Optional[EntradaCache]:
+        """Retorna la copia guardada de una URL (memoria y luego disco), o None"""
+        entrada = self._memoria.get(url)
+        if entrada is not None:
+            return entrada
+        try:
+            with open(self._ruta(url), encoding="utf-8") as archivo:
+                entrada = EntradaCache(**json.load(archivo))
+        except (OSError, ValueError, TypeError):
+            return None
+        self._memoria[url] = entrada
+        return entrada
+
+    def guardar(self, entrada: EntradaCache):
+        """Guarda una copia en memoria y en disco (escritura atómica)"""
+        with self._candado:
+            self._memoria[entrada.url] = entrada
+            self.carpeta.mkdir(parents=True, exist_ok=True)
+            ruta = self._ruta(entrada.url)
+            temporal = ruta.with_name(f"{ruta.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+            with open(temporal, "w", encoding="utf-8") as archivo:
+                json.dump(asdict(entrada), archivo, ensure_ascii=False)
+            os.replace(temporal, ruta)
+
+    async def obtener_texto(
+        self,
+        url: str,
+        timeout: float = 10,
+        limite_caracteres: int = LIMITE_CARACTERES,
+        max_bytes: int = MAX_BYTES,
+    ) -> Tuple[str, str]:
+        """
+        Retorna el texto de una página, usando la caché siempre que se pueda
+
+        La descarga se lee por trozos y se entrega al extractor incremental; se
+        corta en cuanto hay 'limite_caracteres' de texto o se leyeron 'max_bytes'.
+
+        Args:
+            url: URL de la página
+            timeout: Plazo total de la petición en segundos (httpx solo limita
+                cada fase; una lectura lenta se corta igualmente al vencer el plazo)
+            limite_caracteres: Máximo de caracteres de texto que se guardan
+            max_bytes: Máximo de bytes que se descargan
+
+        Returns:
+            tuple: (texto, estado), con estado FRESCO, REVALIDADO, DESCARGADO, OBSOLETO u OFFLINE
+
+        Raises:
+            SinCopiaLocal: En modo offline, si la página no está en la caché
+            httpx.HTTPError: Si la fuente falla y no hay copia guardada
+            asyncio.TimeoutError: Si vence el plazo y no hay copia guardada
+        """
+        entrada = self.leer(url)
+        if self.offline:
+            if entrada is None:
+                raise SinCopiaLocal(f"Sin copia local de {url} (modo offline)")
+            return entrada.texto, OFFLINE
+        if entrada is not None and time.time() - entrada.obtenido < self.ttl:
+            return entrada.texto, FRESCO
+
+        cabeceras = {}
+        if entrada is not None:
+            if entrada.etag:
+                cabeceras["If-None-Match"] = entrada.etag
+            if entrada.last_modified:
+                cabeceras["If-Modified-Since"] = entrada.last_modified
+
+        try:
+            return await asyncio.wait_for(
+                self._descargar(url, entrada, cabeceras, timeout, limite_caracteres, max_bytes), timeout
+            )
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            if entrada is None:
+                raise
+            motivo = str(e) or f"sin respuesta en {timeout:g}s"
+            print(f"⚠️ Error al revalidar {url}, se usa la copia guardada: {motivo}", file=sys.stderr, flush=True)
+            return entrada.texto, OBSOLETO
+
+    async def _descargar(
+        self,
+        url: str,
+        entrada: Optional[EntradaCache],
+        cabeceras: Dict[str, str],
+        timeout: float,
+        limite_caracteres: int,
+        max_bytes: int,
+    ) -> Tuple[str, str]:
+        """Petición (condicional si hay copia) y extracción incremental del texto"""
+        async with obtener_cliente().stream("GET", url, headers=cabeceras, timeout=timeout) as resp:
+            if resp.status_code == 304 and entrada is not None:
+                entrada.obtenido = time.time()
+                self.guardar(entrada)
+                return entrada.texto, REVALIDADO
+            resp.raise_for_status()
+            # Cada trozo se analiza al llegar (poco trabajo por trozo); al
+            # salir del bloque antes del final se descarta el resto
+            extractor = ExtractorTexto(limite_caracteres, max_bytes, resp.headers.get("Content-Type"))
+            async for trozo in resp.aiter_bytes():
+                extractor.alimentar(trozo)
+                if extractor.completo:
+                    break
+
+        nueva = EntradaCache(
+            url=url,
+            texto=extractor.texto(),
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            obtenido=time.time(),
+        )
+        self.guardar(nueva)
+        return nueva.texto, DESCARGADO
+
+    async def obtener_varios(
+        self,
+        urls: List[str],
+        plazo_fuente: float = PLAZO_FUENTE,
+        plazo_total: float = PLAZO_TOTAL,
+        limite_caracteres: int = LIMITE_CARACTERES,
+    ) -> Dict[str, Union[Tuple[str, str], Exception]]:
+        """
+        Lee varias páginas a la vez, con un plazo por fuente y otro para el conjunto
+
+        Args:
+            urls: URLs a leer
+            plazo_fuente: Tiempo máximo de cada lectura en segundos
+            plazo_total: Tiempo máximo de espera del conjunto en segundos
+            limite_caracteres: Máximo de caracteres de texto por página
+
+        Returns:
+            dict: url -> (texto, estado), o la excepción de esa fuente. Las
+            fuentes que no terminaron dentro del plazo total reciben su copia
+            guardada (estado OBSOLETO) o, si no la hay, un asyncio.TimeoutError;
+            en ambos casos siguen descargándose en segundo plano (hasta su
+            propio plazo) para quedar en la caché.
+        """
+        # El plazo por fuente lo aplica obtener_texto, que al vencer sirve la copia guardada
+        tareas = {
+            url: asyncio.ensure_future(
+                self.obtener_texto(url, timeout=plazo_fuente, limite_caracteres=limite_caracteres)
+            )
+            for url in dict.fromkeys(urls)
+        }
+        if not tareas:
+            return {}
+        await asyncio.wait(tareas.values(), timeout=plazo_total)
+
+        resultados: Dict[str, Union[Tuple[str, str], Exception]] = {}
+        for url, tarea in tareas.items():
+            if not tarea.done():
+                _en_segundo_plano.add(tarea)
+                tarea.add_done_callback(_terminar_en_segundo_plano)
+                entrada = self.leer(url)
+                if entrada is not None:
+                    resultados[url] = (entrada.texto, OBSOLETO)
+                else:
+                    resultados[url] = asyncio.TimeoutError(f"Sin respuesta de {url} en {plazo_total:g}s")
+            elif tarea.exception() is not None:
+                resultados[url] = tarea.exception()
+            else:
+                resultados[url] = tarea.result()
+        return resultados
+
+
+# Descargas que superaron el plazo total: se conservan hasta que terminen
+_en_segundo_plano: Set[asyncio.Future] = set()
+
+
+def _terminar_en_segundo_plano(tarea: asyncio.Future):
+    _en_segundo_plano.discard(tarea)
+    if not tarea.cancelled() and tarea.exception() is not None:
+        print(f"⚠️ Descarga en segundo plano fallida: {tarea.exception()}", file=sys.stderr, flush=True)
+
+
+# Instancia compartida por las herramientas del agente y el servidor MCP
+cache = CacheHTTP()
+
+
+def obtener_cache() -> CacheHTTP:
+    """Retorna la instancia compartida de la caché"""
+    return cache
+
+
+def main():
+    try:
+        from .fuentes import FUENTES
+    except ImportError:
+        from fuentes import FUENTES
+
+    parser = argparse.ArgumentParser(description="Caché de páginas del Agente Bosque")
+    parser.add_argument("--sembrar", action="store_true", help="Descarga todas las FUENTES a la caché")
+    parser.add_argument("--listar", action="store_true", help="Muestra el estado de la caché")
+    args = parser.parse_args()
+
+    if args.sembrar:
+        # Se fuerza la descarga aunque haya copia fresca
+        sembradora = CacheHTTP(cache.carpeta, ttl=0, offline=False)
+        resultados = asyncio.run(sembradora.obtener_varios(list(FUENTES.values()), plazo_fuente=30, plazo_total=60))
+        for clave, url in FUENTES.items():
+            resultado = resultados[url]
+            if isinstance(resultado, Exception):
+                print(f"⚠️ {clave}: {resultado}")
+            else:
+                texto, estado = resultado
+                print(f"✅ {clave}: {estado} ({len(texto):,} caracteres)")
+
+    if args.listar or not args.sembrar:
+        print(f"📁 Caché: {cache.carpeta}")
+        for clave, url in FUENTES.items():
+            entrada = cache.leer(url)
+            if entrada is None:
+                print(f"   • {clave}: sin copia")
+            else:
+                edad = (time.time() - entrada.obtenido) / 3600
+                print(f"   • {clave}: {len(entrada.texto):,} caracteres, hace {edad:.1f} h")
+
+
+if __name__ == "__main__":
+    main()
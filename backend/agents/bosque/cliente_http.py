@@ -0,0 +1,42 @@
+"""
+Cliente HTTP asíncrono compartido del Agente Bosque
+
+Un único httpx.AsyncClient con pool de conexiones y keep-alive por bucle de
+eventos: las herramientas del agente (bucle del servidor) y el servidor MCP
+(su propio bucle) reutilizan conexiones en lugar de abrir una por petición.
+"""
+
+import asyncio
+import weakref
+
+import httpx
+
+# Tiempos máximos por petición (conexión y total)
+TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+LIMITES = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+CABECERAS = {"User-Agent": "DATAR-AgenteBosque/1.0"}
+
+# Un cliente por bucle de eventos: un AsyncClient no puede usarse desde otro bucle
+_clientes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def obtener_cliente() -> httpx.AsyncClient:
+    """Retorna el cliente compartido del bucle de eventos actual (lo crea la primera vez)"""
+    bucle = asyncio.get_running_loop()
+    cliente = _clientes.get(bucle)
+    if cliente is None or cliente.is_closed:
+        cliente = httpx.AsyncClient(
+            timeout=TIMEOUT,
+            limits=LIMITES,
+            headers=CABECERAS,
+            follow_redirects=True,
+        )
+        _clientes[bucle] = cliente
+    return cliente
+
+
+async def cerrar_cliente():
+    """Cierra el cliente del bucle de eventos actual (si existe)"""
+    cliente = _clientes.pop(asyncio.get_running_loop(), None)
+    if cliente is not None:
+        await cliente.aclose()
@@ -0,0 +1,400 @@
+"""
+Corpus de PDFs del Agente Bosque (Margulis, Haraway, filosofía de los hongos...)
+
+Cada PDF de la carpeta se analiza una sola vez con PyMuPDF. El texto de todas
+sus páginas se guarda en un archivo <sha256>.txt (UTF-8, páginas seguidas) y
+los desplazamientos de cada página en una base SQLite, junto con un índice
+FTS5 por página sin contenido propio (el texto no se duplica: se lee del .txt
+mediante mmap). Un PDF que no cambió (mismo tamaño y fecha) ni siquiera se
+vuelve a leer para calcular su hash, y durante la conversación nunca se
+analiza un PDF: explorar_pdf solo consulta el índice.
+
+Ingesta (desde backend/):
+    python -m agents.bosque.corpus_pdf --sincronizar [--pdfs carpeta]
+    python -m agents.bosque.corpus_pdf --buscar "endosimbiosis"
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+try:
+    from .cache_http import CARPETA_CACHE
+    from .pasajes import consulta_fts, seleccionar_pasajes
+except ImportError:
+    from cache_http import CARPETA_CACHE
+    from pasajes import consulta_fts, seleccionar_pasajes
+
+CARPETA_PDFS = Path(os.getenv("BOSQUE_PDFS", Path(__file__).parent / "pdfs"))
+CARPETA_CORPUS = CARPETA_CACHE / "pdf"
+RUTA_TEMAS = Path(__file__).parent / "datos" / "temas_pdf.json"
+
+# Tokens de texto por página encontrada en la respuesta de explorar_pdf
+PRESUPUESTO_PAGINA = 250
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS archivos (
+    ruta TEXT PRIMARY KEY,
+    tamano INTEGER NOT NULL,
+    modificado REAL NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documentos (
+    hash TEXT PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    titulo TEXT NOT NULL,
+    paginas INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paginas (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL,
+    pagina INTEGER NOT NULL,
+    inicio INTEGER NOT NULL,
+    fin INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS paginas_por_hash ON paginas (hash, pagina);
+CREATE VIRTUAL TABLE IF NOT EXISTS paginas_fts USING fts5(
+    texto,
+    content = '',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+@dataclass
+class ResultadoPagina:
+    """Página de un PDF encontrada para una consulta"""
+    nombre: str
+    titulo: str
+    pagina: int
+    texto: str
+    puntaje: float
+
+
+def hash_archivo(ruta: Path) -> str:
+    """sha256 del contenido de un archivo, leído por bloques"""
+    resumen = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(1024 * 1024), b""):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+
+class CorpusPDF:
+    """
+    Texto por página de los PDFs, guardado por hash de archivo e indexado con FTS5
+    """
+
+    def __init__(self, carpeta: Path = CARPETA_CORPUS):
+        self.carpeta = Path(carpeta)
+        self.ruta_base = self.carpeta / "corpus.sqlite3"
+        self._local = threading.local()
+        self._mapas: Dict[str, mmap.mmap] = {}
+        self._candado = threading.Lock()
+
+    def existe(self) -> bool:
+        """Indica si ya se sincronizó algún PDF (la base con el esquema vacío no cuenta)"""
+        if not self.ruta_base.is_file():
+            return False
+        return self._conexion().execute("SELECT 1 FROM documentos LIMIT 1").fetchone() is not None
+
+    def _conexion(self) -> sqlite3.Connection:
+        # Una conexión por hilo: sqlite3 no comparte conexiones entre hilos
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            self.carpeta.mkdir(parents=True, exist_ok=True)
+            conexion = sqlite3.connect(self.ruta_base)
+            conexion.executescript(_ESQUEMA)
+            self._local.conexion = conexion
+        return conexion
+
+    def _ruta_texto(self, hash_pdf: str) -> Path:
+        return self.carpeta / f"{hash_pdf}.txt"
+
+    def _mapa(self, hash_pdf: str):
+        """Mapa en memoria del texto de un PDF (se abre una vez y se reutiliza)"""
+        with self._candado:
+            mapa = self._mapas.get(hash_pdf)
+            if mapa is None:
+                with open(self._ruta_texto(hash_pdf), "rb") as archivo:
+                    if os.fstat(archivo.fileno()).st_size == 0:
+                        return b""
+                    # El mapa sigue siendo válido después de cerrar el archivo
+                    mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+                self._mapas[hash_pdf] = mapa
+            return mapa
+
+    def _cerrar_mapa(self, hash_pdf: str):
+        with self._candado:
+            mapa = self._mapas.pop(hash_pdf, None)
+        if mapa is not None:
+            mapa.close()
+
+    def texto_pagina(self, hash_pdf: str, pagina: int) -> str:
+        """Texto de una página (numeradas desde 1), leído del archivo mapeado"""
+        fila = self._conexion().execute(
+            "SELECT inicio, fin FROM paginas WHERE hash = ? AND pagina = ?", (hash_pdf, pagina)
+        ).fetchone()
+        if fila is None:
+            return ""
+        inicio, fin = fila
+        return self._mapa(hash_pdf)[inicio:fin].decode("utf-8")
+
+    def _extraer(self, ruta: Path, hash_pdf: str):
+        """Analiza un PDF y guarda su texto, sus páginas y su índice"""
+        # PyMuPDF solo se necesita para la ingesta (el módulo se llama "fitz" antes de la 1.24)
+        try:
+            import pymupdf as fitz
+        except ImportError:
+            import fitz
+
+        with fitz.open(ruta) as documento:
+            titulo = (documento.metadata or {}).get("title") or ruta.stem.replace("_", " ")
+            textos = [pagina.get_text() for pagina in documento]
+
+        desplazamientos: List[Tuple[int, int]] = []
+        partes: List[bytes] = []
+        posicion = 0
+        for texto in textos:
+            datos = texto.encode("utf-8")
+            desplazamientos.append((posicion, posicion + len(datos)))
+            partes.append(datos)
+            posicion += len(datos)
+
+        destino = self._ruta_texto(hash_pdf)
+        temporal = destino.with_name(f"{destino.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        with open(temporal, "wb") as archivo:
+            archivo.write(b"".join(partes))
+        os.replace(temporal, destino)
+
+        conexion = self._conexion()
+        with conexion:
+            for numero, ((inicio, fin), texto) in enumerate(zip(desplazamientos, textos), 1):
+                cursor = conexion.execute(
+                    "INSERT INTO paginas (hash, pagina, inicio, fin) VALUES (?, ?, ?, ?)",
+                    (hash_pdf, numero, inicio, fin),
+                )
+                conexion.execute("INSERT INTO paginas_fts (rowid, texto) VALUES (?, ?)", (cursor.lastrowid, texto))
+            conexion.execute(
+                "INSERT INTO documentos (hash, nombre, titulo, paginas) VALUES (?, ?, ?, ?)",
+                (hash_pdf, ruta.name, titulo, len(textos)),
+            )
+
+    def _eliminar(self, hash_pdf: str) -> bool:
+        """
+        Quita un PDF del corpus (el índice sin contenido necesita el texto original para borrar)
+
+        Returns:
+            bool: False si faltaba el texto: las filas se borran igual, pero sus
+                páginas siguen en el índice y hay que reconstruirlo
+        """
+        conexion = self._conexion()
+        filas = conexion.execute("SELECT id, pagina FROM paginas WHERE hash = ?", (hash_pdf,)).fetchall()
+        try:
+            textos = [(id_pagina, self.texto_pagina(hash_pdf, numero)) for id_pagina, numero in filas]
+        except (OSError, ValueError):
+            textos = None  # el <hash>.txt no existe o está dañado
+        with conexion:
+            for id_pagina, texto in textos or ():
+                conexion.execute(
+                    "INSERT INTO paginas_fts (paginas_fts, rowid, texto) VALUES ('delete', ?, ?)",
+                    (id_pagina, texto),
+                )
+            conexion.execute("DELETE FROM paginas WHERE hash = ?", (hash_pdf,))
+            conexion.execute("DELETE FROM documentos WHERE hash = ?", (hash_pdf,))
+        self._cerrar_mapa(hash_pdf)
+        self._ruta_texto(hash_pdf).unlink(missing_ok=True)
+        return textos is not None
+
+    def _reconstruir_indice(self):
+        """Vuelve a indexar todas las páginas desde sus textos (las de un texto ilegible quedan fuera)"""
+        conexion = self._conexion()
+        filas = conexion.execute("SELECT id, hash, pagina FROM paginas ORDER BY hash, pagina").fetchall()
+        with conexion:
+            conexion.execute("INSERT INTO paginas_fts (paginas_fts) VALUES ('delete-all')")
+            for id_pagina, hash_pdf, numero in filas:
+                try:
+                    texto = self.texto_pagina(hash_pdf, numero)
+                except (OSError, ValueError):
+                    continue
+                conexion.execute("INSERT INTO paginas_fts (rowid, texto) VALUES (?, ?)", (id_pagina, texto))
+
+    def sincronizar(self, carpeta: Path = CARPETA_PDFS) -> Dict[str, object]:
+        """
+        Pone el corpus al día con los PDFs de una carpeta
+
+        Solo se analizan los PDFs nuevos o modificados; los que ya no están en
+        la carpeta se retiran del corpus. Un error con un archivo (al analizarlo
+        o al retirarlo) se anota en el resumen y no detiene la sincronización.
+
+        Args:
+            carpeta: Carpeta con los PDFs
+
+        Returns:
+            dict: nombre de archivo -> "analizado" / "sin cambios", o la excepción de ese archivo
+        """
+        conexion = self._conexion()
+        resumen: Dict[str, object] = {}
+        vigentes = set()
+        for ruta in sorted(Path(carpeta).glob("*.pdf")):
+            try:
+                estado = ruta.stat()
+                fila = conexion.execute(
+                    "SELECT hash FROM archivos WHERE ruta = ? AND tamano = ? AND modificado = ?",
+                    (str(ruta.resolve()), estado.st_size, estado.st_mtime),
+                ).fetchone()
+                hash_pdf = fila[0] if fila else hash_archivo(ruta)
+                conocido = conexion.execute("SELECT 1 FROM documentos WHERE hash = ?", (hash_pdf,)).fetchone()
+                if not conocido:
+                    self._extraer(ruta, hash_pdf)
+                with conexion:
+                    conexion.execute(
+                        "INSERT OR REPLACE INTO archivos (ruta, tamano, modificado, hash) VALUES (?, ?, ?, ?)",
+                        (str(ruta.resolve()), estado.st_size, estado.st_mtime, hash_pdf),
+                    )
+                vigentes.add(hash_pdf)
+                resumen[ruta.name] = "sin cambios" if conocido else "analizado"
+            except Exception as e:
+                resumen[ruta.name] = e
+
+        reconstruir = False
+        for hash_pdf, nombre in conexion.execute("SELECT hash, nombre FROM documentos").fetchall():
+            if hash_pdf not in vigentes:
+                try:
+                    reconstruir |= not self._eliminar(hash_pdf)
+                except Exception as e:
+                    resumen.setdefault(nombre, e)
+        if reconstruir:
+            self._reconstruir_indice()
+        with conexion:
+            conexion.execute(
+                f"DELETE FROM archivos WHERE hash NOT IN ({','.join('?' * len(vigentes))})", tuple(vigentes)
+            )
+        return resumen
+
+    def documentos(self) -> List[Dict]:
+        """Lista los PDFs del corpus"""
+        filas = self._conexion().execute("SELECT hash, nombre, titulo, paginas FROM documentos ORDER BY nombre").fetchall()
+        return [dict(zip(("hash", "nombre", "titulo", "paginas"), fila)) for fila in filas]
+
+    def buscar(self, consulta: str, limite: int = 3) -> List[ResultadoPagina]:
+        """
+        Busca las páginas más relevantes para una consulta (ranking BM25)
+
+        Args:
+            consulta: Texto libre
+            limite: Máximo de páginas
+
+        Returns:
+            list: ResultadoPagina con los pasajes de cada página que mejor responden a la consulta
+        """
+        expresion = consulta_fts(consulta)
+        if expresion is None:
+            return []
+        filas = self._conexion().execute(
+            """
+            SELECT p.hash, p.pagina, d.nombre, d.titulo, bm25(paginas_fts) AS puntaje
+            FROM paginas_fts
+            JOIN paginas p ON p.id = paginas_fts.rowid
+            JOIN documentos d ON d.hash = p.hash
+            WHERE paginas_fts MATCH ? ORDER BY puntaje LIMIT ?
+            """,
+            (expresion, limite),
+        ).fetchall()
+        return [
+            ResultadoPagina(
+                nombre, titulo, pagina,
+                seleccionar_pasajes(self.texto_pagina(hash_pdf, pagina), consulta, PRESUPUESTO_PAGINA),
+                -puntaje,
+            )
+            for hash_pdf, pagina, nombre, titulo, puntaje in filas
+        ]
+
+
+# Instancia compartida por las herramientas del agente, el servidor MCP y el índice
+corpus = CorpusPDF()
+
+
+def obtener_corpus() -> CorpusPDF:
+    """Retorna la instancia compartida del corpus"""
+    return corpus
+
+
+@lru_cache(maxsize=1)
+def cargar_temas() -> Dict[str, Dict[str, str]]:
+    """Temas curados de explorar_pdf: resumen y consulta sobre el corpus"""
+    with open(RUTA_TEMAS, encoding="utf-8") as archivo:
+        return json.load(archivo)["temas"]
+
+
+def explorar_tema(tema: str) -> str:
+    """
+    Respuesta de explorar_pdf: el resumen curado del tema (si lo hay) y las
+    páginas del corpus que mejor lo tratan
+
+    Args:
+        tema: Clave de un tema curado o cualquier término de búsqueda
+
+    Returns:
+        str: Texto para el agente
+    """
+    temas = cargar_temas()
+    clave = tema.lower().strip()
+    curado = temas.get(clave)
+    consulta = curado["consulta"] if curado else tema
+    resultados = corpus.buscar(consulta) if corpus.existe() else []
+
+    if not curado and not resultados:
+        return f"No se encontró información específica sobre '{tema}'. Temas disponibles: {', '.join(temas.keys())}"
+
+    partes = [f"\n{curado['resumen']}\n"] if curado else []
+    if resultados:
+        partes.append("📚 En los PDFs:\n")
+        for resultado in resultados:
+            partes.append(f"📄 {resultado.titulo} ({resultado.nombre}, pág. {resultado.pagina})\n{resultado.texto}\n")
+    return "\n".join(partes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus de PDFs del Agente Bosque")
+    parser.add_argument("--sincronizar", action="store_true", help="Analiza los PDFs nuevos o modificados")
+    parser.add_argument("--pdfs", type=Path, default=CARPETA_PDFS, help="Carpeta de PDFs")
+    parser.add_argument("--buscar", metavar="CONSULTA", help="Prueba una consulta o un tema de explorar_pdf")
+    args = parser.parse_args()
+
+    if args.sincronizar:
+        if not args.pdfs.is_dir():
+            print(f"⚠️ No existe la carpeta de PDFs {args.pdfs}")
+            return
+        inicio = time.perf_counter()
+        for nombre, resultado in corpus.sincronizar(args.pdfs).items():
+            if isinstance(resultado, Exception):
+                print(f"⚠️ {nombre}: {resultado}")
+            else:
+                print(f"✅ {nombre}: {resultado}")
+        print(f"📚 Corpus en {corpus.carpeta} ({time.perf_counter() - inicio:.1f} s)")
+
+    if args.buscar:
+        inicio = time.perf_counter()
+        print(explorar_tema(args.buscar))
+        print(f"⏱️ {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    if not args.sincronizar and not args.buscar:
+        if not corpus.existe():
+            print(f"📚 Sin corpus en {corpus.carpeta}")
+            return
+        for documento in corpus.documentos():
+            print(f"   • {documento['titulo']} ({documento['nombre']}): {documento['paginas']} páginas")
+
+
+if __name__ == "__main__":
+    main()
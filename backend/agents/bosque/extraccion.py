@@ -0,0 +1,226 @@
+"""
+Extracción incremental y acotada de texto HTML para el Agente Bosque
+
+En lugar de descargar la página completa y construir un árbol BeautifulSoup
+para quedarse con unos pocos miles de caracteres, el HTML se entrega por
+trozos a un parser incremental de lxml (HTMLPullParser). El texto se recoge en
+orden de documento, sin el contenido de script/style/nav/header/footer/aside,
+y la lectura se detiene en cuanto hay suficiente texto del contenido principal
+(<main>/<article>) o se supera el máximo de bytes.
+"""
+
+import codecs
+import re
+from typing import List, Optional
+
+from lxml import etree
+
+# Etiquetas cuyo contenido no es texto de lectura
+ETIQUETAS_OMITIDAS = frozenset({
+    "script", "style", "noscript", "template", "svg", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+})
+
+# Etiquetas que delimitan el contenido principal
+ETIQUETAS_PRINCIPALES = frozenset({"main", "article"})
+
+# Texto que se guarda por página: las herramientas eligen después los pasajes relevantes
+LIMITE_CARACTERES = 30000
+MAX_BYTES = 2 * 1024 * 1024
+
+# Declaración de codificación en los primeros bytes del documento
+_PATRON_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9._:-]+)""", re.IGNORECASE)
+_BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be"))
+
+# Sin contenido principal, se lee hasta este múltiplo del límite antes de rendirse
+_FACTOR_SIN_PRINCIPAL = 4
+
+
+def _nombre(elemento) -> Optional[str]:
+    """Nombre de la etiqueta en minúsculas, o None para comentarios e instrucciones"""
+    return elemento.tag.lower() if isinstance(elemento.tag, str) else None
+
+
+def _normalizar_codificacion(nombre: Optional[str]) -> Optional[str]:
+    try:
+        return codecs.lookup(nombre.strip()).name if nombre else None
+    except LookupError:
+        return None
+
+
+def detectar_codificacion(inicio: bytes, content_type: Optional[str] = None) -> str:
+    """
+    Determina la codificación de un documento HTML
+
+    Prioridad: charset de la cabecera Content-Type, BOM, <meta charset> en los
+    primeros bytes y, si no hay nada, UTF-8 (como hace httpx).
+
+    Args:
+        inicio: Primeros bytes del documento
+        content_type: Valor de la cabecera Content-Type, si se conoce
+
+    Returns:
+        str: Nombre normalizado de la codificación
+    """
+    if content_type and "charset=" in content_type.lower():
+        declarada = content_type.lower().split("charset=", 1)[1].split(";")[0].strip(' "\'')
+        codificacion = _normalizar_codificacion(declarada)
+        if codificacion:
+            return codificacion
+    for bom, codificacion in _BOMS:
+        if inicio.startswith(bom):
+            return codificacion
+    coincidencia = _PATRON_CHARSET.search(inicio[:2048])
+    if coincidencia:
+        codificacion = _normalizar_codificacion(coincidencia.group(1).decode("ascii", "ignore"))
+        if codificacion:
+            return codificacion
+    return "utf-8"
+
+
+def _textos_previos(elemento, padre) -> List[Optional[str]]:
+    """
+    Textos del padre que quedan justo antes de 'elemento' (o al final del
+    padre si 'elemento' es None): la cola del hermano anterior, y si este es un
+    comentario, también lo que hay antes de él, hasta llegar a otro elemento
+    o al texto inicial del padre.
+    """
+    textos = []
+    anterior = elemento.getprevious() if elemento is not None else (padre[-1] if len(padre) else None)
+    while anterior is not None:
+        textos.append(anterior.tail)
+        if _nombre(anterior) is not None:
+            break
+        anterior = anterior.getprevious()
+    else:
+        textos.append(padre.text)
+    return textos[::-1]
+
+
+class ExtractorTexto:
+    """
+    Extrae texto de un documento HTML que llega por trozos
+
+    Uso:
+        extractor = ExtractorTexto()
+        for trozo in trozos:
+            extractor.alimentar(trozo)
+            if extractor.completo:
+                break
+        texto = extractor.texto()
+    """
+
+    def __init__(self, limite_caracteres: int = LIMITE_CARACTERES, max_bytes: int = MAX_BYTES,
+                 content_type: Optional[str] = None):
+        self.limite = limite_caracteres
+        self.max_bytes = max_bytes
+        self.bytes_leidos = 0
+        self.completo = False
+        self._content_type = content_type
+        # El parser se crea con el primer trozo, cuando ya se puede detectar la codificación
+        self._parser: Optional[etree.HTMLPullParser] = None
+        self._omitiendo = 0
+        self._en_principal = 0
+        self._general: List[str] = []
+        self._principal: List[str] = []
+        self._largo_general = 0
+        self._largo_principal = 0
+
+    def _agregar(self, textos: List[Optional[str]]):
+        if self._omitiendo:
+            return
+        for texto in textos:
+            if not texto:
+                continue
+            texto = texto.strip()
+            if not texto:
+                continue
+            self._general.append(texto)
+            self._largo_general += len(texto) + 1
+            if self._en_principal:
+                self._principal.append(texto)
+                self._largo_principal += len(texto) + 1
+
+        if self._largo_principal >= self.limite or self._largo_general >= self.limite * _FACTOR_SIN_PRINCIPAL:
+            self.completo = True
+
+    def _procesar_eventos(self):
+        for evento, elemento in self._parser.read_events():
+            nombre = _nombre(elemento)
+            if evento == "start":
+                # El texto del padre anterior a este elemento ya está completo
+                padre = elemento.getparent()
+                if padre is not None:
+                    self._agregar(_textos_previos(elemento, padre))
+                if nombre in ETIQUETAS_OMITIDAS:
+                    self._omitiendo += 1
+                if nombre in ETIQUETAS_PRINCIPALES:
+                    self._en_principal += 1
+            else:
+                # Texto final del elemento (tras su último hijo, o todo si no tiene)
+                self._agregar(_textos_previos(None, elemento))
+                if nombre in ETIQUETAS_OMITIDAS:
+                    self._omitiendo -= 1
+                if nombre in ETIQUETAS_PRINCIPALES:
+                    self._en_principal -= 1
+                # Los hijos ya se procesaron: se liberan, conservando la cola
+                elemento.clear(keep_tail=True)
+            if self.completo:
+                return
+
+    def alimentar(self, trozo: bytes):
+        """
+        Entrega un trozo de HTML al parser
+
+        Args:
+            trozo: Bytes del documento
+        """
+        if self.completo:
+            return
+        if self._parser is None:
+            codificacion = detectar_codificacion(trozo, self._content_type)
+            self._parser = etree.HTMLPullParser(events=("start", "end"), encoding=codificacion)
+        self.bytes_leidos += len(trozo)
+        self._parser.feed(trozo)
+        self._procesar_eventos()
+        if self.bytes_leidos >= self.max_bytes:
+            self.completo = True
+
+    def texto(self) -> str:
+        """
+        Retorna el texto extraído: el del contenido principal si la página lo
+        marca, si no el de todo el documento; como máximo 'limite' caracteres.
+        """
+        if not self.completo and self._parser is not None:
+            try:
+                self._parser.close()
+            except etree.LxmlError:
+                pass
+            self._procesar_eventos()
+            self.completo = True
+        partes = self._principal if self._principal else self._general
+        return "\n".join(partes)[:self.limite]
+
+
+def extraer_texto(html, limite_caracteres: int = LIMITE_CARACTERES, tamano_trozo: int = 64 * 1024) -> str:
+    """
+    Extrae el texto de un documento HTML completo (en str o bytes)
+
+    Args:
+        html: Documento HTML
+        limite_caracteres: Máximo de caracteres del resultado
+        tamano_trozo: Tamaño de los trozos entregados al parser
+
+    Returns:
+        str: Texto extraído
+    """
+    if isinstance(html, str):
+        datos, content_type = html.encode("utf-8"), "text/html; charset=utf-8"
+    else:
+        datos, content_type = html, None
+    extractor = ExtractorTexto(limite_caracteres, content_type=content_type)
+    for inicio in range(0, len(datos), tamano_trozo):
+        extractor.alimentar(datos[inicio:inicio + tamano_trozo])
+        if extractor.completo:
+            break
+    return extractor.texto()
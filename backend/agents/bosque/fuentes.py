@@ -0,0 +1,10 @@
+"""
+Fuentes web fijas del Agente Bosque (compartidas por tools.py y el servidor MCP)
+"""
+
+FUENTES = {
+    "pot": "https://bogota.gov.co/bog/pot-2022-2035/",
+    "biomimética": "https://asknature.org/",
+    "suelo": "https://www.frontiersin.org/journals/microbiology/articles/10.3389/fmicb.2019.02872/full",
+    "briofitas": "https://stri.si.edu/es/noticia/briofitas",
+}
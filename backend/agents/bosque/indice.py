@@ -0,0 +1,286 @@
+"""
+Índice local de texto completo del Agente Bosque
+
+Las fuentes web configuradas y los PDFs locales se trocean en pasajes y se
+guardan en una tabla SQLite FTS5 (sin tildes ni mayúsculas). 'explorar'
+consulta el índice con ranking BM25 y devuelve los mejores pasajes en
+milisegundos, sin ninguna petición de red durante la conversación.
+
+Ingesta (desde backend/):
+    python -m agents.bosque.indice --ingerir [--pdfs carpeta]
+    python -m agents.bosque.indice --buscar "musgos y humedad"
+
+Variables de entorno:
+    BOSQUE_INDICE    ruta del archivo SQLite (por defecto backend/cache/bosque_indice.sqlite3)
+    BOSQUE_PDFS      carpeta de PDFs para la ingesta (por defecto backend/agents/bosque/pdfs)
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+try:
+    from .cache_http import CARPETA_CACHE, CacheHTTP, obtener_cache
+    from .corpus_pdf import CARPETA_PDFS, obtener_corpus
+    from .fuentes import FUENTES
+    from .pasajes import consulta_fts, dividir_en_pasajes
+except ImportError:
+    from cache_http import CARPETA_CACHE, CacheHTTP, obtener_cache
+    from corpus_pdf import CARPETA_PDFS, obtener_corpus
+    from fuentes import FUENTES
+    from pasajes import consulta_fts, dividir_en_pasajes
+
+RUTA_INDICE = Path(os.getenv("BOSQUE_INDICE", Path(__file__).parent.parent.parent / "cache" / "bosque_indice.sqlite3"))
+
+# Caracteres por página web en la ingesta (la caché de lectura guarda menos)
+LIMITE_INGESTA = 200_000
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS documentos (
+    fuente TEXT PRIMARY KEY,
+    titulo TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    pasajes INTEGER NOT NULL,
+    indexado REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pasajes USING fts5(
+    texto,
+    titulo,
+    fuente UNINDEXED,
+    ubicacion UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+@dataclass
+class ResultadoBusqueda:
+    """Pasaje encontrado en el índice"""
+    fuente: str
+    titulo: str
+    ubicacion: str
+    texto: str
+    puntaje: float
+
+
+class IndiceBosque:
+    """
+    Índice FTS5 de pasajes de las fuentes del bosque
+    """
+
+    def __init__(self, ruta: Path = RUTA_INDICE):
+        self.ruta = Path(ruta)
+        self._local = threading.local()
+
+    def existe(self) -> bool:
+        """Indica si el índice ya tiene algún documento (un archivo con el esquema vacío no cuenta)"""
+        if not self.ruta.is_file():
+            return False
+        return self._conexion().execute("SELECT 1 FROM documentos LIMIT 1").fetchone() is not None
+
+    def _conexion(self) -> sqlite3.Connection:
+        # Una conexión por hilo: sqlite3 no comparte conexiones entre hilos
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            conexion = sqlite3.connect(self.ruta)
+            conexion.executescript(_ESQUEMA)
+            self._local.conexion = conexion
+        return conexion
+
+    def agregar_documento(self, fuente: str, titulo: str, tipo: str, textos: List[Tuple[str, str]]) -> int:
+        """
+        Indexa (o reindexa) un documento
+
+        Args:
+            fuente: URL o nombre de archivo (identifica el documento)
+            titulo: Título legible
+            tipo: "web" o "pdf"
+            textos: Lista de (ubicación, texto), p. ej. [("pág. 3", "...")] o [("", texto)]
+
+        Returns:
+            int: Número de pasajes indexados
+        """
+        filas = [
+            (pasaje, titulo, fuente, ubicacion)
+            for ubicacion, texto in textos
+            for pasaje in dividir_en_pasajes(texto)
+        ]
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute("DELETE FROM pasajes WHERE fuente = ?", (fuente,))
+            conexion.executemany("INSERT INTO pasajes (texto, titulo, fuente, ubicacion) VALUES (?, ?, ?, ?)", filas)
+            conexion.execute(
+                "INSERT OR REPLACE INTO documentos (fuente, titulo, tipo, pasajes, indexado) VALUES (?, ?, ?, ?, ?)",
+                (fuente, titulo, tipo, len(filas), time.time()),
+            )
+        return len(filas)
+
+    def eliminar_documento(self, fuente: str):
+        """Quita un documento y sus pasajes del índice"""
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute("DELETE FROM pasajes WHERE fuente = ?", (fuente,))
+            conexion.execute("DELETE FROM documentos WHERE fuente = ?", (fuente,))
+
+    def optimizar(self):
+        """Compacta el índice FTS5 tras una ingesta"""
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute("INSERT INTO pasajes (pasajes) VALUES ('optimize')")
+
+    def documentos(self) -> List[Dict]:
+        """Lista los documentos indexados"""
+        filas = self._conexion().execute(
+            "SELECT fuente, titulo, tipo, pasajes, indexado FROM documentos ORDER BY tipo, titulo"
+        ).fetchall()
+        return [dict(zip(("fuente", "titulo", "tipo", "pasajes", "indexado"), fila)) for fila in filas]
+
+    def buscar(self, consulta: str, limite: int = 5) -> List[ResultadoBusqueda]:
+        """
+        Busca los pasajes más relevantes para una consulta (ranking BM25)
+
+        Args:
+            consulta: Texto libre
+            limite: Máximo de pasajes
+
+        Returns:
+            list: ResultadoBusqueda ordenados de más a menos relevante
+        """
+        expresion = consulta_fts(consulta)
+        if expresion is None:
+            return []
+        # bm25() es negativo: más bajo = más relevante. El título pesa menos que el texto
+        filas = self._conexion().execute(
+            """
+            SELECT fuente, titulo, ubicacion, texto, bm25(pasajes, 1.0, 0.5) AS puntaje
+            FROM pasajes WHERE pasajes MATCH ? ORDER BY puntaje LIMIT ?
+            """,
+            (expresion, limite),
+        ).fetchall()
+        return [ResultadoBusqueda(f, t, u, x, -p) for f, t, u, x, p in filas]
+
+
+def formatear_resultados(consulta: str, resultados: List[ResultadoBusqueda]) -> str:
+    """Texto de respuesta de 'explorar' a partir de los pasajes encontrados"""
+    if not resultados:
+        return f"No encontré pasajes sobre '{consulta}' en las fuentes indexadas."
+    partes = [f"🔎 Pasajes sobre '{consulta}':\n"]
+    for resultado in resultados:
+        origen = "📄" if resultado.fuente.lower().endswith(".pdf") else "🌐"
+        ubicacion = f" ({resultado.ubicacion})" if resultado.ubicacion else ""
+        partes.append(f"{origen} {resultado.titulo}{ubicacion} — {resultado.fuente}\n{resultado.texto}\n")
+    return "\n".join(partes)
+
+
+# Instancia compartida por las herramientas del agente y el servidor MCP
+indice = IndiceBosque()
+
+
+def obtener_indice() -> IndiceBosque:
+    """Retorna la instancia compartida del índice"""
+    return indice
+
+
+async def ingerir_fuentes(destino: IndiceBosque, fuentes: Dict[str, str]) -> Dict[str, object]:
+    """
+    Descarga las fuentes web completas y las indexa
+
+    Usa una caché propia (subcarpeta "ingesta") que guarda el texto completo:
+    con BOSQUE_OFFLINE=1 se reindexa desde esa copia sin tocar la red.
+
+    Returns:
+        dict: clave -> número de pasajes, o la excepción de esa fuente
+    """
+    lector = CacheHTTP(CARPETA_CACHE / "ingesta", ttl=0, offline=obtener_cache().offline)
+    resultados = await lector.obtener_varios(
+        list(fuentes.values()), plazo_fuente=30, plazo_total=120, limite_caracteres=LIMITE_INGESTA
+    )
+    resumen: Dict[str, object] = {}
+    for clave, url in fuentes.items():
+        resultado = resultados[url]
+        if isinstance(resultado, Exception):
+            resumen[clave] = resultado
+        else:
+            texto, _ = resultado
+            resumen[clave] = destino.agregar_documento(url, clave, "web", [("", texto)])
+    return resumen
+
+
+def ingerir_pdfs(destino: IndiceBosque, carpeta: Path) -> Dict[str, object]:
+    """
+    Indexa los PDFs de una carpeta, página por página
+
+    El texto sale del corpus de PDFs (corpus_pdf.py): solo se analizan los
+    archivos nuevos o modificados desde la última sincronización.
+
+    Returns:
+        dict: nombre de archivo -> número de pasajes, o la excepción de ese archivo
+    """
+    corpus = obtener_corpus()
+    resumen: Dict[str, object] = {
+        nombre: resultado for nombre, resultado in corpus.sincronizar(carpeta).items()
+        if isinstance(resultado, Exception)
+    }
+    en_corpus = {documento["nombre"] for documento in corpus.documentos()}
+    for documento in destino.documentos():
+        if documento["tipo"] == "pdf" and documento["fuente"] not in en_corpus:
+            destino.eliminar_documento(documento["fuente"])
+    for documento in corpus.documentos():
+        paginas = [
+            (f"pág. {numero}", corpus.texto_pagina(documento["hash"], numero))
+            for numero in range(1, documento["paginas"] + 1)
+        ]
+        resumen[documento["nombre"]] = destino.agregar_documento(documento["nombre"], documento["titulo"], "pdf", paginas)
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice local de texto completo del Agente Bosque")
+    parser.add_argument("--ingerir", action="store_true", help="Indexa las FUENTES web y los PDFs")
+    parser.add_argument("--pdfs", type=Path, default=CARPETA_PDFS, help="Carpeta de PDFs a indexar")
+    parser.add_argument("--buscar", metavar="CONSULTA", help="Prueba una consulta sobre el índice")
+    parser.add_argument("--limite", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.ingerir:
+        inicio = time.perf_counter()
+        resumen = asyncio.run(ingerir_fuentes(indice, FUENTES))
+        if args.pdfs.is_dir():
+            resumen.update(ingerir_pdfs(indice, args.pdfs))
+        else:
+            print(f"📁 Sin carpeta de PDFs en {args.pdfs}")
+        indice.optimizar()
+        for nombre, resultado in resumen.items():
+            if isinstance(resultado, Exception):
+                print(f"⚠️ {nombre}: {resultado}")
+            else:
+                print(f"✅ {nombre}: {resultado} pasajes")
+        print(f"📚 Índice en {indice.ruta} ({time.perf_counter() - inicio:.1f} s)")
+
+    if args.buscar:
+        if not indice.existe():
+            print("⚠️ El índice no existe: ejecuta primero --ingerir")
+            return
+        inicio = time.perf_counter()
+        resultados = indice.buscar(args.buscar, args.limite)
+        print(formatear_resultados(args.buscar, resultados))
+        print(f"⏱️ {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    if not args.ingerir and not args.buscar:
+        if not indice.existe():
+            print(f"📚 Sin índice en {indice.ruta}")
+            return
+        print(f"📚 Índice: {indice.ruta}")
+        for documento in indice.documentos():
+            print(f"   • [{documento['tipo']}] {documento['titulo']}: {documento['pasajes']} pasajes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,49 @@
 # MCP/mcp_server_bosque.py
 
-from fastmcp import FastMCP
-import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
 import os
+import sys
 from datetime import datetime
 
+from fastmcp import FastMCP
+
+# El servidor se ejecuta como script (python mcp_server_bosque.py) o como módulo del paquete
+try:
+    from .cache_http import obtener_cache
+    from .corpus_pdf import explorar_tema
+    from .fuentes import FUENTES
+    from .indice import formatear_resultados, obtener_indice
+    from .motor_especies import obtener_motor
+    from .pasajes import seleccionar_pasajes
+except ImportError:
+    from cache_http import obtener_cache
+    from corpus_pdf import explorar_tema
+    from fuentes import FUENTES
+    from indice import formatear_resultados, obtener_indice
+    from motor_especies import obtener_motor
+    from pasajes import seleccionar_pasajes
+
 # Inicializa el servidor
 mcp = FastMCP("servidor_bosque")
 
-# Fuentes fijas
-FUENTES = {
-    "pot": "https://bogota.gov.co/bog/pot-2022-2035/",
-    "biomimética": "https://asknature.org/",
-    "suelo": "https://www.frontiersin.org/journals/microbiology/articles/10.3389/fmicb.2019.02872/full",
-    "briofitas": "https://stri.si.edu/es/noticia/briofitas",
-}
-
 def log_uso(fuente, tipo):
     """Guarda registro de cada fuente usada."""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"[{timestamp}] Usando {tipo}: {fuente}", flush=True)
+    # A stderr: con el transporte stdio, stdout es el canal del protocolo
+    print(f"[{timestamp}] Usando {tipo}: {fuente}", file=sys.stderr, flush=True)
 
 @mcp.tool()
-def leer_pagina(url: str) -> str:
-    """Lee y devuelve texto de una página web."""
+async def leer_pagina(url: str, consulta: str = "") -> str:
+    """
+    Lee y devuelve texto de una página web. Con una consulta, devuelve solo
+    los pasajes de la página más relevantes para ella.
+    """
     log_uso(url, "página web")
-    resp = requests.get(url)
-    soup = BeautifulSoup(resp.text, "html.parser")
-    text = soup.get_text(separator="\n", strip=True)
-    return text[:4000]
+    text, _ = await obtener_cache().obtener_texto(url, timeout=10)
+    if not consulta:
+        return text[:4000]
+    return seleccionar_pasajes(text, consulta)
 
 @mcp.tool()
 def explorar_pdf(tema: str) -> str:
@@ -37,88 +51,41 @@ def explorar_pdf(tema: str) -> str:
     Explora temas relacionados con filosofía de la biología, simbiosis,
     concepto de individuo y asociaciones.
     """
-    tema = tema.lower().strip()
-
-    # Respuestas predefinidas sobre temas filosóficos
-    respuestas = {
-        "filosofia_fungi": """
-📄 Tema: Filosofía de los hongos
-
-Resumen: Los hongos desafían nuestra noción tradicional de individualidad.
-No son ni plantas ni animales, sino una forma de vida que cuestiona los límites
-entre organismos. Un hongo puede extenderse por kilómetros como un solo organismo,
-o puede existir en simbiosis con las raíces de los árboles.
-
-Preguntas reflexivas:
-- ¿Dónde termina un individuo y comienza otro en un bosque interconectado por redes fúngicas?
-- ¿Qué significa ser un "individuo" si tu supervivencia depende completamente de otros organismos?
-- ¿Podemos aplicar conceptos de cooperación fúngica a nuestras propias sociedades humanas?
-        """,
-        "margullis": """
-📄 Tema: Teoría de la endosimbiosis de Lynn Margulis
-
-Resumen: Margulis propuso que las células eucariotas se originaron por simbiosis entre
-diferentes organismos procarióticos. Las mitocondrias y cloroplastos fueron alguna vez
-bacterias independientes. Esto implica que la cooperación, no solo la competencia,
-es fundamental para la evolución.
-
-Preguntas reflexivas:
-- Si nuestras células son el resultado de antiguas simbiosis, ¿somos realmente individuos o ecosistemas ambulantes?
-- ¿Qué papel juega la cooperación en la evolución de la vida compleja?
-- ¿Cómo cambia nuestra relación con la naturaleza si reconocemos que llevamos otros organismos dentro de nosotros?
-        """,
-        "hongo_planta": """
-📄 Tema: Simbiosis entre hongos y plantas
-
-Resumen: Las micorrizas son asociaciones simbióticas entre hongos y raíces de plantas.
-El hongo ayuda a la planta a absorber nutrientes del suelo, mientras la planta
-proporciona carbohidratos al hongo. Esta relación es tan antigua y fundamental
-que permitió a las plantas colonizar la tierra hace 450 millones de años.
-
-Preguntas reflexivas:
-- ¿Dónde está el límite entre el hongo y la planta en una micorriza?
-- ¿Pueden existir identidades separadas cuando dos organismos son completamente interdependientes?
-- ¿Qué nos enseña la micorriza sobre las relaciones humanas y la interdependencia?
-        """,
-        "donna": """
-📄 Tema: Pensamiento multiespecie (Donna Haraway)
-
-Resumen: Haraway propone que debemos pensar más allá del antropocentrismo y
-reconocer que vivimos en un mundo de "compañeros de especies". Los humanos no están
-separados de la naturaleza, sino que somos parte de una red de relaciones con otros seres.
-
-Preguntas reflexivas:
-- ¿Cómo cambia nuestra percepción del mundo si nos vemos como parte de una red multiespecie?
-- ¿Qué responsabilidades tenemos hacia otros seres con los que compartimos el planeta?
-- ¿Puede el concepto de "individuo humano" sostenerse cuando dependemos de billones de microbios?
-        """
-    }
-
-    if tema in respuestas:
-        return respuestas[tema]
-    else:
-        return f"No se encontró información específica sobre '{tema}'. Temas disponibles: {', '.join(respuestas.keys())}"
+    # Resumen curado + búsqueda en el índice de páginas del corpus (sin analizar PDFs)
+    return explorar_tema(tema)
 
 @mcp.tool()
-def explorar(tema: str) -> str:
+async def explorar(tema: str) -> str:
     """
     Busca información sobre un tema combinando fuentes web.
     """
+    indice = obtener_indice()
+    resultados = indice.buscar(tema) if indice.existe() else []
+    if resultados:
+        # Búsqueda BM25 sobre el índice local: sin red durante la conversación
+        log_uso(tema, "índice local")
+        return formatear_resultados(tema, resultados)
+
     tema = tema.lower().strip()
     respuesta = ""
 
-    # Buscar fuente web
-    for clave, link in FUENTES.items():
-        if clave in tema:
-            log_uso(link, "fuente web")
-            try:
-                resp = requests.get(link, timeout=10)
-                soup = BeautifulSoup(resp.text, "html.parser")
-                text = soup.get_text(separator="\n", strip=True)
-                resumen = text[:1500]
-                respuesta += f"🌐 Fuente web: {link}\n\n{resumen}\n\n"
-            except Exception as e:
-                respuesta += f"⚠️ Error al acceder a {link}: {str(e)}\n\n"
+    # Todas las fuentes que coinciden se leen a la vez; se devuelve lo que
+    # llegó dentro del plazo
+    links = [link for clave, link in FUENTES.items() if clave in tema]
+    for link in links:
+        log_uso(link, "fuente web")
+    resultados = await obtener_cache().obtener_varios(links)
+
+    for link in links:
+        resultado = resultados[link]
+        if isinstance(resultado, asyncio.TimeoutError):
+            respuesta += f"⏱️ {link} no respondió a tiempo\n\n"
+        elif isinstance(resultado, Exception):
+            respuesta += f"⚠️ Error al acceder a {link}: {str(resultado)}\n\n"
+        else:
+            text, _ = resultado
+            resumen = seleccionar_pasajes(text, tema, presupuesto_tokens=375)
+            respuesta += f"🌐 Fuente web: {link}\n\n{resumen}\n\n"
 
     if not respuesta.strip():
         respuesta = f"No encontré información registrada para el tema '{tema}'."
@@ -134,168 +101,15 @@ def inferir_especies(descripcion: str) -> str:
     "Hace frío, pero hay mucha luz y el suelo está seco."
     """
 
-    descripcion = descripcion.lower()
-
-    # Diccionarios de palabras clave
-    condiciones = {
-        "temperatura": {
-            "frío": "baja",
-            "helado": "baja",
-            "calor": "alta",
-            "cálido": "alta",
-            "templado": "media"
-        },
-        "humedad": {
-            "húmedo": "alta",
-            "mojado": "alta",
-            "charcos": "alta",
-            "llovido": "alta",
-            "rocío":"media",
-            "seco": "baja",
-            "árido": "baja"
-        },
-        "luz": {
-            "mucha luz": "alta",
-            "soleado": "alta",
-            "nublado":"medio",
-            "oscuro": "baja",
-            "sombra": "baja",
-            "noche": "baja"
-        },
-        "sonido": {
-            "mucha ruido": "alta",
-            "tránsito": "alta",
-            "silencio": "baja",
-            "pasos": "baja",
-        }
-    }
-
-    # Interpretar condiciones
-    interpretacion = {"temperatura": None, "humedad": None, "luz": None, "sonido": None}
-
-    for cat, palabras in condiciones.items():
-        for palabra, nivel in palabras.items():
-            if palabra in descripcion:
-                interpretacion[cat] = nivel
-
-    # Reglas ecológicas simples
-    posibles = []
-
-    if interpretacion["luz"] == "alta":
-        posibles.append("Araneidae - arañas de telas orbiculares, pone sus telas en sitios luminosos")
-        posibles.append("Micrathena bogota - araña espinosa")
-        posibles.append("Chrysomelidae - escarabajos de las hojas")
-        posibles.append("Ichneumonidae - avispas parasitoides")
-        posibles.append("Syrphidae - moscas de las flores")
-        posibles.append("Bombus hortulanus - abejorro")
-        posibles.append("Eurema - mariposas amarillas")
-        posibles.append("Cladonia -Líquen")
-        posibles.append("Lecanora caesiorubella -Líquen")
-        posibles.append("Flavopunctelia flaventior -Líquen")
-        posibles.append("Teloschistes exilis -Líquen")
-        posibles.append("Taraxacum officinale - diente de león")
-        posibles.append("Trifolium repens - trébol blanco")
-        posibles.append("Trébol morado")
-
-    if interpretacion["humedad"] == "alta":
-        posibles.append("Aphididae (áfidos)")
-        posibles.append("Ascalapha odorata (polilla bruja)")
-        posibles.append("Sphagnum, Fissidens, Campylopus, Plagiochila, Plagiochila,Metzgeria - musgo")
-        posibles.append("Usnea - Líquen")
-        posibles.append("Cora - Líquen")
-        posibles.append(" Pseudomonas - Bacterias del suelo")
-        posibles.append("Pedomicrobium - Bacterias del suelo")
-        posibles.append("Coprinellus - Hongo")
-        posibles.append("Lactarius - Hongo")
-
-    if interpretacion["temperatura"] == "alta":
-        posibles.append("Chrysomelidae (escarabajos de las hojas)")
-        posibles.append("Bombus hortulanus (abejorro)")
-        posibles.append("Eurema (mariposas amarillas)")
-        posibles.append("Taraxacum officinale (diente de león)")
-
-    if interpretacion["luz"] == "media":
-        posibles.append("Aphididae (áfidos)")
-        posibles.append("Curculionidae (escarabajos picudos)")
-        posibles.append("Compsus canescens (gorgojos)")
-        posibles.append("Eurema (mariposas amarillas)")
-        posibles.append("Campylopus  musgo")
-        posibles.append("Sphagnum musgo")
-        posibles.append("Cora liquen")
-        posibles.append("Ganoderma")
-        posibles.append("Lactarius")
-
-    if interpretacion["humedad"] == "media":
-        posibles.append("Chrysomelidae (escarabajos de las hojas)")
-        posibles.append("Curculionidae (escarabajos picudos)")
-        posibles.append("Ichneumonidae (avispas parasitoides)")
-        posibles.append("Syrphidae (moscas de las flores)")
-        posibles.append("Compsus canescens (gorgojos)")
-        posibles.append("Bombus hortulanus (abejorro)")
-        posibles.append("Eurema (mariposas amarillas)")
-        posibles.append("Cladonia Líquen")
-        posibles.append("Lecanora caesiorubella Líquen")
-        posibles.append("Flavopunctelia flaventiorLíquen")
-        posibles.append("Teloschistes exilis Líquen")
-        posibles.append("Glomus (hongos micorrízicos)")
-        posibles.append("Acaulospora (micorrízico)")
-        posibles.append("Ganoderma Hongos")
-        posibles.append("Phellinus Hongos")
-        posibles.append("Taraxacum officinale (diente de león)")
-        posibles.append("Trifolium repens (trébol blanco)")
-        posibles.append("Trébol morado")
-
-    if interpretacion["temperatura"] == "media":
-        posibles.append("Aphididae (áfidos)")
-        posibles.append("Curculionidae (escarabajos picudos)")
-        posibles.append("Ichneumonidae (avispas parasitoides)")
-        posibles.append("Syrphidae (moscas de las flores)")
-        posibles.append("Ascalapha odorata (polilla bruja)")
-        posibles.append("Compsus canescens (gorgojos)")
-        posibles.append("Cora Líquenes")
-        posibles.append("Usnea Líquenes")
-        posibles.append("Cladonia Líquenes")
-        posibles.append("Lecanora caesiorubella Líquenes")
-        posibles.append("Flavopunctelia flaventior Líquenes")
-        posibles.append("Teloschistes exilisLíquenes")
-        posibles.append("Pseudomonas - Bacteria")
-        posibles.append("Acinetobacter Bacteria")
-        posibles.append("Pedomicrobium Bacteria")
-        posibles.append("Glomus (hongos micorrízicos)")
-        posibles.append("Acaulospora (micorrízico)")
-        posibles.append("Coprinellus Hongos")
-        posibles.append("Ganoderma Hongos")
-        posibles.append("Lactarius Hongos")
-        posibles.append("Phellinus Hongos")
-        posibles.append("Trifolium repens (trébol blanco)")
-        posibles.append("Trébol morado")
-
-    if interpretacion["luz"] == "baja":
-        posibles.append("Sclerosomatidae (opiliones)")
-        posibles.append("Ascalapha odorata (polilla bruja)")
-        posibles.append("Fissidens Briófita")
-        posibles.append("Plagiochila Briófita")
-        posibles.append("Metzgeria Briófita")
-        posibles.append("Glomus (hongos micorrízicos)")
-        posibles.append("Acaulospora (micorrízico)")
-        posibles.append("Coprinellus Hongos")
-        posibles.append("Phellinus Hongos")
-
-    if interpretacion["sonido"] == "baja":
-        posibles.append("Ascalapha odorata (polilla bruja) - Sensible a sonidos fuertes ")
-
-    if interpretacion["temperatura"] == "baja":
-        posibles.append(" Campylopus Briofitas")
-        posibles.append("Fissidens Briofitas")
-        posibles.append("Sphagnum Briofitas")
-        posibles.append("Plagiochila Briofitas")
-        posibles.append("Metzgeria Briofitas")
+    # Esta herramienta no sugiere las especies comunes del suelo: sin
+    # condiciones reconocibles responde que no pudo inferirlas
+    _, sugerencias = obtener_motor().inferir(descripcion, comunes=False)
 
     # Redacción
-    if posibles:
+    if sugerencias:
         salida = (
             "Basado en tu descripción, es posible que observes:\n\n- "
-            + "\n- ".join(posibles)
+            + "\n- ".join(str(especie) for especie in sugerencias)
             + "\n\nCada uno responde de manera distinta a las condiciones ambientales descritas."
         )
     else:
@@ -303,7 +117,42 @@ def inferir_especies(descripcion: str) -> str:
 
     return salida
 
+def precalentar():
+    """
+    Carga en memoria lo que usan las herramientas en cada llamada: las copias
+    guardadas de las FUENTES, el motor de especies compilado y la conexión al
+    índice. Con un transporte de red el proceso vive entre llamadas, así que
+    todo queda caliente para los siguientes clientes.
+    """
+    cache = obtener_cache()
+    en_cache = sum(cache.leer(url) is not None for url in FUENTES.values())
+    obtener_motor()
+    indice = obtener_indice()
+    if indice.existe():
+        indice.buscar("bosque", limite=1)
+    print(f"🌳 Servidor Bosque listo: {en_cache}/{len(FUENTES)} fuentes en caché, "
+          f"índice {'disponible' if indice.existe() else 'no construido'}", file=sys.stderr, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor MCP del Agente Bosque")
+    parser.add_argument(
+        "--transporte", choices=["stdio", "http", "sse"], default=os.getenv("BOSQUE_MCP_TRANSPORTE", "stdio"),
+        help="stdio: un cliente por proceso; http (streamable) o sse: servidor persistente para muchos clientes",
+    )
+    parser.add_argument("--host", default=os.getenv("BOSQUE_MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--puerto", type=int, default=int(os.getenv("BOSQUE_MCP_PUERTO", 8765)))
+    args = parser.parse_args()
+
+    precalentar()
+    if args.transporte == "stdio":
+        mcp.run()
+    else:
+        # Las herramientas de red son async: un solo bucle atiende llamadas
+        # concurrentes de todos los clientes; las síncronas van a hilos
+        mcp.run(transport=args.transporte, host=args.host, port=args.puerto, show_banner=False)
+
+
 # Ejecutar el servidor cuando se llama directamente
 if __name__ == "__main__":
-    # mcp.run() es síncrono y usa STDIO transport por defecto
-    mcp.run()
+    main()
@@ -0,0 +1,243 @@
+"""
+Motor de reglas de inferir_especies (Agente Bosque)
+
+El conocimiento palabra clave → condición → especies vive en
+datos/reglas_especies.json. Al cargarlo, todas las palabras clave se compilan
+en tablas hash (frases, palabras exactas y raíces agrupadas por longitud), de
+modo que la descripción del usuario se recorre una única vez, palabra por
+palabra, con unas pocas búsquedas en diccionario por palabra. La comparación
+no distingue tildes ni mayúsculas y un '*' final marca una raíz. Las especies
+de todas las reglas activas se combinan sin duplicados, ordenadas por peso
+acumulado. Las de las reglas sin condiciones (especies comunes del suelo) van
+siempre al final: si la lista se recorta, se recortan las de las condiciones.
+
+Lo usan tanto la FunctionTool de tools.py como la herramienta del servidor MCP.
+
+Comprobación (desde backend/):
+    python -m agents.bosque.motor_especies --verificar
+    python -m agents.bosque.motor_especies "hace frío y está nublado"
+"""
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .pasajes import normalizar
+except ImportError:
+    from pasajes import normalizar
+
+RUTA_REGLAS = Path(__file__).parent / "datos" / "reglas_especies.json"
+
+
+@dataclass(frozen=True)
+class Sugerencia:
+    """Especie sugerida y su peso acumulado"""
+    id: str
+    nombre: str
+    detalle: str
+    peso: float
+
+    def __str__(self) -> str:
+        return f"{self.nombre} - {self.detalle}" if self.detalle else self.nombre
+
+
+_PALABRA = re.compile(r"\w+")
+
+
+class MotorEspecies:
+    """
+    Reglas de inferencia con sus palabras clave en tablas hash
+    """
+
+    def __init__(self, datos: Dict):
+        self.especies: Dict[str, Tuple[str, str]] = {
+            clave: (valor[0], valor[1] if len(valor) > 1 else "") for clave, valor in datos["especies"].items()
+        }
+        self.reglas = [
+            (frozenset(regla.get("si", [])), float(regla.get("peso", 1)), regla["especies"])
+            for regla in datos["reglas"]
+        ]
+        self.comunes: Tuple[str, ...] = tuple(dict.fromkeys(
+            especie for requisitos, _, especies in self.reglas if not requisitos for especie in especies
+        ))
+
+        # Palabras clave compiladas: frases de varias palabras (las más largas
+        # primero, para que "poca luz" gane a "luz"), palabras exactas y raíces
+        # agrupadas por sus primeras letras (una sola búsqueda por palabra)
+        self._frases: Dict[Tuple[str, ...], str] = {}
+        self._exactas: Dict[str, str] = {}
+        raices: Dict[str, str] = {}
+        for condicion, lista in datos["condiciones"].items():
+            for palabra in lista:
+                palabra = normalizar(palabra)
+                partes = tuple(palabra.split())
+                if len(partes) > 1:
+                    self._frases[partes] = condicion
+                elif palabra.endswith("*"):
+                    raices[palabra[:-1]] = condicion
+                else:
+                    self._exactas[palabra] = condicion
+        self._largos_frase = sorted({len(f) for f in self._frases}, reverse=True)
+        self._inicios_frase = {f[0] for f in self._frases}
+        self._largo_prefijo = min((len(r) for r in raices), default=1)
+        self._raices: Dict[str, List[Tuple[str, str]]] = {}
+        for raiz, condicion in sorted(raices.items(), key=lambda r: -len(r[0])):
+            self._raices.setdefault(raiz[:self._largo_prefijo], []).append((raiz, condicion))
+
+        desconocidas = {e for _, _, lista in self.reglas for e in lista} - self.especies.keys()
+        if desconocidas:
+            raise ValueError(f"Reglas con especies no definidas: {', '.join(sorted(desconocidas))}")
+
+    @classmethod
+    def desde_archivo(cls, ruta: Path = RUTA_REGLAS) -> "MotorEspecies":
+        with open(ruta, encoding="utf-8") as archivo:
+            return cls(json.load(archivo))
+
+    def condiciones(self, descripcion: str) -> List[str]:
+        """Condiciones detectadas en la descripción, en orden de aparición"""
+        palabras = _PALABRA.findall(normalizar(descripcion))
+        encontradas: Dict[str, None] = {}
+        i = 0
+        while i < len(palabras):
+            palabra = palabras[i]
+            avance, condicion = 1, None
+            if palabra in self._inicios_frase:
+                for largo in self._largos_frase:
+                    condicion = self._frases.get(tuple(palabras[i:i + largo]))
+                    if condicion:
+                        avance = largo
+                        break
+            if not condicion:
+                condicion = self._exactas.get(palabra)
+            if not condicion:
+                for raiz, candidata in self._raices.get(palabra[:self._largo_prefijo], ()):
+                    if palabra.startswith(raiz):
+                        condicion = candidata
+                        break
+            if condicion:
+                encontradas[condicion] = None
+            i += avance
+        return list(encontradas)
+
+    def inferir(self, descripcion: str, comunes: bool = True,
+                maximo: Optional[int] = None) -> Tuple[List[str], List[Sugerencia]]:
+        """
+        Infiere especies a partir de una descripción del entorno
+
+        Args:
+            descripcion: Texto libre del usuario
+            comunes: Agrega al final las especies de las reglas sin condiciones,
+                que se sugieren siempre (también si no se detecta ninguna condición)
+            maximo: Largo máximo de la lista; se recortan las especies de las
+                condiciones, nunca las comunes
+
+        Returns:
+            tuple: (condiciones detectadas, sugerencias de mayor a menor peso y luego las comunes)
+        """
+        condiciones = self.condiciones(descripcion)
+        return condiciones, list(self._sugerencias(tuple(condiciones), comunes, maximo))
+
+    @lru_cache(maxsize=256)
+    def _sugerencias(self, condiciones: Tuple[str, ...], comunes: bool,
+                     maximo: Optional[int]) -> Tuple[Sugerencia, ...]:
+        # Hay pocas combinaciones de condiciones: el resultado se guarda por combinación
+        posicion = {condicion: i for i, condicion in enumerate(condiciones)}
+        pesos: Dict[str, float] = {}
+        orden: Dict[str, int] = {}
+        pesos_comunes: Dict[str, float] = {}
+        for requisitos, peso, especies in self.reglas:
+            if not requisitos:
+                for especie in especies:
+                    pesos_comunes[especie] = pesos_comunes.get(especie, 0.0) + peso
+            elif requisitos <= posicion.keys():
+                # A igual peso van primero las especies de lo que el usuario mencionó antes
+                mencion = min((posicion[c] for c in requisitos), default=len(condiciones))
+                for especie in especies:
+                    pesos[especie] = pesos.get(especie, 0.0) + peso
+                    orden[especie] = min(orden.get(especie, mencion), mencion)
+
+        # sorted es estable: a igualdad se conserva el orden de las reglas
+        de_condiciones = [
+            Sugerencia(especie, *self.especies[especie], peso)
+            for especie, peso in sorted(pesos.items(), key=lambda item: (-item[1], orden[item[0]]))
+            if not (comunes and especie in pesos_comunes)
+        ]
+        finales = [
+            Sugerencia(especie, *self.especies[especie], peso + pesos.get(especie, 0.0))
+            for especie, peso in pesos_comunes.items()
+        ] if comunes else []
+        if maximo is not None:
+            de_condiciones = de_condiciones[:max(0, maximo - len(finales))]
+        return tuple(de_condiciones + finales)
+
+
+@lru_cache(maxsize=1)
+def obtener_motor() -> MotorEspecies:
+    """Motor compartido, compilado la primera vez que se usa"""
+    return MotorEspecies.desde_archivo()
+
+
+def verificar(motor: MotorEspecies) -> List[str]:
+    """
+    Comprueba el comportamiento que esperan las herramientas, sobre la
+    salida real de inferir_especies (con su recorte de la lista)
+
+    Returns:
+        list: Problemas encontrados (vacía si todo está bien)
+    """
+    from .tools import inferir_especies
+
+    problemas = []
+    if not motor.comunes:
+        problemas.append("No hay reglas sin condiciones (especies comunes)")
+    nombres_comunes = [motor.especies[especie][0] for especie in motor.comunes]
+    for descripcion in ("un bosque", "nada de nada", "hace frío", "hay mucho sol",
+                        "el suelo está seco", "hace frío y está nublado",
+                        "húmedo, oscuro y templado, cerca del río, con sol y en silencio"):
+        salida = inferir_especies(descripcion)
+        faltan = [nombre for nombre in nombres_comunes if nombre not in salida]
+        if faltan:
+            problemas.append(f"'{descripcion}': faltan las especies comunes {faltan}")
+    for descripcion in ("un bosque", "nada de nada", ""):
+        if motor.inferir(descripcion, comunes=False)[1]:
+            problemas.append(f"'{descripcion}': sin especies comunes no debería haber sugerencias")
+    usadas = {condicion for requisitos, _, _ in motor.reglas for condicion in requisitos}
+    for descripcion, esperadas in (("hace frío y está nublado", ["temperatura_baja", "luz_media"]),
+                                   ("el suelo está seco", ["humedad_baja"])):
+        condiciones = motor.condiciones(descripcion)
+        if condiciones != esperadas:
+            problemas.append(f"'{descripcion}': condiciones {condiciones}, se esperaban {esperadas}")
+        if not set(condiciones) <= usadas:
+            problemas.append(f"'{descripcion}': condiciones sin reglas {sorted(set(condiciones) - usadas)}")
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Motor de reglas de inferir_especies")
+    parser.add_argument("descripcion", nargs="?", help="Descripción del entorno a analizar")
+    parser.add_argument("--verificar", action="store_true", help="Comprueba el comportamiento esperado por las herramientas")
+    args = parser.parse_args()
+
+    motor = obtener_motor()
+    if args.descripcion is not None:
+        condiciones, sugerencias = motor.inferir(args.descripcion)
+        print(f"Condiciones: {', '.join(condiciones) or 'ninguna'}")
+        for sugerencia in sugerencias:
+            print(f"  {sugerencia.peso:4.1f}  {sugerencia}")
+    if args.verificar:
+        problemas = verificar(motor)
+        for problema in problemas:
+            print(f"⚠️ {problema}")
+        if problemas:
+            sys.exit(1)
+        print("✅ Motor de especies verificado")
+
+
+if __name__ == "__main__":
+    main()
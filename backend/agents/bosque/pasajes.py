@@ -0,0 +1,216 @@
+"""
+División y ranking de pasajes para el Agente Bosque
+
+Las páginas y PDFs se trocean en pasajes de unas pocas frases (alrededor de
+120 palabras, con una frase de solapamiento) para indexarlos y devolver solo
+los fragmentos relevantes en lugar del documento completo. Para una página
+recién leída, los pasajes se ordenan con BM25 frente a la consulta del
+usuario y se devuelven los mejores dentro de un presupuesto de tokens.
+"""
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+PALABRAS_POR_PASAJE = 120
+
+# Presupuesto por defecto de la salida de las herramientas (≈ 4 caracteres por token)
+PRESUPUESTO_TOKENS = 600
+CARACTERES_POR_TOKEN = 4
+
+# Parámetros habituales de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Las palabras se comparan por sus primeras letras: "briófitas" y "briofita",
+# o "humedad" y "húmedo", comparten raíz
+LARGO_RAIZ = 5
+
+# Palabras vacías que no aportan a la consulta
+PALABRAS_VACIAS = frozenset("""
+a al algo como con de del el en entre es esta este esto hay la las lo los mas me mi muy no o para pero
+por que se sin sobre su sus te tu un una uno y ya cual cuales donde quien que
+""".split())
+
+# Fin de frase seguido de espacio; los saltos de línea del extractor separan
+# fragmentos de una misma frase (enlaces, negritas), no frases
+_FIN_DE_FRASE = re.compile(r"(?<=[.!?¿¡:;])\s+")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def dividir_en_frases(texto: str) -> List[str]:
+    """Separa un texto en frases, normalizando los espacios"""
+    texto = _ESPACIOS.sub(" ", texto).strip()
+    return [frase for frase in _FIN_DE_FRASE.split(texto) if frase]
+
+
+def dividir_en_pasajes(texto: str, palabras_por_pasaje: int = PALABRAS_POR_PASAJE) -> List[str]:
+    """
+    Agrupa las frases de un texto en pasajes de tamaño parecido
+
+    Cada pasaje repite la última frase del anterior, para que una idea que
+    cae en el límite no quede partida. Una frase más larga que el pasaje se
+    corta por palabras.
+
+    Args:
+        texto: Texto completo
+        palabras_por_pasaje: Número aproximado de palabras por pasaje
+
+    Returns:
+        list: Pasajes en el orden del texto
+    """
+    frases: List[List[str]] = []
+    for frase in dividir_en_frases(texto):
+        palabras = frase.split(" ")
+        for inicio in range(0, len(palabras), palabras_por_pasaje):
+            frases.append(palabras[inicio:inicio + palabras_por_pasaje])
+
+    pasajes: List[str] = []
+    actual: List[List[str]] = []
+    largo = 0
+    for frase in frases:
+        if actual and largo + len(frase) > palabras_por_pasaje:
+            pasajes.append(" ".join(" ".join(f) for f in actual))
+            # Solapamiento: la última frase abre el siguiente pasaje si cabe
+            ultima = actual[-1]
+            actual, largo = ([ultima], len(ultima)) if len(ultima) + len(frase) <= palabras_por_pasaje else ([], 0)
+        actual.append(frase)
+        largo += len(frase)
+    if actual:
+        pasajes.append(" ".join(" ".join(f) for f in actual))
+    return pasajes
+
+
+# Caracteres acentuados del español: se resuelven con str.translate, sin Unicode
+_SIN_TILDES = str.maketrans("áéíóúüñàèìòùâêîôûäëïöç", "aeiouunaeiouaeiouaeioc")
+
+
+def consulta_fts(texto: str) -> Optional[str]:
+    """
+    Convierte el texto libre del usuario en una consulta FTS5
+
+    Cada palabra se cita (no se interpreta como sintaxis FTS) y las de cuatro
+    letras o más se buscan como prefijo, para cubrir plurales y derivadas
+    ("briofita" encuentra "briófitas"). Las palabras se combinan con OR y BM25
+    premia los pasajes que contienen más de ellas.
+
+    Returns:
+        str: Consulta FTS5, o None si no queda ninguna palabra útil
+    """
+    palabras = [p for p in re.findall(r"\w+", texto.lower()) if len(p) > 1 and normalizar(p) not in PALABRAS_VACIAS]
+    terminos = [f'"{p}"*' if len(p) >= 4 else f'"{p}"' for p in dict.fromkeys(palabras)]
+    return " OR ".join(terminos) or None
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes"""
+    texto = texto.lower().translate(_SIN_TILDES)
+    if texto.isascii():
+        return texto
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def raices(texto: str) -> List[str]:
+    """Raíces de las palabras útiles de un texto (sin tildes ni palabras vacías)"""
+    return [
+        palabra[:LARGO_RAIZ]
+        for palabra in re.findall(r"\w+", normalizar(texto))
+        if len(palabra) > 1 and palabra not in PALABRAS_VACIAS
+    ]
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimación rápida de tokens de un texto"""
+    return len(texto) // CARACTERES_POR_TOKEN + 1
+
+
+class RankingPasajes:
+    """
+    Pasajes de un texto con sus frecuencias de términos, listos para BM25
+    """
+
+    def __init__(self, texto: str, palabras_por_pasaje: int = PALABRAS_POR_PASAJE):
+        self.pasajes = dividir_en_pasajes(texto, palabras_por_pasaje)
+        self.frecuencias = [Counter(raices(pasaje)) for pasaje in self.pasajes]
+        self.largos = [sum(frecuencia.values()) for frecuencia in self.frecuencias]
+        self.largo_medio = (sum(self.largos) / len(self.largos)) if self.largos else 0.0
+        self.documentos_con = Counter(raiz for frecuencia in self.frecuencias for raiz in frecuencia)
+
+    def puntajes(self, consulta: str) -> List[float]:
+        """Puntaje BM25 de cada pasaje para la consulta"""
+        total = len(self.pasajes)
+        terminos = set(raices(consulta))
+        idf = {
+            termino: math.log(1 + (total - self.documentos_con[termino] + 0.5) / (self.documentos_con[termino] + 0.5))
+            for termino in terminos if self.documentos_con[termino]
+        }
+        resultado = []
+        for frecuencia, largo in zip(self.frecuencias, self.largos):
+            puntaje = 0.0
+            normalizacion = BM25_K1 * (1 - BM25_B + BM25_B * largo / (self.largo_medio or 1))
+            for termino, peso in idf.items():
+                f = frecuencia.get(termino, 0)
+                if f:
+                    puntaje += peso * f * (BM25_K1 + 1) / (f + normalizacion)
+            resultado.append(puntaje)
+        return resultado
+
+    def mejores(self, consulta: str, presupuesto_tokens: int = PRESUPUESTO_TOKENS) -> List[Tuple[int, str]]:
+        """
+        Pasajes relevantes que caben en el presupuesto, en el orden del texto
+
+        Returns:
+            list: (posición, pasaje); vacía si ningún pasaje contiene la consulta
+        """
+        puntajes = self.puntajes(consulta)
+        orden = sorted((i for i, p in enumerate(puntajes) if p > 0), key=lambda i: -puntajes[i])
+        elegidos, usados = [], 0
+        for i in orden:
+            tokens = estimar_tokens(self.pasajes[i])
+            if elegidos and usados + tokens > presupuesto_tokens:
+                continue
+            elegidos.append(i)
+            usados += tokens
+        return [(i, self.pasajes[i]) for i in sorted(elegidos)]
+
+
+@lru_cache(maxsize=64)
+def ranking_de(texto: str) -> RankingPasajes:
+    """Ranking de pasajes de un texto, guardado en memoria para lecturas repetidas de la misma página"""
+    return RankingPasajes(texto)
+
+
+def seleccionar_pasajes(texto: str, consulta: Optional[str], presupuesto_tokens: int = PRESUPUESTO_TOKENS) -> str:
+    """
+    Reduce el texto de una página a los pasajes más relevantes para la consulta
+
+    Sin consulta, o si ningún pasaje la menciona, se devuelve el comienzo del
+    texto recortado al presupuesto.
+
+    Args:
+        texto: Texto completo de la página
+        consulta: Lo que busca el usuario
+        presupuesto_tokens: Tokens aproximados que puede ocupar el resultado
+
+    Returns:
+        str: Pasajes separados por "[…]" cuando no son contiguos
+    """
+    limite = presupuesto_tokens * CARACTERES_POR_TOKEN
+    if not consulta or not raices(consulta):
+        return texto[:limite]
+    elegidos = ranking_de(texto).mejores(consulta, presupuesto_tokens)
+    if not elegidos:
+        return texto[:limite]
+
+    partes = []
+    anterior = None
+    for posicion, pasaje in elegidos:
+        if anterior is not None and posicion != anterior + 1:
+            partes.append("[…]")
+        partes.append(pasaje)
+        anterior = posicion
+    return "\n".join(partes)[:limite]
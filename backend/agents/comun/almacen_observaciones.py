@@ -0,0 +1,776 @@
+"""
+Almacén local de observaciones de biodiversidad de Bogotá
+
+Las exportaciones de iNaturalist (CSV) y de GBIF (CSV/TSV o Darwin Core
+Archive) se cargan en un archivo SQLite con:
+
+- una tabla de taxones (cada especie se guarda una vez),
+- una tabla de observaciones (coordenadas, fecha, usuario, calidad),
+- un índice espacial R-tree sobre las coordenadas.
+
+Con el índice, las consultas por radio, por rectángulo y al azar alrededor
+de cualquier punto de la ciudad, o dentro del polígono de un lugar de la
+EEP (lugares.py), se responden en milisegundos y sin red. Las especies de
+cada lugar se cuentan al final de la ingesta y quedan guardadas.
+
+Ingesta (desde backend/):
+    python -m agents.comun.almacen_observaciones --ingerir observaciones-bogota.csv
+    python -m agents.comun.almacen_observaciones --ingerir gbif-bogota.zip
+    python -m agents.comun.almacen_observaciones --radio 4.7519 -74.0841 1000
+
+Variables de entorno:
+    INATURALIST_ALMACEN   ruta del archivo SQLite (por defecto backend/cache/observaciones.sqlite3)
+"""
+
+import argparse
+import contextlib
+import csv
+import heapq
+import io
+import math
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .lugares import obtener_registro
+
+RUTA_ALMACEN = Path(os.getenv("INATURALIST_ALMACEN", Path(__file__).parent.parent.parent / "cache" / "observaciones.sqlite3"))
+
+# Rectángulo de Bogotá D.C. (incluye la zona rural de Sumapaz): min_lat, min_lon, max_lat, max_lon
+BBOX_BOGOTA = (3.72, -74.46, 4.84, -73.98)
+
+# Metros por grado de latitud (y de longitud en el ecuador)
+METROS_POR_GRADO = 111_320.0
+RADIO_TIERRA = 6_371_000.0
+
+# Filas por transacción durante la ingesta
+LOTE_INGESTA = 5000
+
+# Límites de las consultas: taxones por prefijo, observaciones de un taxón
+# que se recorren por su índice (en vez del R-tree), candidatas que se leen
+# antes de pasar al muestreo por rechazo e intentos de ese muestreo
+MAX_TAXONES = 200
+MAX_POR_TAXON = 20000
+MUESTRA_DIRECTA = 2000
+MAX_INTENTOS = 5000
+
+# Radio (m) con el que empieza la búsqueda de las observaciones más cercanas
+RADIO_INICIAL = 250.0
+
+# Columnas aceptadas para cada campo (iNaturalist CSV y términos Darwin Core de GBIF)
+COLUMNAS = {
+    "id_externo": ("id", "gbifid", "occurrenceid", "catalognumber"),
+    "lat": ("latitude", "decimallatitude"),
+    "lon": ("longitude", "decimallongitude"),
+    "fecha": ("observed_on", "eventdate"),
+    "usuario": ("user_name", "user_login", "recordedby"),
+    "calidad": ("quality_grade", "basisofrecord"),
+    "nombre": ("scientific_name", "scientificname", "acceptedscientificname", "species"),
+    "nombre_comun": ("common_name", "vernacularname"),
+    "taxon_externo": ("taxon_id", "taxonkey", "specieskey"),
+    "reino": ("taxon_kingdom_name", "kingdom"),
+    "familia": ("taxon_family_name", "family"),
+}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS taxones (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL UNIQUE,
+    nombre_comun TEXT,
+    reino TEXT,
+    familia TEXT,
+    id_externo TEXT
+);
+CREATE TABLE IF NOT EXISTS observaciones (
+    id INTEGER PRIMARY KEY,
+    fuente TEXT NOT NULL,
+    id_externo TEXT NOT NULL,
+    taxon_id INTEGER REFERENCES taxones(id),
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    fecha TEXT,
+    usuario TEXT,
+    calidad TEXT,
+    UNIQUE (fuente, id_externo)
+);
+CREATE INDEX IF NOT EXISTS observaciones_taxon ON observaciones (taxon_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS observaciones_rtree USING rtree(
+    id, min_lat, max_lat, min_lon, max_lon
+);
+-- Especies de cada lugar, contadas con la geometría de huella (ver contar_lugar)
+CREATE TABLE IF NOT EXISTS lugares_contados (
+    lugar TEXT PRIMARY KEY,
+    huella TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS especies_por_lugar (
+    lugar TEXT NOT NULL,
+    taxon_id INTEGER NOT NULL,
+    observaciones INTEGER NOT NULL,
+    PRIMARY KEY (lugar, taxon_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS especies_por_lugar_conteo ON especies_por_lugar (lugar, observaciones DESC);
+"""
+
+_CAMPOS = """
+    o.id, o.fuente, o.id_externo, o.lat, o.lon, o.fecha, o.usuario, o.calidad,
+    t.nombre, t.nombre_comun, t.reino, t.familia
+"""
+
+
+@dataclass
+class ObservacionAlmacen:
+    """Observación guardada en el almacén"""
+    id: int
+    fuente: str
+    id_externo: str
+    lat: float
+    lon: float
+    fecha: Optional[str]
+    usuario: Optional[str]
+    calidad: Optional[str]
+    especie: Optional[str]
+    nombre_comun: Optional[str]
+    reino: Optional[str]
+    familia: Optional[str]
+    distancia_m: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class FiltroTaxon:
+    """Taxones de un prefijo y si conviene recorrerlos por su índice (pocas observaciones)"""
+    ids: Tuple[int, ...]
+    por_indice: bool
+
+
+def distancia_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distancia haversine en metros"""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * RADIO_TIERRA * math.asin(math.sqrt(a))
+
+
+def rectangulo_de_radio(lat: float, lon: float, radio_m: float) -> Tuple[float, float, float, float]:
+    """Rectángulo (min_lat, min_lon, max_lat, max_lon) que contiene el círculo"""
+    dlat = radio_m / METROS_POR_GRADO
+    dlon = radio_m / (METROS_POR_GRADO * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - dlat, lon - dlon, lat + dlat, lon + dlon
+
+
+class AlmacenObservaciones:
+    """
+    Observaciones en SQLite con índice espacial R-tree
+    """
+
+    def __init__(self, ruta: Path = RUTA_ALMACEN):
+        self.ruta = Path(ruta)
+        self._local = threading.local()
+
+    def existe(self) -> bool:
+        """Indica si el almacén ya se construyó"""
+        return self.ruta.is_file()
+
+    def _conexion(self) -> sqlite3.Connection:
+        # Una conexión por hilo: sqlite3 no comparte conexiones entre hilos
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            conexion = sqlite3.connect(self.ruta)
+            conexion.executescript(_ESQUEMA)
+            self._local.conexion = conexion
+        return conexion
+
+    # --- Ingesta ---
+
+    def ingerir(self, registros: Iterable[Dict[str, str]], fuente: str,
+                bbox: Optional[Tuple[float, float, float, float]] = BBOX_BOGOTA) -> Dict[str, int]:
+        """
+        Carga registros normalizados (ver leer_exportacion) en el almacén
+
+        Los registros sin coordenadas, sin identificador o fuera del rectángulo
+        se omiten; los que ya existían (misma fuente e id) se actualizan. Los
+        conteos de especies por lugar se descartan (ver contar_lugares).
+
+        Args:
+            registros: dicts con las claves de COLUMNAS
+            fuente: "inaturalist", "gbif"... (junto con id_externo identifica la observación)
+            bbox: Rectángulo (min_lat, min_lon, max_lat, max_lon) aceptado; None para no filtrar
+
+        Returns:
+            dict: leidos, guardados, omitidos y taxones nuevos
+        """
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute("DELETE FROM lugares_contados")
+            conexion.execute("DELETE FROM especies_por_lugar")
+        taxones = {nombre: id_taxon for id_taxon, nombre in conexion.execute("SELECT id, nombre FROM taxones")}
+        taxones_previos = len(taxones)
+        leidos = guardados = 0
+        lote: List[tuple] = []
+
+        def guardar_lote():
+            with conexion:
+                conexion.executemany(
+                    """INSERT INTO observaciones (fuente, id_externo, taxon_id, lat, lon, fecha, usuario, calidad)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (fuente, id_externo) DO UPDATE SET
+                           taxon_id = excluded.taxon_id, lat = excluded.lat, lon = excluded.lon,
+                           fecha = excluded.fecha, usuario = excluded.usuario, calidad = excluded.calidad""",
+                    lote,
+                )
+                # El R-tree se sincroniza con las filas recién escritas del lote
+                conexion.executemany(
+                    """INSERT OR REPLACE INTO observaciones_rtree (id, min_lat, max_lat, min_lon, max_lon)
+                       SELECT id, lat, lat, lon, lon FROM observaciones WHERE fuente = ? AND id_externo = ?""",
+                    [(fila[0], fila[1]) for fila in lote],
+                )
+            lote.clear()
+
+        for registro in registros:
+            leidos += 1
+            try:
+                lat, lon = float(registro["lat"]), float(registro["lon"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            id_externo = registro.get("id_externo")
+            if not id_externo:
+                continue
+            if bbox and not (bbox[0] <= lat <= bbox[2] and bbox[1] <= lon <= bbox[3]):
+                continue
+
+            nombre = registro.get("nombre") or None
+            id_taxon = None
+            if nombre:
+                id_taxon = taxones.get(nombre)
+                if id_taxon is None:
+                    id_taxon = conexion.execute(
+                        "INSERT INTO taxones (nombre, nombre_comun, reino, familia, id_externo) VALUES (?, ?, ?, ?, ?)",
+                        (nombre, registro.get("nombre_comun") or None, registro.get("reino") or None,
+                         registro.get("familia") or None, registro.get("taxon_externo") or None),
+                    ).lastrowid
+                    taxones[nombre] = id_taxon
+
+            lote.append((fuente, id_externo, id_taxon, lat, lon, (registro.get("fecha") or "")[:10] or None,
+                         registro.get("usuario") or None, registro.get("calidad") or None))
+            guardados += 1
+            if len(lote) >= LOTE_INGESTA:
+                guardar_lote()
+        if lote:
+            guardar_lote()
+        conexion.commit()
+        return {
+            "leidos": leidos,
+            "guardados": guardados,
+            "omitidos": leidos - guardados,
+            "taxones_nuevos": len(taxones) - taxones_previos,
+        }
+
+    # --- Consultas ---
+    # Primero se buscan solo ids y coordenadas (R-tree e índices); las filas
+    # completas, con su taxón, se leen únicamente para las observaciones elegidas
+
+    def _por_ids(self, ids: List[int]) -> Dict[int, ObservacionAlmacen]:
+        if not ids:
+            return {}
+        filas = self._conexion().execute(
+            f"""SELECT {_CAMPOS} FROM observaciones o LEFT JOIN taxones t ON t.id = o.taxon_id
+                WHERE o.id IN ({",".join("?" * len(ids))})""",
+            ids,
+        )
+        return {fila[0]: ObservacionAlmacen(*fila) for fila in filas}
+
+    def _taxones(self, taxon: str) -> List[int]:
+        """
+        Ids de los taxones cuyo nombre científico o común empieza por el texto
+
+        '%' y '_' se buscan literalmente; un prefijo muy general ("S") se
+        limita a los primeros MAX_TAXONES taxones.
+        """
+        patron = re.sub(r"([\\%_])", r"\\\1", taxon) + "%"
+        return [fila[0] for fila in self._conexion().execute(
+            r"SELECT id FROM taxones WHERE nombre LIKE ? ESCAPE '\' OR nombre_comun LIKE ? ESCAPE '\' LIMIT ?",
+            (patron, patron, MAX_TAXONES),
+        )]
+
+    def _filtro(self, taxon: Optional[str]) -> Optional[FiltroTaxon]:
+        """Filtro de un prefijo de taxón (None si no hay prefijo)"""
+        if not taxon:
+            return None
+        taxones = self._taxones(taxon)
+        if not taxones:
+            return FiltroTaxon((), False)
+        # Conteo acotado por el índice de taxón
+        observaciones = self._conexion().execute(
+            f"""SELECT count(*) FROM (SELECT 1 FROM observaciones
+                WHERE taxon_id IN ({','.join('?' * len(taxones))}) LIMIT ?)""",
+            [*taxones, MAX_POR_TAXON + 1],
+        ).fetchone()[0]
+        return FiltroTaxon(tuple(taxones), observaciones <= MAX_POR_TAXON)
+
+    def _candidatas(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                    filtro: Optional[FiltroTaxon] = None, limite: Optional[int] = None) -> List[Tuple[int, float, float]]:
+        """
+        (id, lat, lon) de las observaciones del rectángulo
+
+        Las coordenadas salen del propio R-tree (precisión de float32, menos
+        de un metro en Bogotá): sin filtro de taxón no hace falta leer la
+        tabla. Con un taxón poco observado se recorre en cambio su índice.
+        """
+        sql = """
+            SELECT r.id, r.min_lat, r.min_lon FROM observaciones_rtree r
+            WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lon >= ? AND r.min_lon <= ?
+        """
+        parametros: list = [min_lat, max_lat, min_lon, max_lon]
+        if filtro is not None:
+            if not filtro.ids:
+                return []
+            marcas = ",".join("?" * len(filtro.ids))
+            if filtro.por_indice:
+                sql = f"""
+                    SELECT id, lat, lon FROM observaciones
+                    WHERE lat BETWEEN ? AND ? AND lon BETWEEN ? AND ? AND taxon_id IN ({marcas})
+                """
+            else:
+                # "+" evita el índice por taxón: el R-tree debe guiar la consulta
+                sql = sql.replace("observaciones_rtree r", "observaciones_rtree r JOIN observaciones o ON o.id = r.id")
+                sql += f" AND +o.taxon_id IN ({marcas})"
+            parametros += filtro.ids
+        if limite is not None:
+            sql += " LIMIT ?"
+            parametros.append(limite)
+        return self._conexion().execute(sql, parametros).fetchall()
+
+    def _cercanas(self, lat: float, lon: float, radio_m: float, filtro: Optional[FiltroTaxon],
+                  candidatas: Optional[List[Tuple[int, float, float]]] = None) -> List[Tuple[float, int]]:
+        """(distancia, id) de las observaciones dentro del círculo"""
+        # El R-tree entrega las del rectángulo que contiene el círculo; las de
+        # las esquinas se descartan por distancia. A escala de ciudad basta la
+        # proyección equirectangular (error < 0,1 % frente a haversine)
+        escala_lon = math.cos(math.radians(lat))
+        radio_grados_2 = (radio_m / METROS_POR_GRADO) ** 2
+        if candidatas is None:
+            candidatas = self._candidatas(*rectangulo_de_radio(lat, lon, radio_m), filtro)
+        resultado = []
+        for id_observacion, lat_o, lon_o in candidatas:
+            d2 = (lat_o - lat) ** 2 + ((lon_o - lon) * escala_lon) ** 2
+            if d2 <= radio_grados_2:
+                resultado.append((math.sqrt(d2) * METROS_POR_GRADO, id_observacion))
+        return resultado
+
+    def en_rectangulo(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+                      taxon: Optional[str] = None, limite: int = 100) -> List[ObservacionAlmacen]:
+        """
+        Observaciones dentro de un rectángulo
+
+        Args:
+            min_lat, min_lon, max_lat, max_lon: Esquinas del rectángulo
+            taxon: Prefijo del nombre científico o común (opcional)
+            limite: Máximo de observaciones
+
+        Returns:
+            list: Observaciones (sin orden particular)
+        """
+        ids = [fila[0] for fila in self._candidatas(min_lat, min_lon, max_lat, max_lon, self._filtro(taxon), limite)]
+        filas = self._por_ids(ids)
+        return [filas[i] for i in ids if i in filas]
+
+    def en_radio(self, lat: float, lon: float, radio_m: float,
+                 taxon: Optional[str] = None, limite: int = 100) -> List[ObservacionAlmacen]:
+        """
+        Observaciones a menos de radio_m metros de un punto, de la más cercana a la más lejana
+
+        La búsqueda empieza con RADIO_INICIAL metros y se amplía hasta reunir
+        `limite` observaciones (o llegar a radio_m): las más cercanas de un
+        círculo pequeño son también las más cercanas del grande. Un taxón poco
+        observado se recorre una sola vez por su índice, con el radio completo.
+        """
+        filtro = self._filtro(taxon)
+        radio = radio_m if filtro is not None and filtro.por_indice else min(radio_m, RADIO_INICIAL)
+        while True:
+            cercanas = self._cercanas(lat, lon, radio, filtro)
+            if len(cercanas) >= limite or radio >= radio_m:
+                break
+            radio = min(radio_m, radio * 4)
+        cercanas = heapq.nsmallest(limite, cercanas)
+        filas = self._por_ids([i for _, i in cercanas])
+        resultado = []
+        for distancia, id_observacion in cercanas:
+            observacion = filas[id_observacion]
+            observacion.distancia_m = distancia
+            resultado.append(observacion)
+        return resultado
+
+    def _rango_ids(self) -> Tuple[Optional[int], Optional[int]]:
+        return self._conexion().execute(
+            "SELECT (SELECT min(id) FROM observaciones), (SELECT max(id) FROM observaciones)"
+        ).fetchone()
+
+    def _id_al_azar(self, acepta: Callable[[int], Optional[float]]) -> Optional[Tuple[Optional[float], int]]:
+        """
+        Muestreo por rechazo: ids al azar entre el menor y el mayor hasta que
+        `acepta` devuelve algo distinto de None. Cada id existente tiene la
+        misma probabilidad, así que la elegida es uniforme entre las aceptadas.
+
+        Returns:
+            (lo que devolvió acepta, id), o None si se agotaron MAX_INTENTOS
+        """
+        minimo, maximo = self._rango_ids()
+        if minimo is None:
+            return None
+        for _ in range(MAX_INTENTOS):
+            id_observacion = random.randint(minimo, maximo)
+            resultado = acepta(id_observacion)
+            if resultado is not None:
+                return resultado, id_observacion
+        return None
+
+    def aleatoria(self, lat: Optional[float] = None, lon: Optional[float] = None, radio_m: float = 1000,
+                  taxon: Optional[str] = None) -> Optional[ObservacionAlmacen]:
+        """
+        Una observación al azar, alrededor de un punto o de todo el almacén
+
+        Cuando hay pocas candidatas (menos de MUESTRA_DIRECTA en el rectángulo
+        del círculo, o de MAX_POR_TAXON para el taxón) se elige entre ellas;
+        si hay muchas, se sortean ids y se rechazan los que no cumplen, sin
+        construir la lista completa.
+
+        Returns:
+            ObservacionAlmacen, o None si no hay observaciones que cumplan
+        """
+        conexion = self._conexion()
+        filtro = self._filtro(taxon)
+        if filtro is not None and not filtro.ids:
+            return None
+        taxones = set(filtro.ids) if filtro is not None else None
+
+        def del_taxon(id_observacion: int) -> bool:
+            fila = conexion.execute("SELECT taxon_id FROM observaciones WHERE id = ?", (id_observacion,)).fetchone()
+            return fila is not None and fila[0] in taxones
+
+        elegida = None
+        if lat is not None and lon is not None:
+            muestra = self._candidatas(*rectangulo_de_radio(lat, lon, radio_m), filtro, MUESTRA_DIRECTA)
+            cercanas = self._cercanas(lat, lon, radio_m, filtro, muestra)
+            if len(muestra) >= MUESTRA_DIRECTA:
+                escala_lon = math.cos(math.radians(lat))
+                radio_grados = radio_m / METROS_POR_GRADO
+
+                def en_circulo(id_observacion: int) -> Optional[float]:
+                    fila = conexion.execute(
+                        "SELECT min_lat, min_lon FROM observaciones_rtree WHERE id = ?", (id_observacion,)
+                    ).fetchone()
+                    if fila is None:
+                        return None
+                    d = math.hypot(fila[0] - lat, (fila[1] - lon) * escala_lon)
+                    if d > radio_grados or (taxones is not None and not del_taxon(id_observacion)):
+                        return None
+                    return d * METROS_POR_GRADO
+
+                elegida = self._id_al_azar(en_circulo)
+            # Pocas candidatas (o zona con muy pocas observaciones frente al
+            # total, donde el rechazo no acierta): se elige entre la muestra
+            if elegida is None:
+                if not cercanas:
+                    return None
+                elegida = random.choice(cercanas)
+        elif filtro is not None:
+            marcas = ",".join("?" * len(filtro.ids))
+            if filtro.por_indice:
+                ids = [fila[0] for fila in conexion.execute(
+                    f"SELECT id FROM observaciones WHERE taxon_id IN ({marcas})", filtro.ids
+                )]
+                if not ids:
+                    return None
+                elegida = (None, random.choice(ids))
+            else:
+                elegida = self._id_al_azar(lambda i: 0.0 if del_taxon(i) else None)
+                if elegida is None:
+                    fila = conexion.execute(
+                        f"SELECT id FROM observaciones WHERE taxon_id IN ({marcas}) LIMIT 1", filtro.ids
+                    ).fetchone()
+                    elegida = (None, fila[0])
+                else:
+                    elegida = (None, elegida[1])
+        else:
+            # Sin filtros: un id al azar entre el menor y el mayor (los ids son casi contiguos)
+            minimo, maximo = self._rango_ids()
+            if minimo is None:
+                return None
+            elegida = (None, conexion.execute(
+                "SELECT id FROM observaciones WHERE id >= ? LIMIT 1", (random.randint(minimo, maximo),)
+            ).fetchone()[0])
+
+        distancia, id_elegida = elegida
+        observacion = self._por_ids([id_elegida])[id_elegida]
+        observacion.distancia_m = distancia
+        return observacion
+
+    # Los lugares (ver lugares.py) solo necesitan `bbox` y `contiene(lat, lon)`:
+    # el R-tree entrega el rectángulo del lugar y el polígono descarta el resto
+
+    def en_lugar(self, lugar, taxon: Optional[str] = None, limite: int = 100) -> List[ObservacionAlmacen]:
+        """
+        Observaciones dentro del polígono de un lugar
+
+        Args:
+            lugar: Lugar del registro (lugares.Lugar)
+            taxon: Prefijo del nombre científico o común (opcional)
+            limite: Máximo de observaciones
+
+        Returns:
+            list: Observaciones (sin orden particular)
+        """
+        ids = []
+        for id_observacion, lat, lon in self._candidatas(*lugar.bbox, self._filtro(taxon)):
+            if lugar.contiene(lat, lon):
+                ids.append(id_observacion)
+                if len(ids) >= limite:
+                    break
+        filas = self._por_ids(ids)
+        return [filas[i] for i in ids if i in filas]
+
+    def contar_lugar(self, lugar):
+        """
+        Cuenta y guarda las observaciones de cada especie dentro del polígono de un lugar
+
+        Recorre todas las observaciones del rectángulo del lugar (cientos de ms
+        en los lugares grandes): se hace en la ingesta, no en cada consulta.
+        """
+        conteo: Counter = Counter()
+        conexion = self._conexion()
+        filas = conexion.execute(
+            """SELECT r.min_lat, r.min_lon, o.taxon_id FROM observaciones_rtree r JOIN observaciones o ON o.id = r.id
+               WHERE r.max_lat >= ? AND r.min_lat <= ? AND r.max_lon >= ? AND r.min_lon <= ?""",
+            (lugar.bbox[0], lugar.bbox[2], lugar.bbox[1], lugar.bbox[3]),
+        )
+        for lat, lon, taxon_id in filas:
+            if taxon_id is not None and lugar.contiene(lat, lon):
+                conteo[taxon_id] += 1
+        with conexion:
+            conexion.execute("DELETE FROM especies_por_lugar WHERE lugar = ?", (lugar.id,))
+            conexion.executemany(
+                "INSERT INTO especies_por_lugar (lugar, taxon_id, observaciones) VALUES (?, ?, ?)",
+                [(lugar.id, taxon_id, n) for taxon_id, n in conteo.items()],
+            )
+            conexion.execute("INSERT OR REPLACE INTO lugares_contados (lugar, huella) VALUES (?, ?)",
+                             (lugar.id, lugar.huella))
+
+    def contar_lugares(self, lugares: Iterable) -> int:
+        """Cuenta las especies de varios lugares (ver contar_lugar); retorna cuántos"""
+        contados = 0
+        for lugar in lugares:
+            self.contar_lugar(lugar)
+            contados += 1
+        return contados
+
+    def especies_en_lugar(self, lugar, limite: int = 20) -> List[Tuple[str, Optional[str], int]]:
+        """
+        Especies más observadas dentro del polígono de un lugar
+
+        Se leen de los conteos guardados; si el lugar no se ha contado, o su
+        geometría cambió desde entonces, se cuenta primero (una sola vez).
+
+        Returns:
+            list: (nombre científico, nombre común, observaciones), de la más observada a la menos
+        """
+        conexion = self._conexion()
+        fila = conexion.execute("SELECT huella FROM lugares_contados WHERE lugar = ?", (lugar.id,)).fetchone()
+        if fila is None or fila[0] != lugar.huella:
+            self.contar_lugar(lugar)
+        return conexion.execute(
+            """SELECT t.nombre, t.nombre_comun, e.observaciones FROM especies_por_lugar e
+               JOIN taxones t ON t.id = e.taxon_id
+               WHERE e.lugar = ? ORDER BY e.observaciones DESC, e.taxon_id LIMIT ?""",
+            (lugar.id, limite),
+        ).fetchall()
+
+    def estadisticas(self) -> Dict[str, int]:
+        """Número de observaciones y taxones por fuente"""
+        conexion = self._conexion()
+        return {
+            "observaciones": conexion.execute("SELECT count(*) FROM observaciones").fetchone()[0],
+            "taxones": conexion.execute("SELECT count(*) FROM taxones").fetchone()[0],
+            "por_fuente": dict(conexion.execute("SELECT fuente, count(*) FROM observaciones GROUP BY fuente")),
+        }
+
+
+# --- Lectura de exportaciones ---
+
+def _columnas(cabecera: List[str]) -> Dict[str, int]:
+    """Posición de cada campo de COLUMNAS en una cabecera (la primera columna candidata que exista)"""
+    posiciones = {nombre.strip().lower().rsplit("/", 1)[-1]: i for i, nombre in enumerate(cabecera)}
+    resultado = {}
+    for campo, candidatas in COLUMNAS.items():
+        for candidata in candidatas:
+            if candidata in posiciones:
+                resultado[campo] = posiciones[candidata]
+                break
+    return resultado
+
+
+def _registros(filas: Iterator[List[str]], posiciones: Dict[str, int]) -> Iterator[Dict[str, str]]:
+    for fila in filas:
+        yield {campo: fila[i] for campo, i in posiciones.items() if i < len(fila)}
+
+
+def leer_tabla(texto: io.TextIOBase, delimitador: Optional[str] = None,
+               comillas: Optional[str] = '"') -> Iterator[Dict[str, str]]:
+    """
+    Registros normalizados de una tabla con cabecera (CSV de iNaturalist o CSV/TSV de GBIF)
+    """
+    primera = texto.readline()
+    if delimitador is None:
+        delimitador = "\t" if primera.count("\t") > primera.count(",") else ","
+    opciones = {"delimiter": delimitador}
+    if comillas:
+        opciones["quotechar"] = comillas
+    else:
+        opciones["quoting"] = csv.QUOTE_NONE
+    cabecera = next(csv.reader([primera], **opciones))
+    posiciones = _columnas(cabecera)
+    if "lat" not in posiciones or "lon" not in posiciones:
+        raise ValueError(f"La tabla no tiene columnas de coordenadas reconocibles: {cabecera[:10]}")
+    yield from _registros(csv.reader(texto, **opciones), posiciones)
+
+
+def leer_dwca(ruta: Path) -> Iterator[Dict[str, str]]:
+    """
+    Registros normalizados del archivo núcleo de un Darwin Core Archive (zip o carpeta)
+
+    meta.xml indica el archivo núcleo, sus separadores, las líneas de cabecera
+    y el término Darwin Core de cada columna. El zip y el archivo núcleo se
+    cierran al agotar (o cerrar) el iterador.
+    """
+    with contextlib.ExitStack() as abiertos:
+        comprimido = abiertos.enter_context(zipfile.ZipFile(ruta)) if zipfile.is_zipfile(ruta) else None
+        meta = comprimido.read("meta.xml") if comprimido else (Path(ruta) / "meta.xml").read_bytes()
+
+        raiz = ET.fromstring(meta)
+        espacio = raiz.tag.split("}")[0] + "}" if raiz.tag.startswith("{") else ""
+        nucleo = raiz.find(f"{espacio}core")
+        if nucleo is None:
+            raise ValueError("meta.xml no describe un archivo núcleo (core)")
+
+        codificacion = nucleo.get("encoding", "UTF-8")
+        delimitador = nucleo.get("fieldsTerminatedBy", "\\t").encode().decode("unicode_escape")
+        comillas = nucleo.get("fieldsEnclosedBy", '"').encode().decode("unicode_escape") or None
+        cabeceras = int(nucleo.get("ignoreHeaderLines", "0"))
+        nombre_archivo = nucleo.find(f"{espacio}files/{espacio}location").text.strip()
+
+        # Columnas según meta.xml: término (última parte de la URI) -> posición
+        terminos: List[str] = []
+        for campo in nucleo.iter():
+            if campo.tag in (f"{espacio}id", f"{espacio}field") and campo.get("index") is not None:
+                indice = int(campo.get("index"))
+                termino = campo.get("term", "id" if campo.tag == f"{espacio}id" else "")
+                terminos.extend([""] * (indice + 1 - len(terminos)))
+                if not terminos[indice] or campo.tag == f"{espacio}field":
+                    terminos[indice] = termino
+        posiciones = _columnas(terminos)
+        if "lat" not in posiciones or "lon" not in posiciones:
+            raise ValueError("El archivo núcleo no tiene decimalLatitude/decimalLongitude")
+
+        if comprimido:
+            texto = io.TextIOWrapper(comprimido.open(nombre_archivo), encoding=codificacion, newline="")
+        else:
+            texto = open(Path(ruta) / nombre_archivo, encoding=codificacion, newline="")
+        abiertos.enter_context(texto)
+        opciones = {"delimiter": delimitador}
+        if comillas:
+            opciones["quotechar"] = comillas
+        else:
+            opciones["quoting"] = csv.QUOTE_NONE
+        filas = csv.reader(texto, **opciones)
+        for _ in range(cabeceras):
+            next(filas, None)
+        yield from _registros(filas, posiciones)
+
+
+def _leer_tabla_archivo(ruta: Path) -> Iterator[Dict[str, str]]:
+    """Registros de una tabla en disco; el archivo se cierra al agotar (o cerrar) el iterador"""
+    with open(ruta, encoding="utf-8-sig", newline="") as texto:
+        yield from leer_tabla(texto)
+
+
+def leer_exportacion(ruta: Path) -> Tuple[str, Iterator[Dict[str, str]]]:
+    """
+    Detecta el formato de una exportación y retorna (fuente, registros)
+
+    - Darwin Core Archive: un zip o una carpeta con meta.xml (GBIF)
+    - Tabla: CSV de iNaturalist, o CSV/TSV de GBIF (la fuente se deduce de las columnas)
+    """
+    ruta = Path(ruta)
+    if ruta.is_dir():
+        es_dwca = (ruta / "meta.xml").is_file()
+    elif zipfile.is_zipfile(ruta):
+        with zipfile.ZipFile(ruta) as comprimido:
+            es_dwca = "meta.xml" in comprimido.namelist()
+    else:
+        es_dwca = False
+    if es_dwca:
+        return "gbif", leer_dwca(ruta)
+
+    with open(ruta, encoding="utf-8-sig", newline="") as texto:
+        primera = texto.readline().lower()
+    fuente = "gbif" if "gbifid" in primera or "decimallatitude" in primera else "inaturalist"
+    return fuente, _leer_tabla_archivo(ruta)
+
+
+# Instancia global
+almacen = AlmacenObservaciones()
+
+
+def obtener_almacen() -> AlmacenObservaciones:
+    """Retorna la instancia global del almacén"""
+    return almacen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén local de observaciones de Bogotá")
+    parser.add_argument("--ingerir", nargs="+", metavar="ARCHIVO", help="CSV de iNaturalist, CSV/TSV de GBIF o Darwin Core Archive")
+    parser.add_argument("--fuente", help="Nombre de la fuente (por defecto se deduce del formato)")
+    parser.add_argument("--sin-filtro", action="store_true", help="No descartar observaciones fuera de Bogotá")
+    parser.add_argument("--radio", nargs=3, type=float, metavar=("LAT", "LON", "METROS"), help="Consulta por radio")
+    parser.add_argument("--taxon", help="Filtra la consulta por prefijo del nombre científico o común")
+    parser.add_argument("--limite", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.ingerir:
+        for ruta in args.ingerir:
+            inicio = time.perf_counter()
+            fuente, registros = leer_exportacion(Path(ruta))
+            resumen = almacen.ingerir(registros, args.fuente or fuente, bbox=None if args.sin_filtro else BBOX_BOGOTA)
+            print(f"✅ {ruta} ({args.fuente or fuente}): {resumen['guardados']} observaciones guardadas, "
+                  f"{resumen['omitidos']} omitidas, {resumen['taxones_nuevos']} taxones nuevos "
+                  f"({time.perf_counter() - inicio:.1f}s)")
+        inicio = time.perf_counter()
+        contados = almacen.contar_lugares(obtener_registro())
+        print(f"📍 Especies contadas en {contados} lugares ({time.perf_counter() - inicio:.1f}s)")
+
+    if args.radio:
+        lat, lon, radio = args.radio
+        inicio = time.perf_counter()
+        resultados = almacen.en_radio(lat, lon, radio, args.taxon, args.limite)
+        print(f"🔎 {len(resultados)} observaciones a menos de {radio:g} m ({1000 * (time.perf_counter() - inicio):.1f} ms)")
+        for observacion in resultados:
+            print(f"  {observacion.distancia_m:7.0f} m  {observacion.especie or 'Desconocida'}"
+                  f" ({observacion.nombre_comun or 'N/A'}) {observacion.fecha or ''}")
+
+    if not args.ingerir and not args.radio:
+        if not almacen.existe():
+            print("El almacén no se ha construido: usa --ingerir")
+        else:
+            print(almacen.estadisticas())
+
+
+if __name__ == "__main__":
+    main()
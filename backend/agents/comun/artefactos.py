@@ -0,0 +1,232 @@
+"""
+Almacén de artefactos (imágenes generadas por los agentes)
+
+Cada imagen se guarda una sola vez, identificada por el hash de su contenido,
+y se sirve desde /api/artefactos/{id}. Las variantes (WebP, AVIF, PNG
+optimizado) y los tamaños reducidos se generan la primera vez que se piden y
+quedan guardados en disco junto al original: como el id depende del
+contenido, una variante nunca cambia y puede cachearse para siempre.
+Los artefactos vectoriales (SVG) no tienen variantes: se sirven tal cual o,
+si el navegador lo acepta, comprimidos con gzip (texto muy repetitivo que
+queda en una fracción del tamaño).
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image, features
+
+# Carpeta de artefactos (dentro de la carpeta de imágenes generadas)
+CARPETA_ARTEFACTOS = Path(__file__).parent.parent.parent / "imagenes_generadas" / "artefactos"
+
+# Ruta pública de los artefactos en el servidor
+RUTA_ARTEFACTOS = "/api/artefactos"
+
+# Anchos disponibles para las miniaturas y tamaños adaptables (srcset)
+ANCHOS_PERMITIDOS = (160, 320, 640, 1000, 1600)
+
+# formato -> (formato de Pillow, tipo MIME, opciones de guardado)
+FORMATOS = {
+    "avif": ("AVIF", "image/avif", {"quality": 60, "speed": 6}),
+    "webp": ("WEBP", "image/webp", {"quality": 82, "method": 6}),
+    "png": ("PNG", "image/png", {"optimize": True}),
+}
+
+# Extensiones de los originales y tipo MIME de los vectoriales
+EXTENSIONES_ORIGINAL = ("png", "svg")
+TIPO_SVG = "image/svg+xml"
+
+# Formatos que se ofrecen en la negociación por cabecera Accept, en orden de preferencia
+_PREFERENCIA_ACCEPT = ("avif", "webp")
+
+_PATRON_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def formato_disponible(formato: str) -> bool:
+    """Indica si esta instalación de Pillow puede codificar el formato"""
+    if formato not in FORMATOS:
+        return False
+    if formato in ("avif", "webp"):
+        return features.check(formato)
+    return True
+
+
+def guardar_artefacto(datos: bytes, extension: str = "png") -> str:
+    """
+    Guarda una imagen en el almacén (si no existía ya)
+
+    Args:
+        datos: Bytes de la imagen original
+        extension: "png" o "svg"
+
+    Returns:
+        str: Id del artefacto
+    """
+    if extension not in EXTENSIONES_ORIGINAL:
+        raise ValueError(f"Extensión de artefacto no soportada: {extension}")
+    artefacto_id = hashlib.sha256(datos).hexdigest()[:32]
+    ruta = CARPETA_ARTEFACTOS / f"{artefacto_id}.{extension}"
+    if not ruta.exists():
+        CARPETA_ARTEFACTOS.mkdir(parents=True, exist_ok=True)
+        _escribir_atomico(ruta, datos)
+    return artefacto_id
+
+
+def guardar_artefacto_desde_archivo(ruta: str) -> str:
+    """
+    Guarda en el almacén una imagen que ya está en disco
+
+    Args:
+        ruta: Ruta de la imagen
+
+    Returns:
+        str: Id del artefacto
+    """
+    with open(ruta, "rb") as archivo:
+        return guardar_artefacto(archivo.read())
+
+
+def url_artefacto(artefacto_id: str, ancho: Optional[int] = None) -> str:
+    """Retorna la URL pública de un artefacto (opcionalmente a un ancho dado)"""
+    url = f"{RUTA_ARTEFACTOS}/{artefacto_id}"
+    return f"{url}?ancho={ancho}" if ancho else url
+
+
+def ruta_original(artefacto_id: str) -> Optional[Path]:
+    """Retorna la ruta del original de un artefacto, o None si no existe o el id no es válido"""
+    if not _PATRON_ID.match(artefacto_id):
+        return None
+    for extension in EXTENSIONES_ORIGINAL:
+        ruta = CARPETA_ARTEFACTOS / f"{artefacto_id}.{extension}"
+        if ruta.exists():
+            return ruta
+    return None
+
+
+def es_vectorial(artefacto_id: str) -> bool:
+    """Indica si el artefacto es un SVG (se sirve sin variantes)"""
+    original = ruta_original(artefacto_id)
+    return original is not None and original.suffix == ".svg"
+
+
+def ajustar_ancho(ancho: Optional[int]) -> Optional[int]:
+    """
+    Ajusta un ancho pedido al menor ancho permitido que lo cubre, para que
+    solo exista un número acotado de variantes por artefacto.
+
+    Args:
+        ancho: Ancho pedido en píxeles (None = tamaño original)
+
+    Returns:
+        int: Ancho permitido, o None para el tamaño original
+    """
+    if ancho is None:
+        return None
+    for permitido in ANCHOS_PERMITIDOS:
+        if ancho <= permitido:
+            return permitido
+    return None
+
+
+def negociar_formato(accept: Optional[str], formato: Optional[str] = None) -> str:
+    """
+    Elige el formato de la respuesta
+
+    Args:
+        accept: Cabecera Accept de la petición
+        formato: Formato pedido explícitamente (tiene prioridad)
+
+    Returns:
+        str: Uno de los formatos de FORMATOS
+
+    Raises:
+        ValueError: Si el formato pedido no existe o no está disponible
+    """
+    if formato:
+        formato = formato.lower()
+        if not formato_disponible(formato):
+            raise ValueError(f"Formato no disponible: {formato}")
+        return formato
+
+    accept = (accept or "").lower()
+    for candidato in _PREFERENCIA_ACCEPT:
+        if FORMATOS[candidato][1] in accept and formato_disponible(candidato):
+            return candidato
+    return "png"
+
+
+def obtener_svg_gzip(artefacto_id: str) -> Path:
+    """
+    Retorna (generándola la primera vez) la copia comprimida con gzip de un SVG
+
+    Args:
+        artefacto_id: Id de un artefacto vectorial
+
+    Returns:
+        Path: Ruta del archivo .svg.gz
+
+    Raises:
+        FileNotFoundError: Si el artefacto no existe o no es un SVG
+    """
+    original = ruta_original(artefacto_id)
+    if original is None or original.suffix != ".svg":
+        raise FileNotFoundError(f"Artefacto vectorial no encontrado: {artefacto_id}")
+    ruta = original.with_name(f"{original.name}.gz")
+    if not ruta.exists():
+        # mtime=0: el mismo SVG produce siempre los mismos bytes
+        _escribir_atomico(ruta, gzip.compress(original.read_bytes(), compresslevel=9, mtime=0))
+    return ruta
+
+
+def obtener_variante(artefacto_id: str, formato: str, ancho: Optional[int] = None) -> Tuple[Path, str]:
+    """
+    Retorna (generándola la primera vez) una variante de un artefacto
+
+    Args:
+        artefacto_id: Id del artefacto
+        formato: Uno de los formatos de FORMATOS
+        ancho: Ancho permitido (ver ajustar_ancho) o None para el tamaño original
+
+    Returns:
+        tuple: (ruta del archivo, tipo MIME)
+
+    Raises:
+        FileNotFoundError: Si el artefacto no existe
+    """
+    original = ruta_original(artefacto_id)
+    if original is None:
+        raise FileNotFoundError(f"Artefacto no encontrado: {artefacto_id}")
+    if original.suffix == ".svg":
+        return original, TIPO_SVG
+
+    formato_pillow, tipo_mime, opciones = FORMATOS[formato]
+    ruta = CARPETA_ARTEFACTOS / f"{artefacto_id}_{ancho or 'orig'}.{formato}"
+    if ruta.exists():
+        return ruta, tipo_mime
+
+    with Image.open(original) as imagen:
+        imagen = imagen.convert("RGB")
+        if ancho and ancho < imagen.width:
+            alto = max(1, round(imagen.height * ancho / imagen.width))
+            imagen = imagen.resize((ancho, alto), Image.LANCZOS)
+        if formato == "png":
+            # Paleta de 256 colores: las visualizaciones son planas y el PNG
+            # resultante pesa una fracción del original de color verdadero
+            imagen = imagen.quantize(colors=256, method=Image.Quantize.MEDIANCUT)
+        temporal = ruta.with_name(f"{ruta.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        imagen.save(temporal, formato_pillow, **opciones)
+    os.replace(temporal, ruta)
+    return ruta, tipo_mime
+
+
+def _escribir_atomico(ruta: Path, datos: bytes):
+    """Escribe un archivo mediante un temporal y un renombrado atómico"""
+    temporal = ruta.with_name(f"{ruta.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    with open(temporal, "wb") as archivo:
+        archivo.write(datos)
+    os.replace(temporal, ruta)
@@ -0,0 +1,237 @@
+"""
+Servicio compartido de ejecución de herramientas pesadas (CPU) para los agentes
+
+Las herramientas que decodifican audio, mezclan pistas o rasterizan imágenes
+retienen el GIL y bloquean el bucle de eventos del servidor. Este módulo las
+ejecuta en un pool de procesos acotado, con trabajadores "calientes" que ya
+tienen NumPy, Pillow (y matplotlib, si está instalado) y los recursos de cada
+herramienta precargados.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Número de procesos del pool (por defecto, la mitad de los núcleos, mínimo 1)
+MAX_TRABAJADORES = int(os.getenv("TOOL_POOL_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+
+
+@dataclass
+class HerramientaRegistrada:
+    """Configuración de una herramienta que se ejecuta en el pool de procesos"""
+    nombre: str
+    funcion: Callable[..., Any]
+    max_concurrencia: int = 2
+    timeout: float = 60.0
+    precarga: Optional[Callable[[], None]] = None
+    llamadas: int = 0
+    errores: int = 0
+    timeouts: int = 0
+    tiempo_total: float = 0.0
+    _semaforo: asyncio.Semaphore = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # Todas las llamadas llegan desde el bucle de eventos del servidor (el
+        # orquestador usa runner.run_async); el semáforo se liga a él al
+        # primer uso y los que esperan despiertan sin sondeo
+        self._semaforo = asyncio.Semaphore(self.max_concurrencia)
+
+    async def adquirir(self):
+        """Espera (sin bloquear el bucle de eventos) un cupo de concurrencia"""
+        await self._semaforo.acquire()
+
+    def liberar(self):
+        """Libera el cupo de concurrencia (desde el hilo del bucle de eventos)"""
+        self._semaforo.release()
+
+
+def _inicializar_trabajador(precargas: List[Callable[[], None]]):
+    """
+    Inicializa un proceso trabajador: importa las librerías numéricas y
+    ejecuta las funciones de precarga de cada herramienta registrada.
+    """
+    import random
+    import numpy
+    import PIL.Image  # noqa: F401
+    try:
+        # matplotlib es un motor opcional del río emocional
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot  # noqa: F401
+    except ImportError:
+        pass
+
+    # Con "fork" todos los trabajadores heredan el mismo estado aleatorio
+    random.seed()
+    numpy.random.seed()
+
+    for precarga in precargas:
+        try:
+            precarga()
+        except Exception as e:
+            print(f"⚠️ Error en la precarga del trabajador ({getattr(precarga, '__name__', precarga)}): {e}", flush=True)
+
+
+def _calentar() -> int:
+    """Tarea vacía usada para arrancar los procesos del pool por adelantado"""
+    return os.getpid()
+
+
+class EjecutorHerramientas:
+    """
+    Ejecuta herramientas registradas en un pool de procesos acotado,
+    con límite de concurrencia y tiempo máximo por herramienta.
+    """
+
+    def __init__(self, max_trabajadores: int = MAX_TRABAJADORES):
+        self.max_trabajadores = max_trabajadores
+        self.herramientas: Dict[str, HerramientaRegistrada] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def registrar(
+        self,
+        nombre: str,
+        funcion: Callable[..., Any],
+        max_concurrencia: int = 2,
+        timeout: float = 60.0,
+        precarga: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Registra una herramienta para ejecutarse en el pool
+
+        Args:
+            nombre: Nombre con el que se invocará la herramienta
+            funcion: Función síncrona a nivel de módulo (debe poder serializarse)
+            max_concurrencia: Número máximo de ejecuciones simultáneas de esta herramienta
+            timeout: Tiempo máximo de espera en segundos
+            precarga: Función opcional que cada trabajador ejecuta al iniciar
+        """
+        self.herramientas[nombre] = HerramientaRegistrada(
+            nombre=nombre,
+            funcion=funcion,
+            max_concurrencia=max_concurrencia,
+            timeout=timeout,
+            precarga=precarga,
+        )
+
+    def iniciar(self):
+        """Crea el pool (si no existe) y arranca todos sus trabajadores"""
+        if self._pool is not None:
+            return self._pool
+
+        precargas = []
+        for herramienta in self.herramientas.values():
+            if herramienta.precarga and herramienta.precarga not in precargas:
+                precargas.append(herramienta.precarga)
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_trabajadores,
+            initializer=_inicializar_trabajador,
+            initargs=(precargas,),
+        )
+        for _ in range(self.max_trabajadores):
+            self._pool.submit(_calentar)
+        return self._pool
+
+    async def ejecutar(self, nombre: str, *args, **kwargs) -> Any:
+        """
+        Ejecuta una herramienta registrada en el pool de procesos
+
+        Args:
+            nombre: Nombre de la herramienta registrada
+            *args, **kwargs: Argumentos para la herramienta
+
+        Returns:
+            El resultado de la herramienta
+
+        Raises:
+            KeyError: Si la herramienta no está registrada
+            TimeoutError: Si la herramienta supera su tiempo máximo
+        """
+        if nombre not in self.herramientas:
+            raise KeyError(f"Herramienta '{nombre}' no registrada en el ejecutor")
+
+        herramienta = self.herramientas[nombre]
+        pool = self.iniciar()
+
+        bucle = asyncio.get_running_loop()
+        await herramienta.adquirir()
+        inicio = time.perf_counter()
+        herramienta.llamadas += 1
+        try:
+            tarea = pool.submit(_llamar, herramienta.funcion, args, kwargs)
+        except Exception:
+            herramienta.liberar()
+            raise
+        # El cupo se libera cuando el trabajador termina de verdad, incluso si
+        # el llamador dejó de esperar por timeout (un proceso no se puede
+        # interrumpir). El aviso llega en un hilo del pool: la liberación se
+        # pasa al bucle, porque asyncio.Semaphore no es seguro entre hilos
+        tarea.add_done_callback(lambda _: _en_bucle(bucle, herramienta.liberar))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(tarea), timeout=herramienta.timeout)
+        except asyncio.TimeoutError:
+            herramienta.timeouts += 1
+            raise TimeoutError(
+                f"La herramienta '{nombre}' superó el tiempo límite de {herramienta.timeout:g}s"
+            )
+        except Exception:
+            herramienta.errores += 1
+            raise
+        finally:
+            herramienta.tiempo_total += time.perf_counter() - inicio
+
+    def estadisticas(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna contadores de uso por herramienta"""
+        return {
+            nombre: {
+                "llamadas": h.llamadas,
+                "errores": h.errores,
+                "timeouts": h.timeouts,
+                "latencia_media_s": round(h.tiempo_total / h.llamadas, 4) if h.llamadas else 0.0,
+                "max_concurrencia": h.max_concurrencia,
+                "timeout_s": h.timeout,
+            }
+            for nombre, h in self.herramientas.items()
+        }
+
+    def cerrar(self):
+        """Detiene el pool de procesos"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def _en_bucle(bucle: asyncio.AbstractEventLoop, funcion: Callable[[], None]):
+    """Programa la función en el bucle desde otro hilo (si el bucle ya cerró, no hay a quién avisar)"""
+    try:
+        bucle.call_soon_threadsafe(funcion)
+    except RuntimeError:
+        pass
+
+
+def _llamar(funcion: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    """Adaptador ejecutado dentro del trabajador"""
+    return funcion(*args, **kwargs)
+
+
+# Instancia global compartida por todos los agentes
+ejecutor = EjecutorHerramientas()
+
+
+def obtener_ejecutor() -> EjecutorHerramientas:
+    """Retorna la instancia global del ejecutor de herramientas"""
+    return ejecutor
+
+
+def registrar_herramienta(nombre: str, funcion: Callable[..., Any], **opciones):
+    """Registra una herramienta en el ejecutor global (ver EjecutorHerramientas.registrar)"""
+    ejecutor.registrar(nombre, funcion, **opciones)
+
+
+async def ejecutar_herramienta(nombre: str, *args, **kwargs) -> Any:
+    """Ejecuta una herramienta registrada en el ejecutor global"""
+    return await ejecutor.ejecutar(nombre, *args, **kwargs)
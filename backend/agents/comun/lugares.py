@@ -0,0 +1,294 @@
+"""
+Registro de lugares de la Estructura Ecológica Principal (EEP) de Bogotá
+
+Los lugares (humedales, parques, cerros...) se cargan de un GeoJSON con sus
+polígonos. Al cargar se construyen dos índices en memoria:
+
+- nombres: el nombre, el id y los alias normalizados (sin tildes ni
+  mayúsculas) apuntan al lugar, así que buscar un nombre es una búsqueda en
+  un diccionario;
+- rejilla: celdas de TAMANO_CELDA grados con los lugares cuyo rectángulo
+  las toca, así que saber en qué lugar está un punto solo revisa los pocos
+  polígonos de su celda.
+
+El lugar más cercano a un punto se busca ordenando los lugares por la
+distancia a su rectángulo y midiendo la distancia exacta solo a los primeros.
+
+Lo comparten los endpoints de la API de iNaturalist y las herramientas de
+los agentes.
+
+Las geometrías de datos/eep_bogota.geojson son aproximadas (marcadas con
+"aproximado": true); se reemplazan por la capa oficial de la EEP sin cambiar
+el código, siempre que conserve las propiedades id y nombre.
+
+Uso (desde backend/):
+    python -m agents.comun.lugares --punto 4.7519 -74.0841
+    python -m agents.comun.lugares --buscar "juan amarillo"
+
+Variables de entorno:
+    BOGOTA_LUGARES   ruta del GeoJSON (por defecto backend/agents/comun/datos/eep_bogota.geojson)
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import unicodedata
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+RUTA_LUGARES = Path(os.getenv("BOGOTA_LUGARES", Path(__file__).parent / "datos" / "eep_bogota.geojson"))
+
+# Lado de las celdas del índice espacial, en grados (≈ 1,1 km en Bogotá)
+TAMANO_CELDA = 0.01
+
+METROS_POR_GRADO = 111_320.0
+
+# Anillo: lista de (lon, lat) cerrada; polígono: anillo exterior y huecos
+Anillo = List[Tuple[float, float]]
+
+
+def normalizar_nombre(texto: str) -> str:
+    """Minúsculas, sin tildes y con los espacios simplificados"""
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.replace("-", " ").split())
+
+
+def _punto_en_anillo(lon: float, lat: float, anillo: Anillo) -> bool:
+    """Prueba del rayo (par-impar)"""
+    dentro = False
+    x1, y1 = anillo[-1]
+    for x2, y2 in anillo:
+        if (y1 > lat) != (y2 > lat) and lon < (x2 - x1) * (lat - y1) / (y2 - y1) + x1:
+            dentro = not dentro
+        x1, y1 = x2, y2
+    return dentro
+
+
+def _distancia_a_segmento(px: float, py: float, ax: float, ay: float, bx: float, by: float) -> float:
+    dx, dy = bx - ax, by - ay
+    largo = dx * dx + dy * dy
+    t = 0.0 if largo == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / largo))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+@dataclass(frozen=True)
+class Lugar:
+    """Unidad de la EEP con su geometría"""
+    id: str
+    nombre: str
+    tipo: str
+    poligonos: Tuple[Tuple[Anillo, ...], ...] = field(repr=False)
+    bbox: Tuple[float, float, float, float]  # min_lat, min_lon, max_lat, max_lon
+    centro: Tuple[float, float]               # lat, lon
+    alias: Tuple[str, ...] = ()
+    aproximado: bool = False
+    huella: str = field(default="", compare=False)  # hash de la geometría (ver AlmacenObservaciones.contar_lugar)
+
+    def contiene(self, lat: float, lon: float) -> bool:
+        """Indica si el punto está dentro del lugar"""
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+        for exterior, *huecos in self.poligonos:
+            if _punto_en_anillo(lon, lat, exterior) and not any(_punto_en_anillo(lon, lat, h) for h in huecos):
+                return True
+        return False
+
+    def distancia_m(self, lat: float, lon: float) -> float:
+        """Distancia en metros del punto al borde del lugar (0 si está dentro)"""
+        if self.contiene(lat, lon):
+            return 0.0
+        # Proyección equirectangular local: basta a escala de ciudad
+        escala = math.cos(math.radians(lat))
+        px, py = lon * escala, lat
+        minima = math.inf
+        for poligono in self.poligonos:
+            for anillo in poligono:
+                for (x1, y1), (x2, y2) in zip(anillo, anillo[1:]):
+                    minima = min(minima, _distancia_a_segmento(px, py, x1 * escala, y1, x2 * escala, y2))
+        return minima * METROS_POR_GRADO
+
+    def radio_m(self) -> float:
+        """Radio de un círculo centrado en `centro` que cubre el rectángulo del lugar"""
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        escala = math.cos(math.radians(self.centro[0]))
+        return METROS_POR_GRADO * max(
+            math.hypot(lat - self.centro[0], (lon - self.centro[1]) * escala)
+            for lat in (min_lat, max_lat) for lon in (min_lon, max_lon)
+        )
+
+    def resumen(self) -> Dict:
+        """Datos del lugar para las respuestas de la API"""
+        return {
+            "id": self.id,
+            "nombre": self.nombre,
+            "tipo": self.tipo,
+            "centro": {"lat": round(self.centro[0], 6), "lon": round(self.centro[1], 6)},
+            "bbox": [round(v, 6) for v in self.bbox],
+            "aproximado": self.aproximado,
+        }
+
+
+def _lugar_desde_feature(feature: Dict) -> Lugar:
+    propiedades = feature["properties"]
+    geometria = feature["geometry"]
+    if geometria["type"] == "Polygon":
+        coordenadas = [geometria["coordinates"]]
+    elif geometria["type"] == "MultiPolygon":
+        coordenadas = geometria["coordinates"]
+    else:
+        raise ValueError(f"Geometría no soportada para {propiedades.get('nombre')}: {geometria['type']}")
+
+    poligonos = tuple(
+        tuple([(float(lon), float(lat)) for lon, lat, *_ in anillo] for anillo in poligono)
+        for poligono in coordenadas
+    )
+    exteriores = [lonlat for poligono in poligonos for lonlat in poligono[0]]
+    lons = [lon for lon, _ in exteriores]
+    lats = [lat for _, lat in exteriores]
+    bbox = (min(lats), min(lons), max(lats), max(lons))
+    centro = propiedades.get("centro") or ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)
+    return Lugar(
+        id=propiedades.get("id") or normalizar_nombre(propiedades["nombre"]).replace(" ", "-"),
+        nombre=propiedades["nombre"],
+        tipo=propiedades.get("tipo", "otro"),
+        poligonos=poligonos,
+        bbox=bbox,
+        centro=(float(centro[0]), float(centro[1])),
+        alias=tuple(propiedades.get("alias", [])),
+        aproximado=bool(propiedades.get("aproximado", False)),
+        huella=hashlib.sha256(json.dumps(geometria, sort_keys=True).encode("utf-8")).hexdigest()[:16],
+    )
+
+
+class RegistroLugares:
+    """
+    Lugares con índice de nombres y rejilla espacial
+    """
+
+    def __init__(self, lugares: List[Lugar], tamano_celda: float = TAMANO_CELDA):
+        self.lugares: Dict[str, Lugar] = {lugar.id: lugar for lugar in lugares}
+        self.tamano_celda = tamano_celda
+
+        self._nombres: Dict[str, Lugar] = {}
+        for lugar in lugares:
+            for nombre in (lugar.id, lugar.nombre, *lugar.alias):
+                self._nombres.setdefault(normalizar_nombre(nombre), lugar)
+
+        self._celdas: Dict[Tuple[int, int], List[Lugar]] = {}
+        for lugar in lugares:
+            (i0, j0), (i1, j1) = self._celda(lugar.bbox[0], lugar.bbox[1]), self._celda(lugar.bbox[2], lugar.bbox[3])
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    self._celdas.setdefault((i, j), []).append(lugar)
+
+    @classmethod
+    def desde_geojson(cls, ruta: Path = RUTA_LUGARES) -> "RegistroLugares":
+        with open(ruta, encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+        return cls([_lugar_desde_feature(feature) for feature in datos["features"]])
+
+    def _celda(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.tamano_celda), math.floor(lon / self.tamano_celda)
+
+    def __iter__(self):
+        return iter(self.lugares.values())
+
+    def __len__(self) -> int:
+        return len(self.lugares)
+
+    def nombres(self) -> List[str]:
+        return [lugar.nombre for lugar in self.lugares.values()]
+
+    def obtener(self, nombre: str) -> Optional[Lugar]:
+        """Lugar por id, nombre o alias (sin distinguir tildes ni mayúsculas)"""
+        return self._nombres.get(normalizar_nombre(nombre))
+
+    def buscar(self, texto: str, limite: int = 5) -> List[Lugar]:
+        """
+        Lugares cuyo nombre o alias coincide con el texto
+
+        Primero la coincidencia exacta; si no la hay, los nombres que
+        contienen todas las palabras del texto ("conejera" → Humedal La Conejera).
+        """
+        exacto = self.obtener(texto)
+        if exacto:
+            return [exacto]
+        palabras = normalizar_nombre(texto).split()
+        encontrados: Dict[str, Lugar] = {}
+        for nombre, lugar in self._nombres.items():
+            if palabras and all(palabra in nombre for palabra in palabras):
+                encontrados.setdefault(lugar.id, lugar)
+        return list(encontrados.values())[:limite]
+
+    def en_punto(self, lat: float, lon: float) -> List[Lugar]:
+        """Lugares que contienen el punto (pueden solaparse)"""
+        return [lugar for lugar in self._celdas.get(self._celda(lat, lon), ()) if lugar.contiene(lat, lon)]
+
+    def mas_cercanos(self, lat: float, lon: float, limite: int = 1,
+                     maximo_m: Optional[float] = None) -> List[Tuple[Lugar, float]]:
+        """
+        Lugares más cercanos a un punto, con su distancia en metros (0 si lo contiene)
+
+        Los lugares se ordenan por la distancia a su rectángulo, que nunca es
+        mayor que la distancia al polígono; la distancia exacta solo se calcula
+        hasta que el siguiente rectángulo ya está más lejos que el último lugar
+        encontrado. Con las pocas decenas de unidades de la EEP esto cuesta
+        lo mismo en cualquier punto, dentro o fuera de la ciudad.
+        """
+        escala = math.cos(math.radians(lat))
+
+        def cota(lugar: Lugar) -> float:
+            min_lat, min_lon, max_lat, max_lon = lugar.bbox
+            dlat = max(min_lat - lat, 0.0, lat - max_lat)
+            dlon = max(min_lon - lon, 0.0, lon - max_lon) * escala
+            return math.hypot(dlat, dlon) * METROS_POR_GRADO
+
+        ordenados = sorted(((cota(lugar), lugar.id) for lugar in self.lugares.values()))
+        encontrados: List[Tuple[float, str]] = []
+        for distancia_minima, id_lugar in ordenados:
+            if maximo_m is not None and distancia_minima > maximo_m:
+                break
+            if len(encontrados) >= limite and encontrados[limite - 1][0] <= distancia_minima:
+                break
+            distancia = self.lugares[id_lugar].distancia_m(lat, lon)
+            if maximo_m is None or distancia <= maximo_m:
+                encontrados.append((distancia, id_lugar))
+                encontrados.sort()
+        return [(self.lugares[id_lugar], distancia) for distancia, id_lugar in encontrados[:limite]]
+
+
+@lru_cache(maxsize=1)
+def obtener_registro() -> RegistroLugares:
+    """Registro compartido, cargado la primera vez que se usa"""
+    return RegistroLugares.desde_geojson()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de lugares de la EEP de Bogotá")
+    parser.add_argument("--punto", nargs=2, type=float, metavar=("LAT", "LON"), help="Lugares en un punto y el más cercano")
+    parser.add_argument("--buscar", help="Busca un lugar por nombre")
+    args = parser.parse_args()
+
+    registro = obtener_registro()
+    if args.buscar:
+        for lugar in registro.buscar(args.buscar):
+            print(f"📍 {lugar.nombre} ({lugar.tipo}) — {lugar.centro[0]:.4f}, {lugar.centro[1]:.4f}")
+    if args.punto:
+        lat, lon = args.punto
+        dentro = registro.en_punto(lat, lon)
+        print("Dentro de: " + (", ".join(lugar.nombre for lugar in dentro) if dentro else "ningún lugar"))
+        for lugar, distancia in registro.mas_cercanos(lat, lon, limite=3):
+            print(f"  {distancia:8.0f} m  {lugar.nombre}")
+    if not args.buscar and not args.punto:
+        for lugar in registro:
+            print(f"{lugar.id:45} {lugar.tipo:12} {'(aprox.)' if lugar.aproximado else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Memoización compartida de las herramientas (FunctionTools) de los agentes
+
+Muchas herramientas son puras o casi puras y el modelo las repite con los
+mismos argumentos dentro de una conversación y entre conversaciones. El
+decorador @memoizar guarda sus resultados:
+
+- Los argumentos se normalizan antes de formar la clave (espacios en los
+  textos y, por herramienta, mayúsculas, tildes u otra transformación), así
+  que "Musgos " y "musgos" comparten entrada cuando la herramienta lo permite.
+- Cada herramienta tiene su propia política LRU + TTL en memoria.
+- Opcionalmente, los resultados se guardan también en disco (SQLite) y
+  sobreviven a los reinicios del servidor.
+- Se cuentan aciertos, fallos y latencias por herramienta; /api/metricas
+  los expone junto a los del ejecutor de herramientas.
+
+El decorador conserva la firma de la función (functools.wraps), que es lo que
+ADK usa para declarar la herramienta ante el modelo, y funciona igual con
+funciones síncronas y async. El parámetro tool_context de ADK nunca forma
+parte de la clave: una herramienta que depende del estado de la sesión no
+debe memoizarse.
+
+Una herramienta marca un resultado como no guardable devolviéndolo como
+ResultadoEfimero (p. ej. "no encontrado" o una copia vieja de una página):
+llega igual al modelo, pero la próxima llamada vuelve a ejecutarse.
+
+Variables de entorno:
+    MEMO_HERRAMIENTAS   ruta del archivo SQLite (por defecto backend/cache/memo_herramientas.sqlite3)
+"""
+
+import functools
+import inspect
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+RUTA_MEMO = Path(os.getenv("MEMO_HERRAMIENTAS", Path(__file__).parent.parent.parent / "cache" / "memo_herramientas.sqlite3"))
+
+# Parámetros que inyecta ADK y que no son argumentos de la herramienta
+PARAMETROS_IGNORADOS = frozenset({"tool_context"})
+
+_ESPACIOS = re.compile(r"\s+")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS resultados (
+    herramienta TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    valor TEXT NOT NULL,
+    creado REAL NOT NULL,
+    PRIMARY KEY (herramienta, clave)
+);
+"""
+
+
+def normalizar_espacios(valor: Any) -> Any:
+    """Normalización por defecto de los textos: sin espacios repetidos ni en los extremos"""
+    if isinstance(valor, str):
+        return _ESPACIOS.sub(" ", valor).strip()
+    return valor
+
+
+def sin_mayusculas(valor: Any) -> Any:
+    """Normalización para argumentos que no distinguen mayúsculas"""
+    return valor.lower() if isinstance(valor, str) else valor
+
+
+class ResultadoEfimero(str):
+    """Texto que la herramienta devuelve sin que @memoizar lo guarde"""
+
+
+def resultado_valido(resultado: Any) -> bool:
+    """
+    Política por defecto de qué resultados se guardan: los mensajes de error
+    de las herramientas ("⚠️ ...", "Error ...") y los ResultadoEfimero se
+    repiten en la próxima llamada
+    """
+    if resultado is None or isinstance(resultado, ResultadoEfimero):
+        return False
+    if isinstance(resultado, str):
+        return not resultado.startswith(("⚠️", "Error"))
+    return True
+
+
+class AlmacenMemo:
+    """
+    Resultados persistentes de las herramientas memoizadas (SQLite)
+    """
+
+    def __init__(self, ruta: Path = RUTA_MEMO):
+        self.ruta = Path(ruta)
+        self._local = threading.local()
+
+    def _conexion(self) -> sqlite3.Connection:
+        # Una conexión por hilo: sqlite3 no comparte conexiones entre hilos
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            conexion = sqlite3.connect(self.ruta, timeout=5)
+            conexion.executescript(_ESQUEMA)
+            self._local.conexion = conexion
+        return conexion
+
+    def leer(self, herramienta: str, clave: str, ttl: Optional[float]) -> Optional[Tuple[Any, float]]:
+        """Retorna (valor, creado) si hay un resultado vigente, o None"""
+        fila = self._conexion().execute(
+            "SELECT valor, creado FROM resultados WHERE herramienta = ? AND clave = ?", (herramienta, clave)
+        ).fetchone()
+        if fila is None or (ttl is not None and time.time() - fila[1] > ttl):
+            return None
+        return json.loads(fila[0]), fila[1]
+
+    def guardar(self, herramienta: str, clave: str, valor: Any):
+        """Guarda un resultado (debe poder serializarse como JSON)"""
+        conexion = self._conexion()
+        with conexion:
+            conexion.execute(
+                "INSERT OR REPLACE INTO resultados (herramienta, clave, valor, creado) VALUES (?, ?, ?, ?)",
+                (herramienta, clave, json.dumps(valor, ensure_ascii=False), time.time()),
+            )
+
+    def limpiar(self, herramienta: Optional[str] = None):
+        """Borra los resultados de una herramienta (o de todas)"""
+        if not self.ruta.is_file():
+            return
+        conexion = self._conexion()
+        with conexion:
+            if herramienta is None:
+                conexion.execute("DELETE FROM resultados")
+            else:
+                conexion.execute("DELETE FROM resultados WHERE herramienta = ?", (herramienta,))
+
+
+@dataclass
+class MemoHerramienta:
+    """Caché y contadores de una herramienta memoizada"""
+    nombre: str
+    ttl: Optional[float] = 3600.0
+    max_entradas: int = 256
+    persistente: bool = False
+    aciertos: int = 0
+    aciertos_disco: int = 0
+    fallos: int = 0
+    no_guardados: int = 0
+    tiempo_aciertos: float = 0.0
+    tiempo_fallos: float = 0.0
+    _entradas: "OrderedDict[str, Tuple[Any, float]]" = field(default_factory=OrderedDict, init=False, repr=False)
+    _candado: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def leer(self, clave: str) -> Tuple[bool, Any]:
+        """Busca un resultado vigente: primero en memoria, luego en disco"""
+        ahora = time.time()
+        with self._candado:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                valor, creado = entrada
+                if self.ttl is None or ahora - creado <= self.ttl:
+                    self._entradas.move_to_end(clave)
+                    return True, valor
+                del self._entradas[clave]
+
+        if self.persistente:
+            guardado = almacen.leer(self.nombre, clave, self.ttl)
+            if guardado is not None:
+                valor, creado = guardado
+                self._recordar(clave, valor, creado)
+                with self._candado:
+                    self.aciertos_disco += 1
+                return True, valor
+        return False, None
+
+    def guardar(self, clave: str, valor: Any):
+        self._recordar(clave, valor, time.time())
+        if self.persistente:
+            try:
+                almacen.guardar(self.nombre, clave, valor)
+            except (TypeError, ValueError, sqlite3.Error):
+                # Resultados no serializables o disco bloqueado: basta la memoria
+                pass
+
+    def _recordar(self, clave: str, valor: Any, creado: float):
+        with self._candado:
+            self._entradas[clave] = (valor, creado)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def contar(self, acierto: bool, segundos: float):
+        with self._candado:
+            if acierto:
+                self.aciertos += 1
+                self.tiempo_aciertos += segundos
+            else:
+                self.fallos += 1
+                self.tiempo_fallos += segundos
+
+    def descartar(self):
+        """Cuenta un resultado que no se guardó (p. ej. un mensaje de error)"""
+        with self._candado:
+            self.no_guardados += 1
+
+    def limpiar(self):
+        """Vacía la caché en memoria y en disco"""
+        with self._candado:
+            self._entradas.clear()
+        if self.persistente:
+            almacen.limpiar(self.nombre)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        llamadas = self.aciertos + self.fallos
+        return {
+            "llamadas": llamadas,
+            "aciertos": self.aciertos,
+            "aciertos_disco": self.aciertos_disco,
+            "fallos": self.fallos,
+            "no_guardados": self.no_guardados,
+            "tasa_aciertos": round(self.aciertos / llamadas, 4) if llamadas else 0.0,
+            "latencia_acierto_ms": round(1000 * self.tiempo_aciertos / self.aciertos, 3) if self.aciertos else 0.0,
+            "latencia_fallo_ms": round(1000 * self.tiempo_fallos / self.fallos, 3) if self.fallos else 0.0,
+            "entradas": len(self._entradas),
+            "max_entradas": self.max_entradas,
+            "ttl_s": self.ttl,
+            "persistente": self.persistente,
+        }
+
+
+# Almacén en disco y registro de herramientas memoizadas, compartidos por todos los agentes
+almacen = AlmacenMemo()
+_memos: Dict[str, MemoHerramienta] = {}
+
+
+def _nombre_por_defecto(funcion: Callable[..., Any]) -> str:
+    # agents.bosque.tools.explorar -> bosque.explorar
+    partes = funcion.__module__.split(".")
+    agente = partes[-2] if len(partes) > 1 else partes[-1]
+    return f"{agente}.{funcion.__name__}"
+
+
+def memoizar(
+    ttl: Optional[float] = 3600.0,
+    max_entradas: int = 256,
+    persistente: bool = False,
+    normalizar: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    guardar_si: Callable[[Any], bool] = resultado_valido,
+    nombre: Optional[str] = None,
+):
+    """
+    Decorador que memoiza una herramienta de agente
+
+    Args:
+        ttl: Segundos que un resultado sigue vigente (None: sin caducidad)
+        max_entradas: Resultados en memoria; al superarse se descarta el menos usado
+        persistente: Guarda también los resultados en disco
+        normalizar: Normalización adicional por argumento (nombre -> función),
+            aplicada después de limpiar los espacios de los textos
+        guardar_si: Decide si un resultado se guarda (por defecto, no los errores)
+        nombre: Nombre en las métricas (por defecto, módulo.función)
+
+    Returns:
+        El decorador; la función decorada conserva su nombre, docstring y firma
+    """
+    normalizadores = normalizar or {}
+
+    def decorador(funcion: Callable[..., Any]) -> Callable[..., Any]:
+        firma = inspect.signature(funcion)
+        memo = MemoHerramienta(
+            nombre=nombre or _nombre_por_defecto(funcion),
+            ttl=ttl,
+            max_entradas=max_entradas,
+            persistente=persistente,
+        )
+        _memos[memo.nombre] = memo
+
+        def clave_de(args: tuple, kwargs: dict) -> str:
+            argumentos = firma.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            valores = {}
+            for parametro, valor in argumentos.arguments.items():
+                if parametro in PARAMETROS_IGNORADOS:
+                    continue
+                valor = normalizar_espacios(valor)
+                if parametro in normalizadores:
+                    valor = normalizadores[parametro](valor)
+                valores[parametro] = valor
+            return json.dumps(valores, sort_keys=True, ensure_ascii=False, default=repr)
+
+        def guardar(clave: str, resultado: Any):
+            if guardar_si(resultado):
+                memo.guardar(clave, resultado)
+            else:
+                memo.descartar()
+
+        if inspect.iscoroutinefunction(funcion):
+            @functools.wraps(funcion)
+            async def envoltura(*args, **kwargs):
+                inicio = time.perf_counter()
+                clave = clave_de(args, kwargs)
+                encontrado, resultado = memo.leer(clave)
+                if not encontrado:
+                    resultado = await funcion(*args, **kwargs)
+                    guardar(clave, resultado)
+                memo.contar(encontrado, time.perf_counter() - inicio)
+                return resultado
+        else:
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                inicio = time.perf_counter()
+                clave = clave_de(args, kwargs)
+                encontrado, resultado = memo.leer(clave)
+                if not encontrado:
+                    resultado = funcion(*args, **kwargs)
+                    guardar(clave, resultado)
+                memo.contar(encontrado, time.perf_counter() - inicio)
+                return resultado
+
+        envoltura.memo = memo
+        return envoltura
+
+    return decorador
+
+
+def estadisticas() -> Dict[str, Dict[str, Any]]:
+    """Contadores de todas las herramientas memoizadas"""
+    return {nombre: memo.estadisticas() for nombre, memo in _memos.items()}
+
+
+def limpiar(nombre: Optional[str] = None):
+    """Vacía la caché de una herramienta (o de todas)"""
+    for memo in ([_memos[nombre]] if nombre else _memos.values()):
+        memo.limpiar()
@@ -4,17 +4,33 @@ from pathlib import Path
 from dotenv import load_dotenv
 from google.adk.agents.llm_agent import Agent
 from google.adk.agents.base_agent import AgentState
-from google.adk.tools import FunctionTool
+from google.adk.tools import FunctionTool, ToolContext
 import google.genai.types as types
-from .visualizacion import generar_rio_emocional, guardar_imagen_texto
+from .visualizacion import (
+    generar_rio_emocional, guardar_imagen_texto, precargar_recursos,
+    buscar_trazo_en_cache, recordar_trazo,
+)
+from .svg import generar_rio_svg, generar_trazo_svg
+from ..comun.ejecutor import registrar_herramienta, ejecutar_herramienta
+from ..comun.artefactos import guardar_artefacto, guardar_artefacto_desde_archivo, url_artefacto
 
 # Cargar variables de entorno desde .env en el directorio raíz
 env_path = Path(__file__).parent.parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
-# Almacenamiento de emojis e interpretaciones por sesión
-_emojis_conversacion = []
-_ultima_interpretacion = ""  # Almacena la última interpretación textual del agente
+# El renderizado de imágenes se ejecuta en el pool de procesos compartido
+registrar_herramienta("generar_rio_emocional", generar_rio_emocional, max_concurrencia=2, timeout=60.0,
+                      precarga=precargar_recursos)
+registrar_herramienta("guardar_imagen_texto", guardar_imagen_texto, max_concurrencia=2, timeout=60.0,
+                      precarga=precargar_recursos)
+registrar_herramienta("generar_rio_svg", generar_rio_svg, max_concurrencia=2, timeout=30.0)
+registrar_herramienta("generar_trazo_svg", generar_trazo_svg, max_concurrencia=2, timeout=30.0)
+
+# La última interpretación vive en el estado de la sesión de ADK (tool_context.state),
+# no en el módulo: cada usuario tiene la suya y se descarta junto con su sesión.
+CLAVE_INTERPRETACION = "diario_ultima_interpretacion"
+# Límite de caracteres guardados por interpretación (acota el tamaño del estado)
+MAX_CARACTERES_INTERPRETACION = 4000
 
 def extraer_emojis(texto: str) -> list:
     """Extrae todos los emojis de un texto"""
@@ -66,6 +82,11 @@ def detectar_comando_imagen(texto: str) -> tuple:
     return False, ""
 
 # Tool para crear visualizaciones del río emocional
+# Las herramientas del diario no se memoizan con @memoizar: su respuesta lleva
+# URLs de artefactos, que guardadas en disco sobreviven a los artefactos y al
+# cambio de motor (RIO_MOTOR). crear_imagen_rio_emocional depende además del
+# estado de la sesión; lo que se reutiliza es el trazo renderizado
+# (buscar_trazo_en_cache, con VERSION_RENDERIZADOR en la clave)
 async def crear_visualizacion_rio(emojis: str) -> str:
     """
     Crea una visualización artística del río emocional basada en los emojis.
@@ -74,22 +95,24 @@ async def crear_visualizacion_rio(emojis: str) -> str:
         emojis: Los emojis a visualizar, separados por espacios (ejemplo: "😊 🌊 💚 🌟")
 
     Returns:
-        Mensaje de confirmación
+        Mensaje de confirmación con la URL de la imagen
     """
     try:
         # Generar la visualización
-        imagen_bytes = generar_rio_emocional(emojis)
+        imagen_bytes = await ejecutar_herramienta("generar_rio_emocional", emojis)
 
-        # TODO: Guardar imagen como artifact cuando tengamos acceso al context
-        # Por ahora solo confirmamos que la imagen se generó
+        # Guardar como artefacto para servirla por /api/artefactos/{id}
+        artefacto_id = guardar_artefacto(imagen_bytes)
+        svg = await ejecutar_herramienta("generar_rio_svg", emojis)
+        svg_id = guardar_artefacto(svg.encode("utf-8"), extension="svg")
 
-        return f"✨ He generado tu visualización de tú río emocional. La imagen muestra el flujo poético de tus emociones: {emojis}\n\n(Imagen de {len(imagen_bytes):,} bytes generada exitosamente)"
+        return f"✨ He generado tu visualización de tú río emocional. La imagen muestra el flujo poético de tus emociones: {emojis}\n\n🖼️ Imagen: {url_artefacto(artefacto_id)}\n🔎 Miniatura: {url_artefacto(artefacto_id, ancho=320)}\n✏️ Versión vectorial (SVG): {url_artefacto(svg_id)}"
 
     except Exception as e:
         return f"⚠️ Hubo un problema al crear la visualización: {str(e)}"
 
 # Tool para guardar la interpretación del agente
-async def guardar_interpretacion_emocional(interpretacion: str) -> str:
+async def guardar_interpretacion_emocional(interpretacion: str, tool_context: ToolContext) -> str:
     """
     Guarda la interpretación textual del río emocional para usarla posteriormente
     en la creación de visualizaciones.
@@ -103,12 +126,11 @@ async def guardar_interpretacion_emocional(interpretacion: str) -> str:
     Returns:
         Mensaje de confirmación
     """
-    global _ultima_interpretacion
-    _ultima_interpretacion = interpretacion
+    tool_context.state[CLAVE_INTERPRETACION] = interpretacion[:MAX_CARACTERES_INTERPRETACION]
     return ""  # Retorna vacío para que no interrumpa tu respuesta al usuario
 
 # Tool para crear imagen desde la interpretación guardada
-async def crear_imagen_rio_emocional() -> str:
+async def crear_imagen_rio_emocional(tool_context: ToolContext) -> str:
     """
     Crea una visualización artística basada en la última interpretación del río emocional.
 
@@ -118,21 +140,29 @@ async def crear_imagen_rio_emocional() -> str:
     Llama a esta función cuando el usuario solicite crear una imagen.
 
     Returns:
-        Mensaje de confirmación con la ruta de la imagen guardada
+        Mensaje de confirmación con la URL de la imagen guardada
     """
-    global _ultima_interpretacion
+    interpretacion = tool_context.state.get(CLAVE_INTERPRETACION, "")
 
-    if not _ultima_interpretacion:
+    if not interpretacion:
         return "⚠️ Aún no tengo una interpretación de tu río emocional. Envíame algunos emojis primero para que pueda interpretarlos."
 
     try:
-        # Generar y guardar la imagen usando la interpretación
-        ruta_imagen = guardar_imagen_texto(_ultima_interpretacion)
+        # La misma interpretación siempre produce el mismo trazo: si ya existe,
+        # se devuelve sin pasar por el pool de procesos
+        ruta_imagen = buscar_trazo_en_cache(interpretacion)
+        if ruta_imagen is None:
+            ruta_imagen = await ejecutar_herramienta("guardar_imagen_texto", interpretacion)
+            recordar_trazo(interpretacion, ruta_imagen)
+
+        artefacto_id = guardar_artefacto_desde_archivo(ruta_imagen)
+        svg = await ejecutar_herramienta("generar_trazo_svg", interpretacion)
+        svg_id = guardar_artefacto(svg.encode("utf-8"), extension="svg")
 
         # Limpiar la interpretación después de usarla
-        _ultima_interpretacion = ""
+        tool_context.state[CLAVE_INTERPRETACION] = ""
 
-        return f"✨ He creado tu visualización de tú río emocional.\n\n📍 Imagen guardada en: {ruta_imagen}\n\nLa imagen traduce tu río emocional en un trazo visual dinámico usando matemáticas y arte."
+        return f"✨ He creado tu visualización de tú río emocional.\n\n🖼️ Imagen: {url_artefacto(artefacto_id)}\n🔎 Miniatura: {url_artefacto(artefacto_id, ancho=320)}\n✏️ Versión vectorial (SVG): {url_artefacto(svg_id)}\n\nLa imagen traduce tu río emocional en un trazo visual dinámico usando matemáticas y arte."
 
     except Exception as e:
         return f"⚠️ Hubo un problema al crear la visualización: {str(e)}"
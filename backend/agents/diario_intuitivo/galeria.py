@@ -0,0 +1,191 @@
+"""
+Galería del Diario Intuitivo: renderizado por lotes de ríos emocionales y trazos
+
+Pensado para el cierre de un taller: recibe las entradas de todos los
+participantes (una cadena de emojis o un texto por persona), las renderiza en
+paralelo en todos los núcleos y escribe cada imagen por separado más una hoja
+de contactos con todas ellas en mosaico.
+
+Uso (desde backend/):
+    python -m agents.diario_intuitivo.galeria --tipo rio --entrada emojis.txt --salida galeria/
+    python -m agents.diario_intuitivo.galeria --tipo trazo "texto uno" "texto dos"
+"""
+
+import argparse
+import io
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from .visualizacion import (
+    FUENTES_NEGRITA,
+    generar_imagen_texto,
+    generar_rio_emocional,
+    pegar_texto,
+    precargar_recursos,
+)
+
+TIPOS = ("rio", "trazo")
+
+# Ancho de cada miniatura en la hoja de contactos y separación entre ellas
+ANCHO_MINIATURA = 400
+_MARGEN = 16
+_ALTO_ETIQUETA = 28
+
+
+def _inicializar_trabajador():
+    """Cada proceso abre las fuentes y rasteriza los glifos una sola vez"""
+    precargar_recursos()
+
+
+def _renderizar(tarea: Tuple[str, int, str, str, int]) -> Tuple[int, str, Tuple[int, int], bytes]:
+    """
+    Renderiza una entrada en un proceso trabajador
+
+    Args:
+        tarea: (tipo, índice, entrada, carpeta de salida, ancho de la miniatura)
+
+    Returns:
+        tuple: (índice, ruta del archivo, tamaño de la miniatura, píxeles RGB de la miniatura)
+    """
+    tipo, indice, entrada, carpeta, ancho_miniatura = tarea
+    ruta = os.path.join(carpeta, f"{tipo}_{indice + 1:03d}.png")
+
+    if tipo == "rio":
+        datos = generar_rio_emocional(entrada)
+        with open(ruta, "wb") as archivo:
+            archivo.write(datos)
+        imagen = Image.open(io.BytesIO(datos)).convert("RGB")
+    else:
+        imagen = generar_imagen_texto(entrada)
+        imagen.save(ruta, "PNG")
+
+    alto = max(1, round(imagen.height * ancho_miniatura / imagen.width))
+    miniatura = imagen.resize((ancho_miniatura, alto), Image.LANCZOS)
+    return indice, ruta, miniatura.size, miniatura.tobytes()
+
+
+def componer_hoja(miniaturas: List[Image.Image], columnas: Optional[int] = None) -> Image.Image:
+    """
+    Compone las miniaturas en una hoja de contactos numerada
+
+    Args:
+        miniaturas: Imágenes del mismo ancho, en orden
+        columnas: Número de columnas (por defecto, la raíz cuadrada redondeada hacia arriba)
+
+    Returns:
+        Image: Hoja de contactos
+    """
+    columnas = columnas or max(1, math.ceil(math.sqrt(len(miniaturas))))
+    filas = math.ceil(len(miniaturas) / columnas)
+    ancho_celda = max(m.width for m in miniaturas)
+    alto_celda = max(m.height for m in miniaturas) + _ALTO_ETIQUETA
+
+    hoja = Image.new("RGB", (
+        columnas * ancho_celda + (columnas + 1) * _MARGEN,
+        filas * alto_celda + (filas + 1) * _MARGEN,
+    ), "#FFFFFF")
+    for i, miniatura in enumerate(miniaturas):
+        x = _MARGEN + (i % columnas) * (ancho_celda + _MARGEN)
+        y = _MARGEN + (i // columnas) * (alto_celda + _MARGEN)
+        hoja.paste(miniatura, (x, y))
+        pegar_texto(hoja, (x + ancho_celda // 2, y + miniatura.height + 6), str(i + 1),
+                    FUENTES_NEGRITA, 16, (85, 85, 85), anchor="mt")
+    return hoja
+
+
+def renderizar_galeria(
+    entradas: List[str],
+    tipo: str = "rio",
+    carpeta_salida: str = "galeria",
+    columnas: Optional[int] = None,
+    ancho_miniatura: int = ANCHO_MINIATURA,
+    trabajadores: Optional[int] = None,
+) -> Dict[str, object]:
+    """
+    Renderiza en paralelo una galería de ríos emocionales o trazos
+
+    Args:
+        entradas: Cadenas de emojis (tipo "rio") o textos (tipo "trazo"), una por participante
+        tipo: "rio" o "trazo"
+        carpeta_salida: Carpeta donde se escriben las imágenes y la hoja de contactos
+        columnas: Columnas de la hoja de contactos (opcional)
+        ancho_miniatura: Ancho de cada imagen en la hoja de contactos
+        trabajadores: Número de procesos (por defecto, todos los núcleos)
+
+    Returns:
+        dict: archivos individuales, ruta de la hoja, número de imágenes,
+        segundos transcurridos e imágenes por segundo
+
+    Raises:
+        ValueError: Si el tipo no existe o no hay entradas
+    """
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de galería desconocido: {tipo} (usa {', '.join(TIPOS)})")
+    entradas = [e.strip() for e in entradas if e and e.strip()]
+    if not entradas:
+        raise ValueError("No hay entradas para renderizar")
+
+    Path(carpeta_salida).mkdir(parents=True, exist_ok=True)
+    trabajadores = min(trabajadores or os.cpu_count() or 1, len(entradas))
+    tareas = [(tipo, i, entrada, carpeta_salida, ancho_miniatura) for i, entrada in enumerate(entradas)]
+
+    inicio = time.perf_counter()
+    archivos: List[Optional[str]] = [None] * len(entradas)
+    miniaturas: List[Optional[Image.Image]] = [None] * len(entradas)
+    with ProcessPoolExecutor(max_workers=trabajadores, initializer=_inicializar_trabajador) as pool:
+        # Lotes de varias entradas por envío para amortizar la comunicación entre procesos
+        lote = max(1, len(tareas) // (trabajadores * 4))
+        for indice, ruta, tamano, pixeles in pool.map(_renderizar, tareas, chunksize=lote):
+            archivos[indice] = ruta
+            miniaturas[indice] = Image.frombytes("RGB", tamano, pixeles)
+
+    ruta_hoja = os.path.join(carpeta_salida, f"hoja_{tipo}.png")
+    componer_hoja(miniaturas, columnas).save(ruta_hoja, "PNG", optimize=True)
+    segundos = time.perf_counter() - inicio
+
+    return {
+        "archivos": archivos,
+        "hoja": ruta_hoja,
+        "imagenes": len(entradas),
+        "segundos": round(segundos, 3),
+        "imagenes_por_segundo": round(len(entradas) / segundos, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renderiza una galería de ríos emocionales o trazos del pensamiento")
+    parser.add_argument("entradas", nargs="*", help="Cadenas de emojis o textos (uno por participante)")
+    parser.add_argument("--tipo", choices=TIPOS, default="rio")
+    parser.add_argument("--entrada", help="Archivo de texto con una entrada por línea")
+    parser.add_argument("--salida", default="galeria", help="Carpeta de salida")
+    parser.add_argument("--columnas", type=int, default=None)
+    parser.add_argument("--ancho", type=int, default=ANCHO_MINIATURA, help="Ancho de cada miniatura en la hoja")
+    parser.add_argument("--trabajadores", type=int, default=None, help="Número de procesos")
+    args = parser.parse_args()
+
+    entradas = list(args.entradas)
+    if args.entrada:
+        with open(args.entrada, encoding="utf-8") as archivo:
+            entradas.extend(archivo.read().splitlines())
+
+    try:
+        resultado = renderizar_galeria(entradas, args.tipo, args.salida, args.columnas, args.ancho, args.trabajadores)
+    except ValueError as e:
+        print(f"⚠️ {e}")
+        sys.exit(1)
+
+    print(f"✨ {resultado['imagenes']} imágenes en {resultado['segundos']:.2f}s "
+          f"({resultado['imagenes_por_segundo']:.1f} imágenes/s)")
+    print(f"📍 Hoja de contactos: {resultado['hoja']}")
+    print(f"📍 Imágenes individuales en: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
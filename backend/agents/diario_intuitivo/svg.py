@@ -0,0 +1,354 @@
+"""
+Salida vectorial (SVG) de las visualizaciones del Diario Intuitivo
+
+Las visualizaciones son unas pocas polilíneas, círculos y textos: en SVG
+pesan unos pocos KB y el navegador las dibuja a cualquier resolución, sin
+rasterizar en el servidor. La geometría es la misma que usan los
+renderizadores PNG (mismos puntos, estilos y colores); los recorridos se
+simplifican con Ramer-Douglas-Peucker y se escriben con coordenadas enteras.
+
+La nube del estilo "Disperso" (decenas de miles de puntos) no se escribe punto
+a punto: se dibuja como dos bandas a lo largo del recorrido, rellenas con una
+tesela de puntos cuya densidad reproduce la cobertura de la nube del PNG.
+"""
+
+from xml.sax.saxutils import escape
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .visualizacion import (
+    PUNTOS_A_PIXELES,
+    RADIO_PUNTO,
+    RIO_ALTO,
+    RIO_ANCHO,
+    RIO_ESCALA_X,
+    RIO_ESCALA_Y,
+    RIO_MARGEN_X,
+    TAMANO_EMOJI_RIO,
+    a_pixeles,
+    calcular_trazo,
+    mascara_puntos,
+    obtener_color_emoji,
+    tramos_por_ancho,
+)
+
+# Tolerancias de simplificación (en píxeles del lienzo)
+TOLERANCIA_RIO = 0.5
+TOLERANCIA_TRAZO = 1.0
+
+# Lado de la tesela de puntos de la nube "Disperso" (en píxeles)
+_TESELA = 64
+
+_FUENTE = "DejaVu Sans, Arial, sans-serif"
+
+
+def simplificar_rdp(puntos: np.ndarray, tolerancia: float) -> np.ndarray:
+    """
+    Simplifica una polilínea con el algoritmo de Ramer-Douglas-Peucker
+
+    Args:
+        puntos: Arreglo (N, 2) con los puntos de la polilínea
+        tolerancia: Distancia máxima (en las unidades de los puntos) entre la
+            polilínea original y la simplificada
+
+    Returns:
+        np.ndarray: Subconjunto de los puntos (siempre incluye el primero y el último)
+    """
+    n = len(puntos)
+    if n < 3:
+        return puntos
+    puntos_f = np.asarray(puntos, dtype=np.float64)
+    conservar = np.zeros(n, dtype=bool)
+    conservar[[0, n - 1]] = True
+
+    # Pila explícita en lugar de recursión (los trazos tienen miles de puntos)
+    pendientes = [(0, n - 1)]
+    while pendientes:
+        inicio, fin = pendientes.pop()
+        if fin - inicio < 2:
+            continue
+        a, b = puntos_f[inicio], puntos_f[fin]
+        intermedios = puntos_f[inicio + 1:fin]
+        direccion = b - a
+        longitud = np.hypot(*direccion)
+        if longitud == 0:
+            distancias = np.hypot(*(intermedios - a).T)
+        else:
+            distancias = np.abs(direccion[0] * (intermedios[:, 1] - a[1]) -
+                                direccion[1] * (intermedios[:, 0] - a[0])) / longitud
+        k = int(np.argmax(distancias))
+        if distancias[k] > tolerancia:
+            medio = inicio + 1 + k
+            conservar[medio] = True
+            pendientes.append((inicio, medio))
+            pendientes.append((medio, fin))
+    return puntos[conservar]
+
+
+def _numero(valor: float, decimales: int) -> str:
+    """Formatea un número con los decimales justos (sin ceros sobrantes)"""
+    texto = f"{valor:.{decimales}f}".rstrip("0").rstrip(".") if decimales else str(int(round(valor)))
+    return "0" if texto in ("-0", "") else texto
+
+
+def _unir(numeros: list) -> str:
+    """Une números de una ruta SVG: el signo '-' ya los separa, sin espacio"""
+    return " ".join(numeros).replace(" -", "-")
+
+
+def ruta_svg(puntos: np.ndarray, decimales: int = 0) -> str:
+    """
+    Convierte una polilínea en el atributo 'd' de un <path>: un punto absoluto
+    y desplazamientos relativos (más cortos que las coordenadas absolutas).
+
+    Args:
+        puntos: Arreglo (N, 2) con los puntos
+        decimales: Decimales con los que se escriben las coordenadas
+
+    Returns:
+        str: Datos de la ruta SVG
+    """
+    redondeados = np.round(np.asarray(puntos, dtype=np.float64), decimales)
+    x0, y0 = redondeados[0]
+    partes = ["M" + _unir([_numero(x0, decimales), _numero(y0, decimales)])]
+    if len(redondeados) > 1:
+        desplazamientos = np.diff(redondeados, axis=0).ravel()
+        partes.append("l" + _unir([_numero(v, decimales) for v in desplazamientos]))
+    return "".join(partes)
+
+
+def _puntos_svg(centros: np.ndarray) -> str:
+    """
+    Atributo 'd' de muchos puntos en un único <path>: un segmento nulo por
+    punto, que con stroke-linecap="round" se dibuja como un círculo
+    """
+    centros = np.asarray(centros, dtype=np.int64)
+    desplazamientos = np.diff(centros, axis=0)
+    return (f"M{_unir([str(centros[0][0]), str(centros[0][1])])}h0"
+            + "".join(f"m{_unir([str(dx), str(dy)])}h0" for dx, dy in desplazamientos))
+
+
+def _cobertura_a_densidad(cobertura: float) -> float:
+    """Puntos por píxel que, sembrados al azar, cubren esa fracción del área"""
+    area_punto = np.pi * (RADIO_PUNTO + 0.5) ** 2
+    return -np.log(max(1e-6, 1 - min(cobertura, 0.95))) / area_punto
+
+
+def _tesela(id_patron: str, densidad: float, rng: np.random.Generator) -> str:
+    """
+    Patrón SVG con puntos al azar; los que tocan un borde se repiten en el
+    lado opuesto para que la tesela empalme sin costuras
+    """
+    cantidad = int(rng.poisson(densidad * _TESELA * _TESELA))
+    centros = rng.integers(0, _TESELA, size=(cantidad, 2))
+    copias = [centros]
+    margen = RADIO_PUNTO + 1
+    for dx in (-_TESELA, 0, _TESELA):
+        for dy in (-_TESELA, 0, _TESELA):
+            if dx or dy:
+                desplazados = centros + (dx, dy)
+                cerca = np.all((desplazados > -margen) & (desplazados < _TESELA + margen), axis=1)
+                copias.append(desplazados[cerca])
+    centros = np.concatenate(copias)
+    contenido = (f'<path d="{_puntos_svg(centros)}" stroke="#000" stroke-width="{2 * RADIO_PUNTO + 1}" '
+                 f'stroke-linecap="round"/>') if len(centros) else ""
+    return (f'<pattern id="{id_patron}" patternUnits="userSpaceOnUse" width="{_TESELA}" '
+            f'height="{_TESELA}">{contenido}</pattern>')
+
+
+def _nube_svg(trazo: dict) -> list:
+    """
+    Nube del estilo "Disperso" como dos bandas a lo largo del recorrido: el
+    núcleo (a menos de una desviación) y el borde (hasta dos). Cada banda se
+    pinta con una tesela de puntos cuya densidad reproduce la cobertura que
+    tiene la nube del PNG dentro de esa banda.
+
+    Args:
+        trazo: Resultado de calcular_trazo con estilo 'disperso'
+
+    Returns:
+        list: Elementos SVG (definiciones de los patrones y las dos bandas)
+    """
+    ancho, alto = trazo['ancho'], trazo['alto']
+    sigma = trazo['dispersion']
+    eje = simplificar_rdp(trazo['puntos'], sigma / 4)
+    cubiertos = mascara_puntos(trazo['centros'], ancho, alto)
+
+    bandas = []
+    for semiancho in (sigma, 2 * sigma):
+        banda = Image.new("L", (ancho, alto), 0)
+        ImageDraw.Draw(banda).line(eje.ravel().tolist(), fill=255, width=int(2 * semiancho), joint="curve")
+        bandas.append(np.array(banda) > 0)
+    nucleo, exterior = bandas
+    borde = exterior & ~nucleo
+    cobertura_borde = float(cubiertos[borde].mean()) if borde.any() else 0.0
+    cobertura_nucleo = float(cubiertos[nucleo].mean()) if nucleo.any() else 0.0
+    # El núcleo también recibe los puntos del borde (la banda exterior lo cubre)
+    cobertura_extra = 1 - (1 - cobertura_nucleo) / max(1e-6, 1 - cobertura_borde)
+
+    rng = np.random.default_rng(len(trazo['centros']))
+    d = ruta_svg(eje)
+    elementos = [
+        "<defs>",
+        _tesela("nb", _cobertura_a_densidad(cobertura_borde), rng),
+        _tesela("nn", _cobertura_a_densidad(max(0.0, cobertura_extra)), rng),
+        "</defs>",
+    ]
+    for id_patron, semiancho in (("nb", 2 * sigma), ("nn", sigma)):
+        elementos.append(
+            f'<path d="{d}" fill="none" stroke="url(#{id_patron})" stroke-width="{round(2 * semiancho)}" '
+            f'stroke-linecap="round" stroke-linejoin="round"/>'
+        )
+    return elementos
+
+
+def _documento(ancho: int, alto: int, fondo: str, elementos: list) -> str:
+    """Envuelve los elementos en un documento SVG escalable (viewBox) con fondo"""
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {ancho} {alto}" '
+        f'width="{ancho}" height="{alto}">'
+        f'<rect width="100%" height="100%" fill="{fondo}"/>'
+        + "".join(elementos)
+        + "</svg>"
+    )
+
+
+def generar_rio_svg(emojis_texto: str) -> str:
+    """
+    Genera el río emocional como SVG (misma composición que generar_rio_emocional)
+
+    Args:
+        emojis_texto: String con los emojis separados por espacios
+
+    Returns:
+        str: Documento SVG
+    """
+    emojis = emojis_texto.split() or ['❓']
+    pt = PUNTOS_A_PIXELES
+    elementos = []
+
+    # Líneas de horizonte discontinuas
+    for y in a_pixeles(0, np.array([10, 0]))[1]:
+        elementos.append(
+            f'<path d="M{RIO_MARGEN_X:g} {_numero(y, 0)}H{RIO_ANCHO - RIO_MARGEN_X:g}" stroke="#EBEBEB" '
+            f'stroke-dasharray="{round(3.7 * pt)} {round(5.3 * pt) - round(3.7 * pt)}"/>'
+        )
+
+    tx, ty = a_pixeles(5, 9.5)
+    elementos.append(
+        f'<text x="{_numero(tx, 0)}" y="{_numero(ty, 0)}" font-family="{_FUENTE}" font-size="{round(24 * pt)}" '
+        f'font-weight="bold" fill="#2C3E50" text-anchor="middle" dominant-baseline="hanging">El Río de tu Pensamiento</text>'
+    )
+
+    # Río: un <path> simplificado por tramo, con la transparencia creciente
+    # de la versión PNG como degradado a lo largo del tramo
+    num_emojis = len(emojis)
+    x_positions = np.linspace(1, 9, num_emojis)
+    y_positions = 5 + 0.3 * np.sin(2 * np.pi * x_positions / 2)
+    x_river = np.linspace(0, 10, 200)
+    degradados = []
+    for i in range(num_emojis - 1):
+        mask = (x_river >= x_positions[i]) & (x_river <= x_positions[i + 1])
+        x_segment = x_river[mask]
+        if len(x_segment) < 2:
+            continue
+        px, py = a_pixeles(x_segment, 5 + 0.3 * np.sin(2 * np.pi * x_segment / 2))
+        color = obtener_color_emoji(emojis[i])
+        alfa_final = 0.6 + 0.4 * (len(x_segment) - 2) / len(x_segment)
+        degradados.append(
+            f'<linearGradient id="r{i}" gradientUnits="userSpaceOnUse" x1="{_numero(px[0], 0)}" x2="{_numero(px[-1], 0)}" y1="0" y2="0">'
+            f'<stop offset="0" stop-color="{color}" stop-opacity="0.6"/>'
+            f'<stop offset="1" stop-color="{color}" stop-opacity="{alfa_final:.2f}"/></linearGradient>'
+        )
+        puntos = simplificar_rdp(np.column_stack([px, py]), TOLERANCIA_RIO)
+        elementos.append(
+            f'<path d="{ruta_svg(puntos)}" fill="none" stroke="url(#r{i})" '
+            f'stroke-width="{round(15 * pt)}" stroke-linecap="round" stroke-linejoin="round"/>'
+        )
+
+    # Círculos, etiquetas y emojis (el navegador usa su propia fuente de emojis)
+    cx, cy = a_pixeles(x_positions, y_positions)
+    _, ly = a_pixeles(x_positions, y_positions - 0.7)
+    rx, ry = 0.4 * RIO_ESCALA_X, 0.4 * RIO_ESCALA_Y
+    # Un solo círculo definido y reutilizado (<use> le pasa el color), y los
+    # atributos comunes de etiquetas y emojis en su grupo
+    degradados.append(f'<ellipse id="c" rx="{_numero(rx, 0)}" ry="{_numero(ry, 0)}"/>')
+    elementos.append('<g fill-opacity="0.7">')
+    for i, emoji in enumerate(emojis):
+        elementos.append(
+            f'<use href="#c" x="{_numero(cx[i], 0)}" y="{_numero(cy[i], 0)}" fill="{obtener_color_emoji(emoji)}"/>'
+        )
+    elementos.append(
+        f'</g><g font-family="{_FUENTE}" font-size="{round(12 * pt)}" font-weight="bold" fill="#555" '
+        f'text-anchor="middle" dominant-baseline="hanging">'
+    )
+    for i in range(num_emojis):
+        elementos.append(f'<text x="{_numero(cx[i], 0)}" y="{_numero(ly[i], 0)}">{i + 1}</text>')
+    elementos.append(f'</g><g font-size="{TAMANO_EMOJI_RIO}" text-anchor="middle" dominant-baseline="central">')
+    for i, emoji in enumerate(emojis):
+        elementos.append(f'<text x="{_numero(cx[i], 0)}" y="{_numero(cy[i], 0)}">{escape(emoji)}</text>')
+    elementos.append('</g>')
+
+    texto_poetico = f'Un camino de {num_emojis} {"paso" if num_emojis == 1 else "pasos"} emocionales'
+    px, py = a_pixeles(5, 1.5)
+    elementos.append(
+        f'<text x="{_numero(px, 0)}" y="{_numero(py, 0)}" font-family="{_FUENTE}" font-size="{round(14 * pt)}" '
+        f'font-style="italic" fill="#555" text-anchor="middle" dominant-baseline="central">{texto_poetico}</text>'
+    )
+
+    return _documento(RIO_ANCHO, RIO_ALTO, "#F5F5F5", ["<defs>", *degradados, "</defs>", *elementos])
+
+
+def generar_trazo_svg(texto: str) -> str:
+    """
+    Genera el trazo del pensamiento como SVG (misma geometría que generar_imagen_texto)
+
+    Args:
+        texto: El texto a visualizar
+
+    Returns:
+        str: Documento SVG
+    """
+    trazo = calcular_trazo(texto)
+    ancho, alto = trazo['ancho'], trazo['alto']
+    puntos = trazo['puntos']
+    estilo = trazo['estilo']
+    elementos = [
+        f'<text x="{ancho // 2}" y="30" font-family="{_FUENTE}" font-size="24" fill="#000" '
+        f'text-anchor="middle" dominant-baseline="central">Trazo del Pensamiento</text>'
+    ]
+
+    if estilo is None:
+        elementos.append(
+            f'<text x="{ancho // 2}" y="{alto // 2}" font-family="{_FUENTE}" font-size="24" fill="#F00" '
+            f'text-anchor="middle" dominant-baseline="central">No se pudo generar el trazo</text>'
+        )
+
+    elif estilo == 'disperso':
+        elementos.extend(_nube_svg(trazo))
+
+    elif estilo == 'solitario':
+        opacidad = trazo['color'][3] / 255
+        elementos.append(
+            f'<path d="{ruta_svg(simplificar_rdp(puntos, TOLERANCIA_TRAZO))}" fill="none" stroke="#000" '
+            f'stroke-opacity="{opacidad:.2f}" stroke-width="1" stroke-linejoin="round"/>'
+        )
+
+    elif estilo == 'fragmentado':
+        d = "".join(ruta_svg(simplificar_rdp(puntos[inicio:fin + 1], TOLERANCIA_TRAZO))
+                    for inicio, fin in trazo['fragmentos'])
+        elementos.append(
+            f'<path d="{d}" fill="none" stroke="#000" stroke-width="2" stroke-linejoin="round"/>'
+        )
+
+    else:
+        # Sólido y Básico: un <path> por tramo de grosor constante
+        for inicio, fin, grosor in tramos_por_ancho(np.maximum(1, trazo['anchos'])):
+            tramo = simplificar_rdp(puntos[inicio:fin + 1], TOLERANCIA_TRAZO)
+            elementos.append(
+                f'<path d="{ruta_svg(tramo)}" fill="none" stroke="#000" stroke-width="{grosor}" '
+                f'stroke-linejoin="round"/>'
+            )
+
+    return _documento(ancho, alto, "#F5F5F5", elementos)
@@ -1,16 +1,17 @@
 """
 Herramienta para generar visualizaciones del río emocional
 """
+import hashlib
 import io
 import os
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path as FilePath
-from PIL import Image, ImageDraw, ImageFont
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.path import Path
+from typing import Optional
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+from PIL.PngImagePlugin import PngInfo
 import numpy as np
-import google.genai.types as types
 
 # Mapeo de emojis a colores emocionales
 EMOJI_COLORES = {
@@ -46,12 +47,368 @@ def obtener_color_emoji(emoji):
     """Obtiene el color asociado a un emoji"""
     return EMOJI_COLORES.get(emoji, EMOJI_COLORES['default'])
 
-def generar_rio_emocional(emojis_texto: str) -> bytes:
+# Paleta precalculada en RGB (evita convertir el color hex en cada dibujo)
+PALETA_RGB = {emoji: ImageColor.getrgb(color) for emoji, color in EMOJI_COLORES.items()}
+
+def obtener_color_emoji_rgb(emoji) -> tuple:
+    """Obtiene el color RGB asociado a un emoji"""
+    return PALETA_RGB.get(emoji, PALETA_RGB['default'])
+
+# Motor de renderizado por defecto del río emocional ("pillow" o "matplotlib")
+MOTOR_RIO = os.getenv("RIO_MOTOR", "pillow")
+
+# Geometría del lienzo del río: equivale a la figura de 12x8 pulgadas a 150 dpi
+# que producía matplotlib, con el área de datos (0..10, 0..10) casi a sangre
+RIO_ANCHO, RIO_ALTO = 1785, 1185
+RIO_MARGEN_X, RIO_MARGEN_Y = 14.5, 15.0
+RIO_ESCALA_X = (RIO_ANCHO - 2 * RIO_MARGEN_X) / 10
+RIO_ESCALA_Y = (RIO_ALTO - 2 * RIO_MARGEN_Y) / 10
+PUNTOS_A_PIXELES = 150 / 72
+_SUPERMUESTREO = 4
+
+# Fuentes candidatas (se busca por nombre en las carpetas de fuentes del sistema)
+FUENTES_TEXTO = ("DejaVuSans.ttf", "arial.ttf", "Arial.ttf", "LiberationSans-Regular.ttf")
+FUENTES_NEGRITA = ("DejaVuSans-Bold.ttf", "arialbd.ttf", "Arial Bold.ttf", "LiberationSans-Bold.ttf")
+FUENTES_ITALICA = ("DejaVuSans-Oblique.ttf", "ariali.ttf", "Arial Italic.ttf", "LiberationSans-Italic.ttf")
+# Fuentes de emojis a color y su tamaño nativo (las fuentes de mapa de bits solo admiten ese tamaño)
+# Fuente del trazo del pensamiento (históricamente Arial)
+FUENTES_TRAZO = ("arial.ttf",) + FUENTES_TEXTO
+FUENTES_EMOJI = (("NotoColorEmoji.ttf", 109), ("seguiemj.ttf", 109), ("Apple Color Emoji.ttc", 160))
+
+# Las fuentes y los glifos rasterizados se guardan en cachés de proceso: cada
+# archivo de fuente se abre una sola vez por tamaño y cada emoji se rasteriza
+# una sola vez. Las imágenes cacheadas son compartidas y solo deben leerse.
+
+@lru_cache(maxsize=64)
+def cargar_fuente(candidatas: tuple, tamano: int) -> ImageFont.FreeTypeFont:
+    """
+    Carga (una sola vez por proceso) la primera fuente disponible de una lista de candidatas
+
+    Args:
+        candidatas: Nombres o rutas de archivos de fuente, en orden de preferencia
+        tamano: Tamaño en píxeles
+
+    Returns:
+        FreeTypeFont: La fuente encontrada, o la fuente por defecto de Pillow
+    """
+    for nombre in candidatas:
+        try:
+            return ImageFont.truetype(nombre, tamano)
+        except (IOError, OSError):
+            continue
+    return ImageFont.load_default(size=tamano)
+
+@lru_cache(maxsize=16)
+def _cargar_fuente_italica(tamano: int):
+    """Retorna una fuente itálica instalada, o None si no hay ninguna"""
+    for nombre in FUENTES_ITALICA:
+        try:
+            return ImageFont.truetype(nombre, tamano)
+        except (IOError, OSError):
+            continue
+    return None
+
+@lru_cache(maxsize=16)
+def _cargar_fuente_emoji():
+    """Retorna (fuente, tamaño nativo) de la primera fuente de emojis a color, o None"""
+    for nombre, tamano_nativo in FUENTES_EMOJI:
+        try:
+            return ImageFont.truetype(nombre, tamano_nativo), tamano_nativo
+        except (IOError, OSError):
+            continue
+    return None
+
+@lru_cache(maxsize=512)
+def rasterizar_texto(texto: str, candidatas: tuple, tamano: int, anchor: str = 'la') -> tuple:
+    """
+    Rasteriza (una sola vez por proceso) un texto como máscara de cobertura.
+
+    Args:
+        texto: Texto a rasterizar
+        candidatas: Fuentes candidatas (ver cargar_fuente)
+        tamano: Tamaño en píxeles
+        anchor: Ancla del texto, como en ImageDraw.text
+
+    Returns:
+        tuple: (máscara "L", desplazamiento (dx, dy) de la máscara respecto al ancla)
+    """
+    fuente = cargar_fuente(candidatas, tamano)
+    caja = fuente.getbbox(texto, anchor=anchor)
+    mascara = Image.new("L", (max(1, caja[2] - caja[0]), max(1, caja[3] - caja[1])), 0)
+    ImageDraw.Draw(mascara).text((-caja[0], -caja[1]), texto, fill=255, anchor=anchor, font=fuente)
+    return mascara, (caja[0], caja[1])
+
+def pegar_texto(imagen: Image.Image, xy: tuple, texto: str, candidatas: tuple, tamano: int, fill, anchor: str = 'la'):
+    """
+    Dibuja un texto usando la caché de rasterización
+
+    Args:
+        imagen: Imagen de destino
+        xy: Posición del ancla en píxeles
+        texto: Texto a dibujar
+        candidatas: Fuentes candidatas (ver cargar_fuente)
+        tamano: Tamaño en píxeles
+        fill: Color del texto (nombre, hex o tupla RGB)
+        anchor: Ancla del texto, como en ImageDraw.text
+    """
+    mascara, (dx, dy) = rasterizar_texto(texto, candidatas, tamano, anchor)
+    color = ImageColor.getrgb(fill) if isinstance(fill, str) else fill
+    imagen.paste(color, (int(round(xy[0] + dx)), int(round(xy[1] + dy))), mascara)
+
+def dibujar_texto_italico(imagen: Image.Image, xy: tuple, texto: str, tamano: int, fill):
+    """
+    Dibuja texto en itálica centrado en 'xy'. Si no hay una fuente itálica
+    instalada, inclina la fuente regular con una transformación afín.
+
+    Args:
+        imagen: Imagen de destino
+        xy: Centro del texto en píxeles
+        texto: Texto a dibujar
+        tamano: Tamaño de la fuente en píxeles
+        fill: Color del texto
+    """
+    fuente_italica = _cargar_fuente_italica(tamano)
+    if fuente_italica is not None:
+        ImageDraw.Draw(imagen).text(xy, texto, fill=fill, anchor='mm', font=fuente_italica)
+        return
+
+    fuente = cargar_fuente(FUENTES_TEXTO, tamano)
+    caja = fuente.getbbox(texto, anchor='mm')
+    inclinacion = 0.2
+    extra = int(inclinacion * (caja[3] - caja[1])) + 1
+    capa = Image.new("L", (caja[2] - caja[0] + extra, caja[3] - caja[1]), 0)
+    ImageDraw.Draw(capa).text((-caja[0], -caja[1]), texto, fill=255, anchor='mm', font=fuente)
+    # Inclinar hacia la derecha: cada fila se desplaza en proporción a su altura
+    capa = capa.transform(capa.size, Image.AFFINE, (1, inclinacion, -inclinacion * capa.height, 0, 1, 0),
+                          resample=Image.BICUBIC)
+    imagen.paste(fill, (int(xy[0] + caja[0] - extra // 2), int(xy[1] + caja[1])), capa)
+
+@lru_cache(maxsize=512)
+def renderizar_glifo_emoji(emoji: str, tamano: int) -> Image.Image:
+    """
+    Renderiza (una sola vez por proceso) un emoji como imagen RGBA de alto
+    'tamano' píxeles. Usa una fuente de emojis a color si existe; si no, el
+    glifo monocromo de la fuente de texto (como hacía matplotlib).
+
+    Args:
+        emoji: El emoji a renderizar
+        tamano: Alto aproximado del glifo en píxeles
+
+    Returns:
+        Image: Glifo RGBA recortado a su contenido (compartido: solo lectura)
+    """
+    fuente_emoji = _cargar_fuente_emoji()
+    if fuente_emoji is not None:
+        fuente, tamano_nativo = fuente_emoji
+        caja = fuente.getbbox(emoji, embedded_color=True)
+        glifo = Image.new("RGBA", (max(1, caja[2] - caja[0]), max(1, caja[3] - caja[1])), (0, 0, 0, 0))
+        ImageDraw.Draw(glifo).text((-caja[0], -caja[1]), emoji, font=fuente, embedded_color=True)
+        escala = tamano / tamano_nativo
+        return glifo.resize((max(1, round(glifo.width * escala)), max(1, round(glifo.height * escala))), Image.LANCZOS)
+
+    mascara, _ = rasterizar_texto(emoji, FUENTES_TEXTO, tamano)
+    glifo = Image.new("RGBA", mascara.size, (0, 0, 0, 0))
+    glifo.putalpha(mascara)
+    return glifo
+
+# Tamaño del glifo de emoji en el río (32 pt a 150 dpi)
+TAMANO_EMOJI_RIO = round(32 * 150 / 72)
+
+def precargar_recursos():
+    """
+    Abre las fuentes y rasteriza los glifos de todos los emojis conocidos.
+    La ejecutan los trabajadores del pool al arrancar.
+    """
+    for emoji in EMOJI_COLORES:
+        if emoji != 'default':
+            renderizar_glifo_emoji(emoji, TAMANO_EMOJI_RIO)
+    for i in range(1, 21):
+        rasterizar_texto(str(i), FUENTES_NEGRITA, round(12 * 150 / 72), 'mt')
+    rasterizar_texto('El Río de tu Pensamiento', FUENTES_NEGRITA, round(24 * 150 / 72), 'mt')
+    rasterizar_texto('Trazo del Pensamiento', FUENTES_TRAZO, 24, 'mm')
+    cargar_fuente(FUENTES_TRAZO, 12)
+    _cargar_fuente_italica(round(14 * 150 / 72))
+
+def a_pixeles(x, y):
+    """Convierte coordenadas de datos (0..10) del río a píxeles del lienzo"""
+    return RIO_MARGEN_X + np.asarray(x) * RIO_ESCALA_X, RIO_MARGEN_Y + (10 - np.asarray(y)) * RIO_ESCALA_Y
+
+def capa_emojis_rio(emojis: list, x_positions: np.ndarray, y_positions: np.ndarray) -> Image.Image:
+    """
+    Capa transparente del tamaño del lienzo del río con los emojis y, debajo
+    de cada uno, su número de secuencia
+
+    Args:
+        emojis: Lista de emojis
+        x_positions: Posiciones x (datos 0..10) de los emojis
+        y_positions: Posiciones y (datos 0..10) de los emojis
+
+    Returns:
+        Image: Imagen RGBA de RIO_ANCHO x RIO_ALTO
+    """
+    capa = Image.new("RGBA", (RIO_ANCHO, RIO_ALTO), (0, 0, 0, 0))
+    cx, cy = a_pixeles(x_positions, y_positions)
+    lx, ly = a_pixeles(x_positions, y_positions - 0.7)
+    for i, emoji in enumerate(emojis):
+        mascara, (dx, dy) = rasterizar_texto(f'{i+1}', FUENTES_NEGRITA, round(12 * PUNTOS_A_PIXELES), 'mt')
+        etiqueta = Image.new("RGBA", mascara.size, (0x55, 0x55, 0x55, 0))
+        etiqueta.putalpha(mascara)
+        capa.alpha_composite(etiqueta, (max(0, int(round(lx[i] + dx))), max(0, int(round(ly[i] + dy)))))
+
+        glifo = renderizar_glifo_emoji(emoji, TAMANO_EMOJI_RIO)
+        capa.alpha_composite(glifo, (max(0, int(round(cx[i] - glifo.width / 2))),
+                                     max(0, int(round(cy[i] - glifo.height / 2)))))
+    return capa
+
+def _pintar_forma(imagen: Image.Image, color: tuple, alfa: float, caja: tuple, dibujar):
+    """
+    Pinta una forma semitransparente con bordes suavizados: la forma se dibuja
+    opaca en una máscara local supermuestreada y se mezcla una sola vez con
+    la imagen (las partes que se solapan dentro de la forma no se oscurecen).
+
+    Args:
+        imagen: Imagen RGB de destino
+        color: Color RGB
+        alfa: Opacidad (0..1)
+        caja: (x0, y0, x1, y1) en píxeles que contiene la forma
+        dibujar: Función que recibe (draw, desplazar) y dibuja la forma en la máscara
+    """
+    x0, y0 = int(np.floor(caja[0])) - 1, int(np.floor(caja[1])) - 1
+    x1, y1 = int(np.ceil(caja[2])) + 1, int(np.ceil(caja[3])) + 1
+    s = _SUPERMUESTREO
+    mascara = Image.new("L", ((x1 - x0) * s, (y1 - y0) * s), 0)
+
+    def desplazar(px, py):
+        return (px - x0) * s, (py - y0) * s
+
+    dibujar(ImageDraw.Draw(mascara), desplazar)
+    mascara = mascara.reduce(s).point(lambda v: int(v * alfa))
+    imagen.paste(color, (x0, y0, x1, y1), mascara)
+
+def _pintar_tramos(imagen: Image.Image, tramos: list, grosor: float):
+    """
+    Pinta los tramos del río (trazos rectos con extremos redondeados) sobre
+    una copia en coma flotante de la franja que ocupan y la pega en la imagen
+    una sola vez. La cobertura de todos los tramos se calcula de una vez con
+    NumPy a partir de la distancia de cada píxel al tramo (el borde queda
+    suavizado sin supermuestreo); luego se mezclan en orden, así que donde se
+    solapan las opacidades se acumulan igual que pintándolos uno a uno.
+
+    Args:
+        imagen: Imagen RGB de destino
+        tramos: Lista de (punto inicial, punto final, color RGB, opacidad 0..1), en píxeles
+        grosor: Grosor del trazo en píxeles
+    """
+    radio = grosor / 2
+    inicios = np.array([a for a, _, _, _ in tramos], dtype=np.float32)
+    finales = np.array([b for _, b, _, _ in tramos], dtype=np.float32)
+    colores = np.array([rgb for _, _, rgb, _ in tramos], dtype=np.float32)
+    alfas = np.array([alfa for _, _, _, alfa in tramos], dtype=np.float32)
+
+    # Recuadro de cada tramo (todos del mismo tamaño) y franja que los contiene;
+    # lo que quede fuera de la imagen se recorta al pegar
+    esquinas = np.floor(np.minimum(inicios, finales) - radio).astype(int) - 1
+    ancho, alto = (np.ceil(np.maximum(inicios, finales) + radio).astype(int) + 2 - esquinas).max(axis=0)
+    x0, y0 = esquinas.min(axis=0)
+    x1, y1 = esquinas.max(axis=0) + (ancho, alto)
+
+    # Distancia de cada píxel (centro) a su tramo: proyección acotada a los extremos
+    px = (esquinas[:, 0, None, None] + np.arange(ancho) + 0.5 - inicios[:, 0, None, None]).astype(np.float32)
+    py = (esquinas[:, 1, None, None] + np.arange(alto)[:, None] + 0.5 - inicios[:, 1, None, None]).astype(np.float32)
+    dx, dy = (finales - inicios).T[:, :, None, None]
+    largo2 = dx * dx + dy * dy
+    t = np.clip((px * dx + py * dy) / np.where(largo2 > 0, largo2, 1), 0, 1)
+    distancia = np.hypot(px - t * dx, py - t * dy)
+    coberturas = np.clip(radio - distancia + 0.5, 0, 1)[..., None] * alfas[:, None, None, None]
+
+    franja = np.asarray(imagen.crop((x0, y0, x1, y1)), dtype=np.float32)
+    for (cx, cy), color, cobertura in zip(esquinas - (x0, y0), colores, coberturas):
+        zona = franja[cy:cy + alto, cx:cx + ancho]
+        zona += (color - zona) * cobertura
+
+    imagen.paste(Image.fromarray(np.rint(franja).astype(np.uint8)), (int(x0), int(y0)))
+
+def _generar_rio_pillow(emojis: list) -> bytes:
+    """
+    Renderizador del río emocional con NumPy y Pillow (sin matplotlib)
+
+    Args:
+        emojis: Lista de emojis a visualizar
+
+    Returns:
+        bytes: Imagen PNG del río emocional
+    """
+    imagen = Image.new("RGB", (RIO_ANCHO, RIO_ALTO), "#F5F5F5")
+    pt = PUNTOS_A_PIXELES
+
+    # Líneas de horizonte sutiles (discontinuas), arriba y abajo del área de datos
+    pixeles = np.array(imagen)
+    patron = (np.arange(RIO_ANCHO) % round(5.3 * pt)) < round(3.7 * pt)
+    gris = (np.array([0xE0] * 3) * 0.5 + np.array([0xF5] * 3) * 0.5).astype(np.uint8)
+    for y in a_pixeles(0, np.array([10, 0]))[1]:
+        fila = int(round(y))
+        pixeles[fila, patron & (np.arange(RIO_ANCHO) >= RIO_MARGEN_X) & (np.arange(RIO_ANCHO) <= RIO_ANCHO - RIO_MARGEN_X)] = gris
+    imagen = Image.fromarray(pixeles)
+
+    # Título poético
+    pegar_texto(imagen, a_pixeles(5, 9.5), 'El Río de tu Pensamiento', FUENTES_NEGRITA,
+                round(24 * pt), '#2C3E50', anchor='mt')
+
+    # Geometría del río (misma onda y tramos que la versión con matplotlib)
+    num_emojis = len(emojis)
+    x_positions = np.linspace(1, 9, num_emojis)
+    y_positions = 5 + 0.3 * np.sin(2 * np.pi * x_positions / 2)
+    x_river = np.linspace(0, 10, 200)
+    colores = [obtener_color_emoji_rgb(emoji) for emoji in emojis]
+
+    tramos = []
+    for i in range(num_emojis - 1):
+        mask = (x_river >= x_positions[i]) & (x_river <= x_positions[i + 1])
+        x_segment = x_river[mask]
+        if len(x_segment) < 2:
+            continue
+        px, py = a_pixeles(x_segment, 5 + 0.3 * np.sin(2 * np.pi * x_segment / 2))
+        alfas = 0.6 + 0.4 * (np.arange(len(x_segment) - 1) / len(x_segment))
+        tramos.extend(((px[j], py[j]), (px[j + 1], py[j + 1]), colores[i], alfas[j])
+                      for j in range(len(x_segment) - 1))
+    if tramos:
+        _pintar_tramos(imagen, tramos, 15 * pt)
+
+    # Círculos (elipses en píxeles, como en el área de datos no cuadrada) y emojis
+    cx, cy = a_pixeles(x_positions, y_positions)
+    rx, ry = 0.4 * RIO_ESCALA_X, 0.4 * RIO_ESCALA_Y
+    for i, emoji in enumerate(emojis):
+        caja = (cx[i] - rx, cy[i] - ry, cx[i] + rx, cy[i] + ry)
+
+        def circulo(d, desplazar, caja=caja):
+            d.ellipse([*desplazar(caja[0], caja[1]), *desplazar(caja[2], caja[3])], fill=255)
+
+        _pintar_forma(imagen, colores[i], 0.7, caja, circulo)
+
+        # Pequeña etiqueta con número de secuencia
+        pegar_texto(imagen, a_pixeles(x_positions[i], y_positions[i] - 0.7), f'{i+1}',
+                    FUENTES_NEGRITA, round(12 * pt), '#555555', anchor='mt')
+
+    for i, emoji in enumerate(emojis):
+        glifo = renderizar_glifo_emoji(emoji, TAMANO_EMOJI_RIO)
+        imagen.paste(glifo, (int(round(cx[i] - glifo.width / 2)), int(round(cy[i] - glifo.height / 2))), glifo)
+
+    # Texto poético al final
+    num_total = len(emojis)
+    texto_poetico = f'Un camino de {num_total} {"paso" if num_total == 1 else "pasos"} emocionales'
+    dibujar_texto_italico(imagen, a_pixeles(5, 1.5), texto_poetico, round(14 * pt), (0x55, 0x55, 0x55))
+
+    buf = io.BytesIO()
+    imagen.save(buf, format='PNG')
+    return buf.getvalue()
+
+def generar_rio_emocional(emojis_texto: str, motor: str = None) -> bytes:
     """
     Genera una visualización artística del río emocional
 
     Args:
         emojis_texto: String con los emojis separados por espacios
+        motor: "pillow" (por defecto) o "matplotlib"
 
     Returns:
         bytes: Imagen PNG del río emocional
@@ -61,8 +418,35 @@ def generar_rio_emocional(emojis_texto: str) -> bytes:
     if not emojis:
         emojis = ['❓']
 
-    # Configurar la figura
-    fig, ax = plt.subplots(figsize=(12, 8), facecolor='#F5F5F5')
+    motor = motor or MOTOR_RIO
+    if motor == "matplotlib":
+        return _generar_rio_matplotlib(emojis)
+    if motor != "pillow":
+        raise ValueError(f"Motor de renderizado '{motor}' no soportado. Usa 'pillow' o 'matplotlib'.")
+    return _generar_rio_pillow(emojis)
+
+def _generar_rio_matplotlib(emojis: list) -> bytes:
+    """
+    Renderizador alternativo del río emocional con matplotlib (opcional)
+
+    Args:
+        emojis: Lista de emojis a visualizar
+
+    Returns:
+        bytes: Imagen PNG del río emocional
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection, PatchCollection
+    from matplotlib.colors import to_rgba_array
+
+    # Configurar la figura con la geometría del lienzo del río (la misma del
+    # renderizador Pillow): el área de datos queda en su sitio sin
+    # tight_layout ni bbox_inches='tight', y la figura se dibuja una sola vez
+    fig = plt.figure(figsize=(RIO_ANCHO / 150, RIO_ALTO / 150), dpi=150, facecolor='#F5F5F5')
+    ax = fig.add_axes([RIO_MARGEN_X / RIO_ANCHO, RIO_MARGEN_Y / RIO_ALTO,
+                       1 - 2 * RIO_MARGEN_X / RIO_ANCHO, 1 - 2 * RIO_MARGEN_Y / RIO_ALTO])
     ax.set_xlim(0, 10)
     ax.set_ylim(0, 10)
     ax.axis('off')
@@ -80,49 +464,47 @@ def generar_rio_emocional(emojis_texto: str) -> bytes:
     x_river = np.linspace(0, 10, 200)
     y_base = 5
 
-    # Dibujar el río con colores que fluyen
-    for i in range(len(emojis)):
-        if i < len(emojis) - 1:
-            x_start = x_positions[i]
-            x_end = x_positions[i + 1]
-
-            # Seleccionar puntos del río en este segmento
-            mask = (x_river >= x_start) & (x_river <= x_end)
-            x_segment = x_river[mask]
-
-            # Crear ondas suaves
-            y_wave = y_base + 0.3 * np.sin(2 * np.pi * x_segment / 2)
-
-            # Color del segmento basado en el emoji
-            color = obtener_color_emoji(emojis[i])
-
-            # Dibujar el segmento del río con degradado
-            for j in range(len(x_segment) - 1):
-                alpha = 0.6 + 0.4 * (j / len(x_segment))
-                ax.plot(x_segment[j:j+2], y_wave[j:j+2],
-                       color=color, linewidth=15, alpha=alpha,
-                       solid_capstyle='round')
-
-    # Dibujar círculos con los emojis
-    for i, (emoji, x_pos) in enumerate(zip(emojis, x_positions)):
-        color = obtener_color_emoji(emoji)
-
-        # Posición en la onda
-        y_pos = y_base + 0.3 * np.sin(2 * np.pi * x_pos / 2)
-
-        # Círculo de fondo
-        circle = plt.Circle((x_pos, y_pos), 0.4,
-                           color=color, alpha=0.7, zorder=10)
-        ax.add_patch(circle)
-
-        # Emoji en el centro
-        ax.text(x_pos, y_pos, emoji,
-               fontsize=32, ha='center', va='center', zorder=11)
-
-        # Pequeña etiqueta con número de secuencia
-        ax.text(x_pos, y_pos - 0.7, f'{i+1}',
-               fontsize=12, ha='center', va='top',
-               color='#555', weight='bold')
+    # Construir todos los segmentos del río en un solo arreglo de vértices:
+    # cada tramo entre dos emojis aporta sus pares de puntos consecutivos,
+    # con el color del emoji y un alfa que crece a lo largo del tramo
+    colores_emojis = to_rgba_array([obtener_color_emoji(emoji) for emoji in emojis])
+    segmentos, colores_segmentos = [], []
+    for i in range(num_emojis - 1):
+        mask = (x_river >= x_positions[i]) & (x_river <= x_positions[i + 1])
+        x_segment = x_river[mask]
+        if len(x_segment) < 2:
+            continue
+
+        # Crear ondas suaves
+        y_wave = y_base + 0.3 * np.sin(2 * np.pi * x_segment / 2)
+        puntos = np.column_stack([x_segment, y_wave])
+        segmentos.append(np.stack([puntos[:-1], puntos[1:]], axis=1))
+
+        rgba = np.repeat(colores_emojis[i:i + 1], len(x_segment) - 1, axis=0)
+        rgba[:, 3] = 0.6 + 0.4 * (np.arange(len(x_segment) - 1) / len(x_segment))
+        colores_segmentos.append(rgba)
+
+    if segmentos:
+        rio = LineCollection(np.concatenate(segmentos), colors=np.concatenate(colores_segmentos),
+                             linewidths=15, capstyle='round')
+        ax.add_collection(rio)
+
+    # Dibujar círculos con los emojis (una sola colección para todos)
+    y_positions = y_base + 0.3 * np.sin(2 * np.pi * x_positions / 2)
+    colores_circulos = colores_emojis.copy()
+    colores_circulos[:, 3] = 0.7
+    circulos = PatchCollection([plt.Circle((x, y), 0.4) for x, y in zip(x_positions, y_positions)],
+                               facecolors=colores_circulos, edgecolors=colores_circulos, zorder=10)
+    ax.add_collection(circulos)
+
+    # Emojis y etiquetas con el número de secuencia: una sola capa RGBA del
+    # tamaño de la figura, compuesta con los glifos cacheados y pegada sin
+    # reescalar (un Text por emoji obliga a matplotlib a maquetar cada uno)
+    capa = capa_emojis_rio(emojis, x_positions, y_positions)
+    caja = capa.getbbox()
+    if caja:
+        # Solo el recuadro con contenido; figimage coloca la esquina inferior izquierda
+        fig.figimage(capa.crop(caja), xo=caja[0], yo=RIO_ALTO - caja[3], origin='upper', zorder=11)
 
     # Agregar texto poético al final
     num_total = len(emojis)
@@ -137,9 +519,7 @@ def generar_rio_emocional(emojis_texto: str) -> bytes:
 
     # Guardar en bytes
     buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight',
-                facecolor='#F5F5F5')
+    fig.savefig(buf, format='png', dpi=150, facecolor='#F5F5F5')
     plt.close(fig)
 
     buf.seek(0)
@@ -156,6 +536,8 @@ async def crear_visualizacion(emojis: str) -> str:
         str: Mensaje de confirmación
     """
     try:
+        import google.genai.types as types
+
         # Generar la visualización
         imagen_bytes = generar_rio_emocional(emojis)
 
@@ -213,20 +595,45 @@ def interpretar_texto_a_parametros(texto: str) -> dict:
         'signos_pregunta': signos_pregunta,
     }
 
-def generar_puntos_numpy(parametros: dict, img_width: int, img_height: int) -> list:
+def reflejar_en_rango(valores: np.ndarray, minimo: float, maximo: float) -> np.ndarray:
+    """
+    Pliega valores dentro de [minimo, maximo] reflejándolos en los bordes,
+    como si el trazo rebotara contra el marco del canvas.
+
+    Args:
+        valores: Arreglo de valores sin límites
+        minimo: Límite inferior
+        maximo: Límite superior
+
+    Returns:
+        np.ndarray: Valores reflejados dentro del rango
+    """
+    ancho = maximo - minimo
+    desplazado = np.mod(valores - minimo, 2 * ancho)
+    return minimo + np.where(desplazado > ancho, 2 * ancho - desplazado, desplazado)
+
+def generar_puntos_numpy(parametros: dict, img_width: int, img_height: int,
+                         rng: np.random.Generator = None) -> np.ndarray:
     """
     Genera puntos usando NumPy basándose en los parámetros interpretados,
     dividido en fases narrativas con lógica ajustada a la emoción.
 
+    Cada fase se genera como arreglos completos (sorteos aleatorios por fase,
+    sumas acumuladas y un rebote vectorizado en los bordes), sin iterar punto a punto.
+
     Args:
         parametros: Diccionario con parámetros matemáticos
         img_width (int): Ancho del canvas para límites.
         img_height (int): Alto del canvas para límites.
+        rng: Generador aleatorio; por defecto uno nuevo sembrado con parametros['semilla'].
+            Cada llamada usa su propio generador (no el estado global de NumPy), así que
+            el resultado es reproducible aunque se rendericen varios trazos a la vez.
 
     Returns:
-        list: Una lista de tuplas (x, y) con las coordenadas del trazo principal.
+        np.ndarray: Arreglo (N, 2) de int32 con las coordenadas (x, y) del trazo principal.
     """
-    np.random.seed(parametros['semilla'])
+    if rng is None:
+        rng = np.random.default_rng(parametros['semilla'])
 
     # Normalizar intensidad y calma para que estén en un rango manejable (0-1)
     max_intensidad = 10
@@ -239,11 +646,8 @@ def generar_puntos_numpy(parametros: dict, img_width: int, img_height: int) -> l
     num_puntos_total = parametros['num_puntos']
 
     # Punto de inicio completamente aleatorio en el canvas, con variación emocional
-    start_x = np.random.randint(50, img_width - 50) + int(norm_intensidad * 50 - norm_calma * 20)
-    start_y = np.random.randint(50, img_height - 50) + int(norm_calma * 50 - norm_intensidad * 20)
-    current_x, current_y = start_x, start_y
-
-    all_main_trace_points = [] # Puntos principales del trazo
+    start_x = rng.integers(50, img_width - 50) + int(norm_intensidad * 50 - norm_calma * 20)
+    start_y = rng.integers(50, img_height - 50) + int(norm_calma * 50 - norm_intensidad * 20)
 
     # --- Definición de Fases ---
 
@@ -284,51 +688,137 @@ def generar_puntos_numpy(parametros: dict, img_width: int, img_height: int) -> l
         (num_puntos_fase3, avance_x3, avance_y3, amplitud_onda3, frecuencia_onda3, ruido_aleatorio3),
     ]
 
+    desplazamientos = []
     wave_offset = 0
 
-    for i_phase, (n_puntos, av_x, av_y, amp_onda, freq_onda, ruido) in enumerate(phases_params):
-        for i in range(n_puntos):
-            random_freq_factor = (0.8 + np.random.rand() * 0.4)
-            current_freq_x = freq_onda * 0.05 * random_freq_factor
-            current_freq_y = freq_onda * 0.03 * random_freq_factor
+    for n_puntos, av_x, av_y, amp_onda, freq_onda, ruido in phases_params:
+        n_puntos = int(n_puntos)
+        indices = np.arange(n_puntos) + wave_offset
 
-            onda_x = amp_onda * np.sin((i + wave_offset) * current_freq_x)
-            onda_y = amp_onda * np.cos((i + wave_offset) * current_freq_y)
+        random_freq_factor = 0.8 + rng.random(n_puntos) * 0.4
+        onda_x = amp_onda * np.sin(indices * freq_onda * 0.05 * random_freq_factor)
+        onda_y = amp_onda * np.cos(indices * freq_onda * 0.03 * random_freq_factor)
 
-            dx = av_x + np.random.normal(0, ruido / 10) + onda_x
-            dy = av_y + np.random.normal(0, ruido / 10) + onda_y
+        dx = av_x + rng.normal(0, ruido / 10, n_puntos) + onda_x
+        dy = av_y + rng.normal(0, ruido / 10, n_puntos) + onda_y
+        desplazamientos.append(np.column_stack([dx, dy]))
 
-            current_x += dx
-            current_y += dy
+        wave_offset += n_puntos
 
-            current_x = np.clip(current_x, 20, img_width - 20)
-            current_y = np.clip(current_y, 20, img_height - 20)
+    # Recorrido acumulado desde el punto de inicio, plegado dentro del canvas
+    recorrido = np.array([start_x, start_y], dtype=np.float64) + np.cumsum(np.concatenate(desplazamientos), axis=0)
+    puntos = np.empty_like(recorrido)
+    puntos[:, 0] = reflejar_en_rango(recorrido[:, 0], 20, img_width - 20)
+    puntos[:, 1] = reflejar_en_rango(recorrido[:, 1], 20, img_height - 20)
 
-            all_main_trace_points.append((int(current_x), int(current_y)))
+    return puntos.astype(np.int32)
 
-        wave_offset += n_puntos
+# Huella de un punto de la nube "Disperso": equivale a draw.ellipse([x-2, y-2, x+2, y+2])
+RADIO_PUNTO = 2
+_HUELLA_PUNTO = [
+    (dx, dy)
+    for dy in range(-RADIO_PUNTO, RADIO_PUNTO + 1)
+    for dx in range(-RADIO_PUNTO, RADIO_PUNTO + 1)
+    if dx * dx + dy * dy <= RADIO_PUNTO * RADIO_PUNTO + 1
+]
 
-    return all_main_trace_points
+def mascara_puntos(centros: np.ndarray, width: int, height: int) -> np.ndarray:
+    """
+    Píxeles cubiertos por los puntos de la nube "Disperso": marca los centros
+    en una máscara y la dilata con la huella del punto.
 
-def generar_imagen_texto(texto: str) -> Image.Image:
+    Args:
+        centros: Arreglo (N, 2) con las coordenadas (x, y) de los puntos
+        width: Ancho del lienzo
+        height: Alto del lienzo
+
+    Returns:
+        np.ndarray: Máscara booleana (alto, ancho)
     """
-    Genera una imagen interpretativa del texto usando Pillow,
-    con el trazo dividido en fases narrativas y grosor dinámico,
-    y múltiples estilos de trazo.
+    r = RADIO_PUNTO
+    xs, ys = centros[:, 0] + r, centros[:, 1] + r
+    dentro = (xs >= 0) & (xs < width + 2 * r) & (ys >= 0) & (ys < height + 2 * r)
+
+    centros_mask = np.zeros((height + 2 * r, width + 2 * r), dtype=bool)
+    centros_mask[ys[dentro], xs[dentro]] = True
+
+    mascara = np.zeros((height, width), dtype=bool)
+    for dx, dy in _HUELLA_PUNTO:
+        mascara |= centros_mask[r - dy:r - dy + height, r - dx:r - dx + width]
+    return mascara
+
+def estampar_puntos(imagen: Image.Image, centros: np.ndarray, color=(0, 0, 0)) -> Image.Image:
+    """
+    Dibuja de una sola vez muchos puntos pequeños sobre la imagen:
+    pinta todos los píxeles de mascara_puntos en una única operación.
+
+    Args:
+        imagen: Imagen RGB de destino
+        centros: Arreglo (N, 2) con las coordenadas (x, y) de los puntos
+        color: Color RGB de los puntos
+
+    Returns:
+        Image: Nueva imagen con los puntos dibujados
+    """
+    pixeles = np.array(imagen)
+    pixeles[mascara_puntos(centros, *imagen.size)] = color
+    return Image.fromarray(pixeles)
+
+def tramos_por_ancho(anchos: np.ndarray) -> list:
+    """
+    Agrupa segmentos consecutivos que comparten el mismo grosor.
+
+    Args:
+        anchos: Grosor de cada segmento (el segmento i une los puntos i e i+1)
+
+    Returns:
+        list: Tuplas (inicio, fin, ancho) con los índices de puntos de cada tramo
+    """
+    if len(anchos) == 0:
+        return []
+    cortes = np.flatnonzero(np.diff(anchos)) + 1
+    inicios = np.concatenate([[0], cortes])
+    fines = np.concatenate([cortes, [len(anchos)]])
+    return [(int(i), int(f), int(anchos[i])) for i, f in zip(inicios, fines)]
+
+def dibujar_polilinea(draw: ImageDraw.ImageDraw, puntos: np.ndarray, anchos, fill="black"):
+    """
+    Dibuja el trazo con una llamada a draw.line por cada tramo de grosor constante,
+    en lugar de una llamada por segmento. Sin uniones redondeadas, igual que
+    el dibujo segmento a segmento.
+
+    Args:
+        draw: Contexto de dibujo de Pillow
+        puntos: Arreglo (N, 2) con los puntos del trazo
+        anchos: Grosor por segmento (arreglo de N-1 valores) o un grosor único
+        fill: Color del trazo
+    """
+    anchos = np.broadcast_to(np.asarray(anchos, dtype=np.int64), (len(puntos) - 1,))
+    for inicio, fin, ancho in tramos_por_ancho(np.maximum(1, anchos)):
+        draw.line(puntos[inicio:fin + 1].ravel().tolist(), fill=fill, width=ancho)
+
+# Tamaño del lienzo del trazo del pensamiento
+TRAZO_ANCHO, TRAZO_ALTO = 1000, 700
+
+def calcular_trazo(texto: str) -> dict:
+    """
+    Calcula la geometría del trazo del pensamiento (sin dibujarlo): los puntos
+    del recorrido, el estilo elegido según la emoción y los datos propios del
+    estilo. La comparten el renderizador PNG y el SVG.
 
     Args:
         texto: El texto a visualizar
 
     Returns:
-        Image: Imagen PIL generada
+        dict: 'ancho', 'alto', 'puntos' (N, 2) y 'estilo' (None si no hay
+        suficientes puntos), más según el estilo: 'centros' y su desviación
+        'dispersion' (Disperso),
+        'color' RGBA (Solitario), 'anchos' por segmento (Sólido y Básico) o
+        'fragmentos' como pares (inicio, fin) de índices (Fragmentado)
     """
     # Interpretar el texto
     parametros = interpretar_texto_a_parametros(texto)
-
-    # Crear canvas
-    width, height = 1000, 700
-    imagen = Image.new('RGB', (width, height), color='#F5F5F5')
-    draw = ImageDraw.Draw(imagen)
+    width, height = TRAZO_ANCHO, TRAZO_ALTO
 
     # Normalizar intensidad y calma para el grosor y estilo del trazo
     max_intensidad = 10
@@ -336,56 +826,35 @@ def generar_imagen_texto(texto: str) -> Image.Image:
     norm_intensidad = np.clip(parametros['intensidad'] / max_intensidad, 0, 1)
     norm_calma = np.clip(parametros['calma'] / max_calma, 0, 1)
 
+    # Generador aleatorio propio de esta imagen (sembrado con el texto)
+    rng = np.random.default_rng(parametros['semilla'])
+
     # Generar puntos del trazo principal
-    main_trace_points = generar_puntos_numpy(parametros, width, height)
+    puntos_trazo = generar_puntos_numpy(parametros, width, height, rng)
+    num_puntos = len(puntos_trazo)
+    trazo = {'ancho': width, 'alto': height, 'puntos': puntos_trazo, 'estilo': None}
 
-    # --- Título ---
-    titulo = "Trazo del Pensamiento"
-    try:
-        from PIL import ImageFont
-        font_path = "arial.ttf"
-        try:
-            font = ImageFont.truetype(font_path, 24)
-            font_small = ImageFont.truetype(font_path, 12)
-        except IOError:
-            font = ImageFont.load_default()
-            font_small = ImageFont.load_default()
-    except ImportError:
-        font = ImageFont.load_default()
-        font_small = ImageFont.load_default()
-
-    draw.text((width // 2, 30), titulo, fill="#000000", anchor='mm', font=font)
-
-    # --- Selección de Estilo de Trazo y Dibujo ---
-    if not main_trace_points or len(main_trace_points) < 2:
+    if num_puntos < 2:
         print("No hay suficientes puntos para dibujar el trazo.")
-        draw.text((width // 2, height // 2), "No se pudo generar el trazo", fill="#FF0000", anchor='mm', font=font)
-        return imagen
+        return trazo
+
+    # Índice de cada segmento (el segmento i une los puntos i e i+1)
+    indices = np.arange(num_puntos - 1)
 
     # Lógica de selección de estilo de trazo
     if norm_intensidad > 0.8 and norm_calma < 0.2:
         # Estilo "Disperso" / "Nube de Puntos"
         print("Estilo de trazo: Disperso")
-        for x, y in main_trace_points:
-            num_dots = np.random.randint(5, 15)
-            for _ in range(num_dots):
-                dx = np.random.normal(0, 10 + norm_intensidad * 20)
-                dy = np.random.normal(0, 10 + norm_intensidad * 20)
-                dot_x, dot_y = int(x + dx), int(y + dy)
-                draw.ellipse([dot_x-2, dot_y-2, dot_x+2, dot_y+2], fill="black", outline="black")
+        num_dots = rng.integers(5, 15, size=num_puntos)
+        dispersion = 10 + norm_intensidad * 20
+        centros = np.repeat(puntos_trazo, num_dots, axis=0).astype(np.float64)
+        centros += rng.normal(0, dispersion, size=centros.shape)
+        trazo.update(estilo='disperso', centros=np.trunc(centros).astype(np.int64), dispersion=dispersion)
 
     elif norm_calma > 0.7 and norm_intensidad < 0.3:
         # Estilo "Solitario" / "Fino"
         print("Estilo de trazo: Solitario")
-        base_width = 1
-        color = (0, 0, 0, int(255 * (0.3 + norm_calma * 0.7)))
-
-        temp_img = Image.new('RGBA', (width, height), (0,0,0,0))
-        temp_draw = ImageDraw.Draw(temp_img)
-        for i in range(len(main_trace_points) - 1):
-            temp_draw.line([main_trace_points[i], main_trace_points[i + 1]], fill=color, width=base_width, joint="curve")
-        imagen = Image.alpha_composite(imagen.convert('RGBA'), temp_img).convert('RGB')
-        draw = ImageDraw.Draw(imagen)
+        trazo.update(estilo='solitario', color=(0, 0, 0, int(255 * (0.3 + norm_calma * 0.7))))
 
     elif norm_intensidad > 0.5 and norm_calma > 0.4:
         # Estilo "Sólido" / "Marcado"
@@ -393,12 +862,12 @@ def generar_imagen_texto(texto: str) -> Image.Image:
         dynamic_width = int(5 + norm_intensidad * 8 - norm_calma * 2)
         dynamic_width = max(2, dynamic_width)
 
-        for i in range(len(main_trace_points) - 1):
-            current_width = dynamic_width
-            if i > len(main_trace_points) * 0.8 and norm_calma < 0.5:
-                reduction_factor = (1 - (i - len(main_trace_points) * 0.8) / (len(main_trace_points) * 0.2))
-                current_width = int(current_width * reduction_factor)
-            draw.line([main_trace_points[i], main_trace_points[i + 1]], fill="black", width=max(1, current_width), joint="curve")
+        anchos = np.full(num_puntos - 1, dynamic_width)
+        if norm_calma < 0.5:
+            final = indices > num_puntos * 0.8
+            reduction_factor = 1 - (indices[final] - num_puntos * 0.8) / (num_puntos * 0.2)
+            anchos[final] = (dynamic_width * reduction_factor).astype(np.int64)
+        trazo.update(estilo='solido', anchos=anchos)
 
     elif norm_intensidad > 0.3 and norm_calma < 0.5 and parametros['signos_pregunta'] > 0:
         # Estilo "Fragmentado" / "Interrumpido"
@@ -406,16 +875,21 @@ def generar_imagen_texto(texto: str) -> Image.Image:
         segment_length_base = 15 + norm_intensidad * 10
         gap_length_base = 5 + (1 - norm_calma) * 10
 
-        i = 0
-        while i < len(main_trace_points) - 1:
-            segment_length = int(segment_length_base * (0.8 + np.random.rand() * 0.4))
-            gap_length = int(gap_length_base * (0.8 + np.random.rand() * 0.4))
-
-            end_segment = min(i + segment_length, len(main_trace_points) -1)
-            if i < end_segment:
-                draw.line(main_trace_points[i:end_segment+1], fill="black", width=2, joint="curve")
-
-            i = end_segment + gap_length
+        # Cada fragmento avanza al menos int(segment_length_base * 0.8) puntos
+        max_fragmentos = num_puntos // max(1, int(segment_length_base * 0.8)) + 1
+        factores = 0.8 + rng.random((max_fragmentos, 2)) * 0.4
+        segment_lengths = (segment_length_base * factores[:, 0]).astype(np.int64)
+        gap_lengths = (gap_length_base * factores[:, 1]).astype(np.int64)
+
+        inicios = np.concatenate([[0], np.cumsum(segment_lengths + gap_lengths)[:-1]])
+        fines = np.minimum(inicios + segment_lengths, num_puntos - 1)
+        fragmentos = []
+        for inicio, fin in zip(inicios.tolist(), fines.tolist()):
+            if inicio >= num_puntos - 1:
+                break
+            if inicio < fin:
+                fragmentos.append((inicio, fin))
+        trazo.update(estilo='fragmentado', fragmentos=fragmentos)
 
     else:
         # Estilo "Básico Orgánico"
@@ -423,23 +897,155 @@ def generar_imagen_texto(texto: str) -> Image.Image:
         base_width = 2
         dynamic_width_factor = 1 + norm_intensidad * 3 - norm_calma * 1.5
 
-        for i in range(len(main_trace_points) - 1):
-            current_width = int(base_width * dynamic_width_factor)
-            if i > len(main_trace_points) * 0.7:
-                 reduction_factor = (1 - (i - len(main_trace_points) * 0.7) / (len(main_trace_points) * 0.3))
-                 current_width = int(current_width * reduction_factor * (1 + (1 - norm_calma) * 2))
+        anchos = np.full(num_puntos - 1, int(base_width * dynamic_width_factor))
+        final = indices > num_puntos * 0.7
+        reduction_factor = 1 - (indices[final] - num_puntos * 0.7) / (num_puntos * 0.3)
+        anchos[final] = (anchos[final] * reduction_factor * (1 + (1 - norm_calma) * 2)).astype(np.int64)
+        trazo.update(estilo='basico', anchos=anchos)
+
+    return trazo
+
+def generar_imagen_texto(texto: str) -> Image.Image:
+    """
+    Genera una imagen interpretativa del texto usando Pillow,
+    con el trazo dividido en fases narrativas y grosor dinámico,
+    y múltiples estilos de trazo.
+
+    El resultado depende solo del texto (la fecha de creación va en los
+    metadatos del PNG, ver guardar_imagen_texto), así que puede cachearse.
+
+    Args:
+        texto: El texto a visualizar
+
+    Returns:
+        Image: Imagen PIL generada
+    """
+    trazo = calcular_trazo(texto)
+    width, height = trazo['ancho'], trazo['alto']
+    puntos_trazo = trazo['puntos']
+    estilo = trazo['estilo']
 
-            draw.line([main_trace_points[i], main_trace_points[i + 1]], fill="black", width=max(1, current_width), joint="curve")
+    # Crear canvas
+    imagen = Image.new('RGB', (width, height), color='#F5F5F5')
+    draw = ImageDraw.Draw(imagen)
 
-    # Fecha y hora de creación en la parte inferior
-    fecha_hora = datetime.now().strftime("%d/%m/%Y - %H:%M:%S")
-    draw.text((width // 2, height - 20), fecha_hora, fill='#555', anchor='mm', font=font_small)
+    # --- Título ---
+    titulo = "Trazo del Pensamiento"
+    pegar_texto(imagen, (width // 2, 30), titulo, FUENTES_TRAZO, 24, (0, 0, 0), anchor='mm')
+
+    if estilo is None:
+        draw.text((width // 2, height // 2), "No se pudo generar el trazo", fill="#FF0000",
+                  anchor='mm', font=cargar_fuente(FUENTES_TRAZO, 24))
+    elif estilo == 'disperso':
+        imagen = estampar_puntos(imagen, trazo['centros'])
+    elif estilo == 'solitario':
+        temp_img = Image.new('RGBA', (width, height), (0,0,0,0))
+        dibujar_polilinea(ImageDraw.Draw(temp_img), puntos_trazo, 1, fill=trazo['color'])
+        imagen = Image.alpha_composite(imagen.convert('RGBA'), temp_img).convert('RGB')
+    elif estilo == 'fragmentado':
+        for inicio, fin in trazo['fragmentos']:
+            draw.line(puntos_trazo[inicio:fin + 1].ravel().tolist(), fill="black", width=2, joint="curve")
+    else:
+        dibujar_polilinea(draw, puntos_trazo, trazo['anchos'])
 
     return imagen
 
+# --- Caché de trazos ---
+# El trazo depende solo del texto (la semilla sale de él) y del código que lo
+# dibuja: si cambia el dibujo, hay que subir VERSION_RENDERIZADOR para no
+# servir imágenes viejas.
+VERSION_RENDERIZADOR = "2"
+CARPETA_IMAGENES = FilePath(__file__).parent.parent.parent / "imagenes_generadas"
+_MAX_TRAZOS_EN_MEMORIA = 256
+# Límites de los trazos guardados en disco: al pasar cualquiera de los dos se
+# borran los menos usados (el mtime se actualiza con cada acierto)
+MAX_TRAZOS_EN_DISCO = int(os.getenv("TRAZOS_MAX_ARCHIVOS", 500))
+MAX_BYTES_TRAZOS_EN_DISCO = int(float(os.getenv("TRAZOS_MAX_MB", 200)) * 1024 * 1024)
+_trazos_en_memoria: "OrderedDict[str, str]" = OrderedDict()
+
+def clave_trazo(texto: str) -> str:
+    """Retorna la clave de caché de un texto: hash del texto y de la versión del renderizador"""
+    return hashlib.sha256(f"{VERSION_RENDERIZADOR}\0{texto}".encode("utf-8")).hexdigest()[:32]
+
+def _ruta_trazo(clave: str) -> FilePath:
+    return CARPETA_IMAGENES / f"trazo_{clave}.png"
+
+def buscar_trazo_en_cache(texto: str) -> Optional[str]:
+    """
+    Busca un trazo ya renderizado para el texto, primero en memoria y luego en disco
+
+    Args:
+        texto: El texto a visualizar
+
+    Returns:
+        str: Ruta de la imagen, o None si aún no se ha renderizado
+    """
+    clave = clave_trazo(texto)
+    ruta = _trazos_en_memoria.get(clave)
+    if ruta is not None and _marcar_uso(ruta):
+        _trazos_en_memoria.move_to_end(clave)
+        return ruta
+
+    ruta_disco = _ruta_trazo(clave)
+    if _marcar_uso(ruta_disco):
+        recordar_trazo(texto, str(ruta_disco))
+        return str(ruta_disco)
+
+    _trazos_en_memoria.pop(clave, None)
+    return None
+
+def _marcar_uso(ruta) -> bool:
+    """Actualiza el mtime de un trazo en disco (orden LRU de la poda); retorna False si ya no existe"""
+    try:
+        os.utime(ruta)
+        return True
+    except OSError:
+        return False
+
+def podar_cache_trazos(conservar: Optional[FilePath] = None):
+    """
+    Borra los trazos en disco menos usados hasta quedar dentro de
+    MAX_TRAZOS_EN_DISCO y MAX_BYTES_TRAZOS_EN_DISCO
+
+    Args:
+        conservar: Trazo que no se borra aunque sea el más antiguo (el recién guardado)
+    """
+    trazos = []
+    for ruta in CARPETA_IMAGENES.glob("trazo_*.png"):
+        try:
+            estado = ruta.stat()
+        except FileNotFoundError:
+            continue  # otro proceso lo acaba de borrar
+        trazos.append((estado.st_mtime, estado.st_size, ruta))
+
+    total = sum(tamano for _, tamano, _ in trazos)
+    restantes = len(trazos)
+    for _, tamano, ruta in sorted(trazos, key=lambda trazo: trazo[0]):
+        if restantes <= MAX_TRAZOS_EN_DISCO and total <= MAX_BYTES_TRAZOS_EN_DISCO:
+            break
+        if ruta == conservar:
+            continue
+        try:
+            ruta.unlink()
+        except FileNotFoundError:
+            pass
+        restantes -= 1
+        total -= tamano
+
+def recordar_trazo(texto: str, ruta: str):
+    """Guarda en la caché en memoria la ruta del trazo renderizado para el texto"""
+    _trazos_en_memoria[clave_trazo(texto)] = ruta
+    _trazos_en_memoria.move_to_end(clave_trazo(texto))
+    while len(_trazos_en_memoria) > _MAX_TRAZOS_EN_MEMORIA:
+        _trazos_en_memoria.popitem(last=False)
+
 def guardar_imagen_texto(texto: str) -> str:
     """
-    Genera y guarda una imagen interpretativa del texto
+    Genera y guarda una imagen interpretativa del texto. Si el mismo texto ya se
+    renderizó con esta versión del renderizador, reutiliza la imagen guardada.
+
+    La fecha de creación se guarda en los metadatos del PNG ("Creation Time"),
+    no en los píxeles.
 
     Args:
         texto: El texto a visualizar
@@ -447,21 +1053,24 @@ def guardar_imagen_texto(texto: str) -> str:
     Returns:
         str: Ruta donde se guardó la imagen
     """
+    ruta_cacheada = buscar_trazo_en_cache(texto)
+    if ruta_cacheada is not None:
+        return ruta_cacheada
+
     # Generar la imagen
     imagen = generar_imagen_texto(texto)
 
-    # Crear nombre de archivo único
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    nombre_archivo = f"trazo_{timestamp}.png"
-
-    # Determinar ruta de guardado
-    proyecto_root = FilePath(__file__).parent.parent.parent
-    carpeta_imagenes = proyecto_root / "imagenes_generadas"
-    carpeta_imagenes.mkdir(exist_ok=True)
-
-    ruta_completa = carpeta_imagenes / nombre_archivo
+    metadatos = PngInfo()
+    metadatos.add_text("Creation Time", datetime.now().strftime("%Y-%m-%dT%H:%M:%S"))
+    metadatos.add_text("Software", f"diario_intuitivo/{VERSION_RENDERIZADOR}")
 
-    # Guardar imagen
-    imagen.save(ruta_completa, 'PNG')
+    # Guardar en un archivo temporal y renombrar: otro proceso nunca ve un PNG a medias
+    CARPETA_IMAGENES.mkdir(exist_ok=True)
+    ruta_completa = _ruta_trazo(clave_trazo(texto))
+    ruta_temporal = ruta_completa.with_name(f"{ruta_completa.stem}.{os.getpid()}.tmp")
+    imagen.save(ruta_temporal, 'PNG', pnginfo=metadatos)
+    os.replace(ruta_temporal, ruta_completa)
+    podar_cache_trazos(conservar=ruta_completa)
 
+    recordar_trazo(texto, str(ruta_completa))
     return str(ruta_completa)
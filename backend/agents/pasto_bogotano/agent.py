@@ -1,8 +1,10 @@
 import os
 from datetime import datetime
+from functools import lru_cache
 from random import randint, choice
 from pydub import AudioSegment
 from google.adk.agents.llm_agent import Agent
+from ..comun.ejecutor import registrar_herramienta, ejecutar_herramienta
 
 # --- Configuración de carpetas --- #
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -20,12 +22,28 @@ ARCHIVOS_SONIDOS = {
 
 # --- Funciones de audio --- #
 
-def cargar_sonido(nombre_archivo: str, volumen_db: int = 0) -> AudioSegment:
+@lru_cache(maxsize=None)
+def _decodificar_sonido(nombre_archivo: str) -> AudioSegment:
     """
-    Carga un audio desde la carpeta SOUNDS_DIR y ajusta su volumen.
+    Decodifica un audio de SOUNDS_DIR una sola vez por proceso (banco de sonidos).
     """
     path = os.path.join(SOUNDS_DIR, nombre_archivo)
-    audio = AudioSegment.from_file(path)
+    return AudioSegment.from_file(path)
+
+def precargar_banco_sonidos():
+    """
+    Decodifica todos los sonidos disponibles. La ejecutan los trabajadores
+    del pool al arrancar para que la primera mezcla no pague la decodificación.
+    """
+    for nombre_archivo in ARCHIVOS_SONIDOS.values():
+        if os.path.exists(os.path.join(SOUNDS_DIR, nombre_archivo)):
+            _decodificar_sonido(nombre_archivo)
+
+def cargar_sonido(nombre_archivo: str, volumen_db: int = 0) -> AudioSegment:
+    """
+    Carga un audio desde el banco de sonidos y ajusta su volumen.
+    """
+    audio = _decodificar_sonido(nombre_archivo)
     return audio + volumen_db
 
 def cambiar_velocidad(audio: AudioSegment, factor: float) -> AudioSegment:
@@ -59,7 +77,7 @@ def aplicar_efectos_artistico(audio: AudioSegment) -> AudioSegment:
 
     return audio
 
-def generar_paisaje_sonoro(
+def mezclar_paisaje_sonoro(
     pajaros_vol: int = 0,
     insectos_vol: int = 0,
     viento_vol: int = 0,
@@ -68,25 +86,13 @@ def generar_paisaje_sonoro(
     efectos: bool = True
 ) -> str:
     """
-    Genera un paisaje sonoro artístico mezclando los audios locales.
+    Mezcla los audios locales y exporta el paisaje sonoro en MP3.
 
-    Parámetros:
-    - pajaros_vol: volumen de los pájaros (dB)
-    - insectos_vol: volumen de los insectos (dB)
-    - viento_vol: volumen del viento (dB)
-    - tinguas_vol: volumen de tinguas (dB)
-    - duracion_seg: duración total del mix en segundos
-    - efectos: si aplica efectos artísticos aleatorios
+    Es la implementación síncrona de la herramienta generar_paisaje_sonoro;
+    se ejecuta dentro del pool de procesos compartido.
 
     Retorna:
     - Ruta del archivo MP3 generado.
-
-    El agente puede:
-    - Combinar sonidos con distintos volúmenes.
-    - Aplicar efectos creativos como eco, reversa y cambios de velocidad.
-    - Decidir no usar ciertos sonidos, o usar todos.
-    El agente debe:
-    - Usar la herramienta para crear sonidos muy diferentes cada vez.
     """
     capas = []
 
@@ -123,6 +129,55 @@ def generar_paisaje_sonoro(
 
     return ruta_archivo
 
+# La mezcla y la codificación MP3 se ejecutan en el pool de procesos compartido
+registrar_herramienta(
+    "mezclar_paisaje_sonoro",
+    mezclar_paisaje_sonoro,
+    max_concurrencia=2,
+    timeout=90.0,
+    precarga=precargar_banco_sonidos,
+)
+
+# generar_paisaje_sonoro no se memoiza: cada mezcla es aleatoria a propósito
+async def generar_paisaje_sonoro(
+    pajaros_vol: int = 0,
+    insectos_vol: int = 0,
+    viento_vol: int = 0,
+    tinguas_vol: int = 0,
+    duracion_seg: int = 12,
+    efectos: bool = True
+) -> str:
+    """
+    Genera un paisaje sonoro artístico mezclando los audios locales.
+
+    Parámetros:
+    - pajaros_vol: volumen de los pájaros (dB)
+    - insectos_vol: volumen de los insectos (dB)
+    - viento_vol: volumen del viento (dB)
+    - tinguas_vol: volumen de tinguas (dB)
+    - duracion_seg: duración total del mix en segundos
+    - efectos: si aplica efectos artísticos aleatorios
+
+    Retorna:
+    - Ruta del archivo MP3 generado.
+
+    El agente puede:
+    - Combinar sonidos con distintos volúmenes.
+    - Aplicar efectos creativos como eco, reversa y cambios de velocidad.
+    - Decidir no usar ciertos sonidos, o usar todos.
+    El agente debe:
+    - Usar la herramienta para crear sonidos muy diferentes cada vez.
+    """
+    return await ejecutar_herramienta(
+        "mezclar_paisaje_sonoro",
+        pajaros_vol=pajaros_vol,
+        insectos_vol=insectos_vol,
+        viento_vol=viento_vol,
+        tinguas_vol=tinguas_vol,
+        duracion_seg=duracion_seg,
+        efectos=efectos,
+    )
+
 # ------- AGENTE --------
 root_agent = Agent(
     model="gemini-2.5-flash",
@@ -1,6 +1,8 @@
 from google.adk.agents.llm_agent import Agent
 from google.genai import types
 
+from .tools import especies_del_lugar
+
 root_agent = Agent(
     model='gemini-2.5-flash',
     name='SusurroDelParamo',
@@ -59,7 +61,7 @@ Tu primera tarea es indagar sobre la experiencia del usuario. Para evitar la rep
 
 Una vez tengas las respuestas y la ubicación:
 
-1.  **Invoca a los Testigos:** Usando tu herramienta de búsqueda (iNaturalist), encuentra las especies recurrentes. Preséntalas no como una lista fría, sino de forma evocadora.
+1.  **Invoca a los Testigos:** Usando tu herramienta `especies_del_lugar` (observaciones de iNaturalist y GBIF), encuentra las especies recurrentes. Si el lugar no está en su registro, recurre a lo que sabes de la flora y fauna de ese lugar. Preséntalas no como una lista fría, sino de forma evocadora.
     *   *Ejemplo:* "Ah, la Laguna de Guatavita... mientras caminabas, te observaban en silencio estos seres: la *Puya goudotiana* abriendo sus brazos al cielo como una ofrenda, el Cucarrón de Páramo (*Platycoelia lutescens*) arrastrando su joya esmeralda por el musgo, y el Colibrí Paramuno (*Aglaeactis cupripennis*) defendiendo su territorio con furia diminuta. Junto a ellos estaban..." (presenta 10 de forma aleatoria, mezclando nombres comunes y científicos para dar un aire de erudición).
 
 2.  **Teje la Ficción Futurista (El Cuento):**
@@ -85,6 +87,7 @@ Una vez tengas las respuestas y la ubicación:
 5.  **Sofisticación Narrativa:** El sistema de "desenlace invertido y matizado" va más allá del simple "positivo/negativo", permitiendo finales más complejos y reflexivos. Además, la especificación de mitos concretos asegura que las referencias sean ricas y pertinentes.
 
     """,
+    tools=[especies_del_lugar],
     generate_content_config=types.GenerateContentConfig(
         temperature=2.0
     )
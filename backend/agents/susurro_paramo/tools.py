@@ -0,0 +1,54 @@
+# tools.py - Herramientas para el agente Susurro del Páramo
+
+import asyncio
+
+from ..comun.almacen_observaciones import obtener_almacen
+from ..comun.lugares import normalizar_nombre, obtener_registro
+from ..comun.memo_herramientas import memoizar
+
+# Especies que se entregan al modelo (el prompt presenta 10 al azar)
+MAX_ESPECIES = 25
+
+
+# El registro y el almacén son locales: la herramienta no consulta la red,
+# pero SQLite bloquea (y contar un lugar sin conteo guardado tarda cientos de
+# ms), así que la consulta corre en un hilo y no en el bucle de eventos.
+# La clave de la memoización es el nombre normalizado (sin tildes ni mayúsculas)
+
+@memoizar(ttl=3600, normalizar={"lugar": normalizar_nombre})
+async def especies_del_lugar(lugar: str) -> str:
+    """
+    Busca un lugar de la Estructura Ecológica Principal de Bogotá (humedales,
+    parques, cerros, páramo) y las especies más observadas en él.
+
+    Args:
+        lugar: Nombre del lugar que contó la persona (p. ej. "La Conejera", "Cerros Orientales")
+
+    Returns:
+        Nombre y tipo del lugar, y sus especies más observadas (nombre científico,
+        nombre común y número de observaciones en iNaturalist y GBIF)
+    """
+    return await asyncio.to_thread(_especies_del_lugar, lugar)
+
+
+def _especies_del_lugar(lugar: str) -> str:
+    registro = obtener_registro()
+    encontrados = registro.buscar(lugar)
+    if not encontrados:
+        return (
+            f"⚠️ '{lugar}' no está en el registro de lugares de Bogotá. "
+            f"Lugares conocidos: {', '.join(registro.nombres())}"
+        )
+    elegido = encontrados[0]
+    otros = f" (también coinciden: {', '.join(o.nombre for o in encontrados[1:])})" if len(encontrados) > 1 else ""
+
+    almacen = obtener_almacen()
+    especies = almacen.especies_en_lugar(elegido, MAX_ESPECIES) if almacen.existe() else []
+    if not especies:
+        return f"⚠️ No hay observaciones guardadas de {elegido.nombre} ({elegido.tipo}){otros}"
+
+    lineas = [f"📍 {elegido.nombre} ({elegido.tipo}){otros}", "Especies más observadas:"]
+    for nombre, nombre_comun, observaciones in especies:
+        comun = f" ({nombre_comun})" if nombre_comun else ""
+        lineas.append(f"- {nombre}{comun}: {observaciones} observaciones")
+    return "\n".join(lineas)
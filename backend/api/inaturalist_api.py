@@ -1,18 +1,117 @@
 """
 API REST para consultar observaciones de iNaturalist Colombia
-Consulta observaciones aleatorias del Humedal La Conejera en tiempo real
+Consulta observaciones aleatorias de los lugares de la Estructura Ecológica
+Principal de Bogotá (humedales, parques, cerros) en tiempo real
+
+Los lugares salen del registro de agents/comun/lugares.py (polígonos de la EEP con
+índice de nombres y espacial): cada lugar se acepta por nombre, id o alias,
+y las observaciones se filtran con su polígono, no con un radio.
+
+Un trabajador en segundo plano mantiene en memoria una reserva de
+observaciones recientes de cada lugar del registro y la actualiza pidiendo
+solo las observaciones nuevas. Los endpoints eligen al azar dentro de la
+reserva, sin consultar iNaturalist, así que ni su latencia ni una caída o un
+límite de peticiones llegan al cliente. /metricas indica qué tan fresca está
+cada reserva.
+
+Las consultas por radio, por rectángulo o al azar alrededor de cualquier
+punto de Bogotá se responden con el almacén local de observaciones
+(agents/comun/almacen_observaciones.py), construido a partir de exportaciones de
+iNaturalist o GBIF.
+
+iNaturalist se consulta con un único httpx.AsyncClient (pool de conexiones y
+keep-alive) creado con la aplicación; cada consulta tiene un plazo total, no
+solo tiempos máximos de conexión y lectura.
+
+Variables de entorno:
+    INATURALIST_API_URL           URL base de la API (por defecto https://api.inaturalist.org/v1)
+    INATURALIST_TIMEOUT           plazo total de cada consulta a iNaturalist, en segundos (por defecto 10)
+    INATURALIST_INTERVALO         segundos entre actualizaciones de la reserva de cada lugar (por defecto 300)
+    INATURALIST_RESERVA_MB        memoria máxima de la reserva, repartida entre los lugares (por defecto 16)
+    INATURALIST_ESPERA_ERROR      segundos sin reintentar tras un error de iNaturalist (por defecto 30)
+    INATURALIST_ALMACEN           archivo SQLite del almacén local (ver almacen_observaciones.py)
+    BOGOTA_LUGARES                GeoJSON de los lugares (ver lugares.py)
 """
 
+import asyncio
+import os
 import random
-import requests
-from fastapi import FastAPI, HTTPException, Query
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, HTTPException, Query, Response
 from pydantic import BaseModel
 
+# El almacén y el registro de lugares son compartidos con los agentes. La API
+# se ejecuta como script (python inaturalist_api.py) o como módulo
+# (api.inaturalist_api): se agrega backend/ al path para importarlos
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.comun.almacen_observaciones import BBOX_BOGOTA, ObservacionAlmacen, obtener_almacen
+from agents.comun.lugares import Lugar, obtener_registro
+
+URL_API = os.getenv("INATURALIST_API_URL", "https://api.inaturalist.org/v1").rstrip("/")
+URL_OBSERVACIONES = f"{URL_API}/observations"
+
+# Plazo total por consulta; httpx solo limita cada fase (conexión, cada lectura)
+PLAZO_CONSULTA = float(os.getenv("INATURALIST_TIMEOUT", 10))
+TIMEOUT = httpx.Timeout(PLAZO_CONSULTA, connect=5.0)
+# Tantas conexiones en reposo como simultáneas: con menos, cada ráfaga de
+# consultas cierra conexiones al terminar y la siguiente vuelve a abrirlas
+LIMITES = httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=60.0)
+CABECERAS = {"User-Agent": "DATAR-iNaturalistAPI/1.0", "Accept": "application/json"}
+
+# Observaciones del primer llenado de cada reserva y por página de las
+# actualizaciones incrementales (200 es el máximo que acepta iNaturalist)
+RESERVA_INICIAL = 200
+POR_PAGINA_INCREMENTAL = 200
+MAX_PAGINAS_POR_ACTUALIZACION = 5
+
+INTERVALO_ACTUALIZACION = float(os.getenv("INATURALIST_INTERVALO", 300))
+MEMORIA_MAXIMA = int(float(os.getenv("INATURALIST_RESERVA_MB", 16)) * 1024 * 1024)
+ESPERA_TRAS_ERROR = float(os.getenv("INATURALIST_ESPERA_ERROR", 30))
+
+# Lugares disponibles (registro compartido con las herramientas de los agentes)
+LUGARES = obtener_registro()
+
+_cliente: Optional[httpx.AsyncClient] = None
+
+
+def obtener_cliente() -> httpx.AsyncClient:
+    """Retorna el cliente compartido (lo crea la primera vez)"""
+    global _cliente
+    if _cliente is None or _cliente.is_closed:
+        _cliente = httpx.AsyncClient(timeout=TIMEOUT, limits=LIMITES, headers=CABECERAS)
+    return _cliente
+
+
+async def cerrar_cliente():
+    """Cierra el cliente compartido (si existe)"""
+    global _cliente
+    if _cliente is not None:
+        await _cliente.aclose()
+        _cliente = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Abre el pool de conexiones y arranca la reserva de observaciones; al apagar, los detiene"""
+    obtener_cliente()
+    reserva_observaciones.iniciar()
+    yield
+    await reserva_observaciones.detener()
+    await cerrar_cliente()
+
 # Crear aplicación FastAPI
 app = FastAPI(
     title="iNaturalist API",
     description="API REST para consultar observaciones de iNaturalist Colombia",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Modelos de respuesta
@@ -26,11 +125,335 @@ class Observacion(BaseModel):
     fecha_observacion: str
     usuario: str
 
+class ObservacionLocal(BaseModel):
+    """Observación del almacén local"""
+    id: int
+    fuente: str
+    id_externo: str
+    lat: float
+    lon: float
+    especie: str
+    nombre_comun: str
+    fecha_observacion: str
+    usuario: str
+    distancia_m: Optional[float] = None
+
 class Error(BaseModel):
     """Modelo de error"""
     exitoso: bool
     error: str
 
+
+def resumir_observacion(observacion: dict) -> Dict[str, str]:
+    """
+    Extrae de forma segura los campos que devuelve la API
+
+    Args:
+        observacion: Observación tal como la entrega iNaturalist
+
+    Returns:
+        dict: especie, nombre_comun, fecha_observacion y usuario
+    """
+    especie = observacion.get("taxon", {})
+    especie_nombre = especie.get("name") if especie else None
+    especie_nombre = especie_nombre if especie_nombre else "Desconocida"
+
+    nombre_comun = especie.get("preferred_common_name") if especie else None
+    nombre_comun = nombre_comun if nombre_comun else "N/A"
+
+    fecha = observacion.get("observed_on")
+    fecha = fecha if fecha else "Desconocida"
+
+    usuario_obj = observacion.get("user")
+    usuario_nombre = (
+        usuario_obj.get("name")
+        if usuario_obj and isinstance(usuario_obj, dict)
+        else None
+    )
+    usuario_nombre = usuario_nombre if usuario_nombre else "Anónimo"
+
+    return {
+        "especie": especie_nombre,
+        "nombre_comun": nombre_comun,
+        "fecha_observacion": fecha,
+        "usuario": usuario_nombre,
+    }
+
+
+def _coordenadas(observacion: dict) -> Tuple[Optional[float], Optional[float]]:
+    """(lat, lon) de una observación de iNaturalist, o (None, None) si no tiene"""
+    try:
+        lat, lon = observacion["location"].split(",")
+        return float(lat), float(lon)
+    except (KeyError, AttributeError, ValueError):
+        return None, None
+
+
+async def consultar_inaturalist(
+    lugar: Lugar, id_mayor_que: Optional[int] = None, por_pagina: int = RESERVA_INICIAL
+) -> List[Tuple[int, Optional[float], Optional[float], Dict[str, str]]]:
+    """
+    Descarga observaciones de calidad de investigación del rectángulo de un lugar
+
+    El filtro por el polígono del lugar se aplica después, sobre las
+    coordenadas devueltas (iNaturalist no conoce los polígonos de la EEP).
+
+    Args:
+        lugar: Lugar del registro
+        id_mayor_que: Si se indica, solo las observaciones de id mayor, de la
+            más antigua a la más nueva; si no, las más recientes
+        por_pagina: Observaciones por consulta (máximo 200)
+
+    Returns:
+        list: (id, lat, lon, observación resumida) (ver resumir_observacion)
+
+    Raises:
+        httpx.TimeoutException: Si iNaturalist no responde dentro de PLAZO_CONSULTA
+        httpx.HTTPError: Si no hay conexión o iNaturalist devuelve un error
+    """
+    min_lat, min_lon, max_lat, max_lon = lugar.bbox
+    params = {
+        "swlat": min_lat,
+        "swlng": min_lon,
+        "nelat": max_lat,
+        "nelng": max_lon,
+        "quality_grade": "research",
+        "per_page": por_pagina,
+        "order_by": "id",
+        "order": "desc",
+    }
+    if id_mayor_que is not None:
+        params["id_above"] = id_mayor_que
+        params["order"] = "asc"
+    try:
+        response = await asyncio.wait_for(
+            obtener_cliente().get(URL_OBSERVACIONES, params=params), timeout=PLAZO_CONSULTA
+        )
+    except asyncio.TimeoutError:
+        raise httpx.TimeoutException(f"iNaturalist no respondió en {PLAZO_CONSULTA:g}s")
+    response.raise_for_status()
+    return [
+        (observacion["id"], *_coordenadas(observacion), resumir_observacion(observacion))
+        for observacion in response.json().get("results", [])
+        if "id" in observacion
+    ]
+
+
+@dataclass
+class ReservaLugar:
+    """Observaciones guardadas de un lugar y su estado de actualización"""
+    lugar: str  # id del lugar
+    ids: List[int] = field(default_factory=list)
+    observaciones: List[Dict[str, str]] = field(default_factory=list)
+    bytes_estimados: int = 0
+    ultimo_id: Optional[int] = None
+    actualizada: Optional[float] = None
+    actualizaciones: int = 0
+    nuevas_ultima: int = 0
+    fuera_del_lugar: int = 0
+    descartadas: int = 0
+    errores: int = 0
+    ultimo_error: Optional[str] = None
+    proxima: float = 0.0
+    lista: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+
+def _tamano(observacion: Dict[str, str]) -> int:
+    """Memoria aproximada de una observación resumida (las claves son compartidas)"""
+    return sys.getsizeof(observacion) + sum(sys.getsizeof(valor) for valor in observacion.values()) + 64
+
+
+class ReservaObservaciones:
+    """
+    Reserva de observaciones recientes por lugar, mantenida en segundo plano
+
+    Un trabajador recorre los LUGARES cada INTERVALO_ACTUALIZACION segundos.
+    La primera vez descarga las RESERVA_INICIAL observaciones más recientes
+    del rectángulo del lugar; después solo pide las de id mayor al último
+    visto (id_above), página a página. Solo se guardan las que caen dentro
+    del polígono del lugar. Cada lugar tiene una parte igual de MEMORIA_MAXIMA: al superarla
+    se descartan las observaciones más antiguas. Los endpoints solo leen la
+    reserva: nunca esperan a iNaturalist.
+
+    Tras un error se espera ESPERA_TRAS_ERROR segundos (o el Retry-After de
+    iNaturalist) antes de reintentar ese lugar; mientras tanto se sigue
+    sirviendo lo guardado.
+    """
+
+    def __init__(
+        self,
+        intervalo: float = INTERVALO_ACTUALIZACION,
+        memoria_maxima: int = MEMORIA_MAXIMA,
+        espera_tras_error: float = ESPERA_TRAS_ERROR,
+    ):
+        self.intervalo = intervalo
+        self.memoria_maxima = memoria_maxima
+        self.espera_tras_error = espera_tras_error
+        self.reservas: Dict[str, ReservaLugar] = {}
+        self._trabajador: Optional[asyncio.Task] = None
+
+    def reserva(self, lugar: str) -> ReservaLugar:
+        if lugar not in self.reservas:
+            self.reservas[lugar] = ReservaLugar(lugar)
+        return self.reservas[lugar]
+
+    @property
+    def presupuesto_por_lugar(self) -> int:
+        return self.memoria_maxima // max(1, len(LUGARES))
+
+    async def actualizar(self, lugar: Lugar) -> int:
+        """
+        Descarga las observaciones nuevas de un lugar
+
+        Returns:
+            int: Número de observaciones nuevas dentro del lugar
+
+        Raises:
+            httpx.HTTPError: Si iNaturalist falla (lo ya descargado se conserva)
+        """
+        reserva = self.reserva(lugar.id)
+        descargadas: List[Tuple[int, Optional[float], Optional[float], Dict[str, str]]] = []
+        if reserva.ultimo_id is None:
+            recientes = await consultar_inaturalist(lugar, por_pagina=RESERVA_INICIAL)
+            descargadas = sorted(recientes, key=lambda fila: fila[0])
+        else:
+            desde = reserva.ultimo_id
+            for _ in range(MAX_PAGINAS_POR_ACTUALIZACION):
+                pagina = await consultar_inaturalist(lugar, id_mayor_que=desde, por_pagina=POR_PAGINA_INCREMENTAL)
+                descargadas.extend(pagina)
+                if len(pagina) < POR_PAGINA_INCREMENTAL:
+                    break
+                desde = pagina[-1][0]
+
+        # Las del rectángulo que quedan fuera del polígono no se guardan, pero
+        # cuentan para el último id visto: no se vuelven a pedir
+        nuevas = [
+            (id_observacion, observacion)
+            for id_observacion, lat, lon, observacion in descargadas
+            if lat is not None and lugar.contiene(lat, lon)
+        ]
+        for id_observacion, observacion in nuevas:
+            reserva.ids.append(id_observacion)
+            reserva.observaciones.append(observacion)
+            reserva.bytes_estimados += _tamano(observacion)
+        reserva.fuera_del_lugar += len(descargadas) - len(nuevas)
+        if descargadas:
+            reserva.ultimo_id = max(reserva.ultimo_id or 0, descargadas[-1][0])
+        elif reserva.ultimo_id is None:
+            # Lugar sin observaciones: las próximas consultas son incrementales desde 0
+            reserva.ultimo_id = 0
+        self._recortar(reserva)
+
+        reserva.actualizada = time.time()
+        reserva.actualizaciones += 1
+        reserva.nuevas_ultima = len(nuevas)
+        reserva.ultimo_error = None
+        reserva.lista.set()
+        return len(nuevas)
+
+    def _recortar(self, reserva: ReservaLugar):
+        """Descarta las observaciones más antiguas hasta respetar el presupuesto"""
+        presupuesto = self.presupuesto_por_lugar
+        sobrantes = 0
+        while reserva.bytes_estimados > presupuesto and sobrantes < len(reserva.ids) - 1:
+            reserva.bytes_estimados -= _tamano(reserva.observaciones[sobrantes])
+            sobrantes += 1
+        if sobrantes:
+            del reserva.ids[:sobrantes]
+            del reserva.observaciones[:sobrantes]
+            reserva.descartadas += sobrantes
+
+    async def _ciclo(self):
+        """Trabajador: actualiza cada lugar cuando le toca"""
+        while True:
+            for lugar in LUGARES:
+                reserva = self.reserva(lugar.id)
+                if time.monotonic() < reserva.proxima:
+                    continue
+                try:
+                    await self.actualizar(lugar)
+                    reserva.proxima = time.monotonic() + self.intervalo
+                except Exception as e:
+                    reserva.errores += 1
+                    reserva.ultimo_error = str(e) or type(e).__name__
+                    reserva.proxima = time.monotonic() + _espera_sugerida(e, self.espera_tras_error)
+                    print(f"⚠️ No se pudo actualizar la reserva de {lugar.nombre}: {reserva.ultimo_error}", file=sys.stderr)
+            siguiente = min(self.reserva(lugar.id).proxima for lugar in LUGARES)
+            await asyncio.sleep(max(0.05, siguiente - time.monotonic()))
+
+    def iniciar(self):
+        """Arranca el trabajador (si no está en marcha)"""
+        if self._trabajador is None or self._trabajador.done():
+            self._trabajador = asyncio.create_task(self._ciclo())
+
+    async def detener(self):
+        """Detiene el trabajador"""
+        if self._trabajador is not None:
+            self._trabajador.cancel()
+            try:
+                await self._trabajador
+            except asyncio.CancelledError:
+                pass
+            self._trabajador = None
+
+    async def elegir(self, lugar: Lugar, espera: float) -> Tuple[Optional[Dict[str, str]], ReservaLugar]:
+        """
+        Observación al azar de la reserva de un lugar
+
+        Si la reserva aún no se ha llenado nunca (servidor recién iniciado),
+        espera hasta `espera` segundos a que el trabajador la llene.
+
+        Returns:
+            tuple: (observación o None si la reserva está vacía, reserva del lugar)
+        """
+        reserva = self.reserva(lugar.id)
+        if not reserva.lista.is_set():
+            self.iniciar()
+            try:
+                await asyncio.wait_for(reserva.lista.wait(), timeout=espera)
+            except asyncio.TimeoutError:
+                pass
+        if not reserva.observaciones:
+            return None, reserva
+        return random.choice(reserva.observaciones), reserva
+
+    def metricas(self) -> Dict[str, Dict]:
+        """Frescura y tamaño de la reserva de cada lugar"""
+        ahora = time.time()
+        return {
+            lugar.nombre: {
+                "observaciones": len(reserva.observaciones),
+                "ultimo_id": reserva.ultimo_id,
+                "actualizada": reserva.actualizada,
+                "edad_s": round(ahora - reserva.actualizada, 1) if reserva.actualizada else None,
+                "observacion_mas_reciente": reserva.observaciones[-1]["fecha_observacion"] if reserva.observaciones else None,
+                "actualizaciones": reserva.actualizaciones,
+                "nuevas_ultima_actualizacion": reserva.nuevas_ultima,
+                "fuera_del_lugar": reserva.fuera_del_lugar,
+                "descartadas_por_memoria": reserva.descartadas,
+                "errores": reserva.errores,
+                "ultimo_error": reserva.ultimo_error,
+                "proxima_actualizacion_s": round(max(0.0, reserva.proxima - time.monotonic()), 1),
+                "memoria_bytes": reserva.bytes_estimados,
+                "presupuesto_bytes": self.presupuesto_por_lugar,
+            }
+            for lugar, reserva in ((lugar, self.reserva(lugar.id)) for lugar in LUGARES)
+        }
+
+
+def _espera_sugerida(error: Exception, por_defecto: float) -> float:
+    """Segundos de espera tras un error (Retry-After si iNaturalist lo indica)"""
+    if isinstance(error, httpx.HTTPStatusError):
+        try:
+            return max(por_defecto, float(error.response.headers.get("Retry-After", 0)))
+        except ValueError:
+            pass
+    return por_defecto
+
+
+reserva_observaciones = ReservaObservaciones()
+
+
 @app.get("/", tags=["Info"])
 async def root():
     """Endpoint raíz que retorna información de la API"""
@@ -41,107 +464,199 @@ async def root():
         "endpoints": {
             "info": "/",
             "observaciones_aleatorias": "/observaciones/aleatoria",
+            "observaciones_cercanas": "/observaciones/cerca",
+            "observacion_aleatoria_cercana": "/observaciones/cerca/aleatoria",
+            "observaciones_en_area": "/observaciones/area",
+            "observaciones_en_lugar": "/observaciones/lugar",
+            "lugares": "/lugares",
+            "buscar_lugar": "/lugares/buscar",
+            "lugares_en_punto": "/lugares/punto",
+            "metricas": "/metricas",
             "documentacion": "/docs",
         },
     }
 
 @app.get("/observaciones/aleatoria", response_model=Observacion, tags=["Observaciones"])
 async def obtener_observacion_aleatoria(
-    lugar: str = Query("Humedal La Conejera", description="Lugar a consultar"),
+    response: Response,
+    lugar: str = Query("Humedal La Conejera", description="Lugar a consultar (nombre, id o alias)"),
     ciudad: str = Query("Bogotá", description="Ciudad"),
 ):
     """
     Obtiene una observación aleatoria de iNaturalist para un lugar específico
 
-    - **lugar**: Nombre del lugar (default: Humedal La Conejera)
+    - **lugar**: Nombre, id o alias del lugar (default: Humedal La Conejera; ver /lugares)
     - **ciudad**: Nombre de la ciudad (default: Bogotá)
 
-    Retorna una observación aleatoria del lugar especificado
+    Retorna una observación aleatoria del lugar especificado, elegida en la
+    reserva local (no consulta iNaturalist). La cabecera X-Reserva-Edad indica
+    hace cuántos segundos se actualizó la reserva.
     """
-    try:
-        # Coordenadas del Humedal La Conejera en Bogotá
-        coordenadas = {
-            "Humedal La Conejera": {"lat": 4.7519, "lon": -74.0841, "radio": 1000}
-        }
+    encontrado = _lugar(lugar)
+
+    # Recién iniciado el servidor, se espera (como mucho un plazo de consulta) el primer llenado
+    observacion, reserva = await reserva_observaciones.elegir(encontrado, espera=PLAZO_CONSULTA)
 
-        if lugar not in coordenadas:
+    if observacion is None:
+        if not reserva.lista.is_set():
             raise HTTPException(
-                status_code=400,
-                detail=f"Lugar '{lugar}' no configurado. Lugares disponibles: {list(coordenadas.keys())}",
+                status_code=503,
+                detail=f"Las observaciones de {encontrado.nombre} aún no están disponibles"
+                + (f": {reserva.ultimo_error}" if reserva.ultimo_error else ""),
             )
+        raise HTTPException(
+            status_code=404, detail=f"No se encontraron observaciones en {encontrado.nombre}"
+        )
 
-        coords = coordenadas[lugar]
-
-        # Construir URL y parámetros para la API de iNaturalist
-        url = "https://api.inaturalist.org/v1/observations"
-        params = {
-            "lat": coords["lat"],
-            "lng": coords["lon"],
-            "radius": coords["radio"],
-            "quality_grade": "research",
-            "per_page": 20,
-            "order_by": "created_at",
-            "order": "desc",
-        }
+    response.headers["X-Reserva-Edad"] = f"{time.time() - reserva.actualizada:.0f}"
+    return Observacion(exitoso=True, lugar=encontrado.nombre, ciudad=ciudad, **observacion)
 
-        # Hacer consulta a la API
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+def _lugar(nombre: str) -> Lugar:
+    """Lugar del registro por nombre, id o alias, o 400 con sugerencias"""
+    lugar = LUGARES.obtener(nombre)
+    if lugar is None:
+        sugerencias = [opcion.nombre for opcion in LUGARES.buscar(nombre)] or LUGARES.nombres()
+        raise HTTPException(
+            status_code=400,
+            detail=f"Lugar '{nombre}' no configurado. Lugares disponibles: {sugerencias}",
+        )
+    return lugar
 
-        datos = response.json()
-        observaciones = datos.get("results", [])
+def _almacen():
+    """Almacén local, o 503 si aún no se ha construido"""
+    almacen = obtener_almacen()
+    if not almacen.existe():
+        raise HTTPException(
+            status_code=503,
+            detail="El almacén local de observaciones no se ha construido "
+                   "(python -m agents.comun.almacen_observaciones --ingerir <exportación>)",
+        )
+    return almacen
 
-        if not observaciones:
-            raise HTTPException(
-                status_code=404, detail=f"No se encontraron observaciones en {lugar}"
-            )
 
-        # Seleccionar una observación al azar
-        observacion_aleatoria = random.choice(observaciones)
+def _observacion_local(observacion: ObservacionAlmacen) -> ObservacionLocal:
+    return ObservacionLocal(
+        id=observacion.id,
+        fuente=observacion.fuente,
+        id_externo=observacion.id_externo,
+        lat=observacion.lat,
+        lon=observacion.lon,
+        especie=observacion.especie or "Desconocida",
+        nombre_comun=observacion.nombre_comun or "N/A",
+        fecha_observacion=observacion.fecha or "Desconocida",
+        usuario=observacion.usuario or "Anónimo",
+        distancia_m=round(observacion.distancia_m, 1) if observacion.distancia_m is not None else None,
+    )
 
-        # Extraer información de forma segura
-        especie = observacion_aleatoria.get("taxon", {})
-        especie_nombre = especie.get("name") if especie else None
-        especie_nombre = especie_nombre if especie_nombre else "Desconocida"
 
-        nombre_comun = especie.get("preferred_common_name") if especie else None
-        nombre_comun = nombre_comun if nombre_comun else "N/A"
+# Los endpoints del almacén son síncronos (def): FastAPI los ejecuta en su
+# pool de hilos y las consultas a SQLite no detienen el bucle de eventos
 
-        fecha = observacion_aleatoria.get("observed_on")
-        fecha = fecha if fecha else "Desconocida"
+# Latitud y longitud aceptadas: el rectángulo de Bogotá
+_LAT = dict(ge=BBOX_BOGOTA[0], le=BBOX_BOGOTA[2])
+_LON = dict(ge=BBOX_BOGOTA[1], le=BBOX_BOGOTA[3])
 
-        usuario_obj = observacion_aleatoria.get("user")
-        usuario_nombre = (
-            usuario_obj.get("name")
-            if usuario_obj and isinstance(usuario_obj, dict)
-            else None
-        )
-        usuario_nombre = usuario_nombre if usuario_nombre else "Anónimo"
-
-        return Observacion(
-            exitoso=True,
-            lugar=lugar,
-            ciudad=ciudad,
-            especie=especie_nombre,
-            nombre_comun=nombre_comun,
-            fecha_observacion=fecha,
-            usuario=usuario_nombre,
-        )
+@app.get("/observaciones/cerca", response_model=List[ObservacionLocal], tags=["Observaciones"])
+def obtener_observaciones_cercanas(
+    lat: float = Query(..., description="Latitud", **_LAT),
+    lon: float = Query(..., description="Longitud", **_LON),
+    radio: float = Query(1000, gt=0, le=20000, description="Radio en metros"),
+    taxon: Optional[str] = Query(None, description="Prefijo del nombre científico o común"),
+    limite: int = Query(50, ge=1, le=1000, description="Máximo de observaciones"),
+):
+    """
+    Observaciones del almacén local a menos de `radio` metros de un punto,
+    de la más cercana a la más lejana (sin consultar iNaturalist)
+    """
+    return [_observacion_local(o) for o in _almacen().en_radio(lat, lon, radio, taxon, limite)]
 
-    except requests.exceptions.Timeout:
-        raise HTTPException(
-            status_code=504, detail="Tiempo de espera agotado al consultar iNaturalist"
-        )
-    except requests.exceptions.ConnectionError:
-        raise HTTPException(
-            status_code=503, detail="Error de conexión al consultar iNaturalist"
-        )
-    except requests.exceptions.RequestException as e:
+@app.get("/observaciones/cerca/aleatoria", response_model=ObservacionLocal, tags=["Observaciones"])
+def obtener_observacion_aleatoria_cercana(
+    lat: float = Query(..., description="Latitud", **_LAT),
+    lon: float = Query(..., description="Longitud", **_LON),
+    radio: float = Query(1000, gt=0, le=20000, description="Radio en metros"),
+    taxon: Optional[str] = Query(None, description="Prefijo del nombre científico o común"),
+):
+    """
+    Una observación al azar del almacén local alrededor de cualquier punto de Bogotá
+    """
+    observacion = _almacen().aleatoria(lat, lon, radio, taxon)
+    if observacion is None:
         raise HTTPException(
-            status_code=502, detail=f"Error al consultar iNaturalist: {str(e)}"
+            status_code=404, detail=f"No hay observaciones a menos de {radio:g} m de ({lat}, {lon})"
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error inesperado: {str(e)}")
+    return _observacion_local(observacion)
+
+@app.get("/observaciones/area", response_model=List[ObservacionLocal], tags=["Observaciones"])
+def obtener_observaciones_en_area(
+    min_lat: float = Query(..., description="Latitud sur", **_LAT),
+    min_lon: float = Query(..., description="Longitud oeste", **_LON),
+    max_lat: float = Query(..., description="Latitud norte", **_LAT),
+    max_lon: float = Query(..., description="Longitud este", **_LON),
+    taxon: Optional[str] = Query(None, description="Prefijo del nombre científico o común"),
+    limite: int = Query(100, ge=1, le=1000, description="Máximo de observaciones"),
+):
+    """
+    Observaciones del almacén local dentro de un rectángulo
+    """
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="El rectángulo está invertido (min > max)")
+    return [_observacion_local(o) for o in _almacen().en_rectangulo(min_lat, min_lon, max_lat, max_lon, taxon, limite)]
+
+@app.get("/observaciones/lugar", response_model=List[ObservacionLocal], tags=["Observaciones"])
+def obtener_observaciones_en_lugar(
+    lugar: str = Query(..., description="Nombre, id o alias del lugar"),
+    taxon: Optional[str] = Query(None, description="Prefijo del nombre científico o común"),
+    limite: int = Query(100, ge=1, le=1000, description="Máximo de observaciones"),
+):
+    """
+    Observaciones del almacén local dentro del polígono de un lugar de la EEP
+    """
+    encontrado = _lugar(lugar)
+    return [_observacion_local(o) for o in _almacen().en_lugar(encontrado, taxon, limite)]
+
+@app.get("/lugares", tags=["Lugares"])
+async def listar_lugares(
+    tipo: Optional[str] = Query(None, description="humedal, parque, cerros, paramo..."),
+):
+    """Lugares del registro de la Estructura Ecológica Principal"""
+    return [lugar.resumen() for lugar in LUGARES if tipo is None or lugar.tipo == tipo]
+
+@app.get("/lugares/buscar", tags=["Lugares"])
+async def buscar_lugares(
+    q: str = Query(..., min_length=2, description="Nombre o parte del nombre"),
+    limite: int = Query(5, ge=1, le=50, description="Máximo de lugares"),
+):
+    """Lugares cuyo nombre o alias coincide (sin distinguir tildes ni mayúsculas)"""
+    return [lugar.resumen() for lugar in LUGARES.buscar(q, limite)]
+
+# Síncrono como los del almacén: mide distancias a todos los vértices de los
+# polígonos, que con la capa oficial de la EEP son miles
+@app.get("/lugares/punto", tags=["Lugares"])
+def lugares_en_punto(
+    lat: float = Query(..., description="Latitud", **_LAT),
+    lon: float = Query(..., description="Longitud", **_LON),
+    limite: int = Query(3, ge=1, le=20, description="Lugares cercanos a incluir"),
+):
+    """
+    Lugares que contienen un punto y los más cercanos a él, con su distancia en metros
+    """
+    return {
+        "dentro": [lugar.resumen() for lugar in LUGARES.en_punto(lat, lon)],
+        "cercanos": [
+            {**lugar.resumen(), "distancia_m": round(distancia, 1)}
+            for lugar, distancia in LUGARES.mas_cercanos(lat, lon, limite)
+        ],
+    }
+
+@app.get("/metricas", tags=["Info"])
+async def metricas():
+    """Frescura, tamaño y errores de la reserva de observaciones de cada lugar"""
+    return {
+        "intervalo_s": reserva_observaciones.intervalo,
+        "memoria_maxima_bytes": reserva_observaciones.memoria_maxima,
+        "lugares": reserva_observaciones.metricas(),
+    }
 
 @app.get("/health", tags=["Info"])
 async def health_check():
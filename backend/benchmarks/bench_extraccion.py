@@ -0,0 +1,101 @@
+"""
+Benchmark de la extracción de texto de páginas del Agente Bosque
+
+Compara el camino anterior (decodificar la página completa, construir un árbol
+BeautifulSoup y quedarse con los primeros 4000 caracteres) con el extractor
+incremental de agents/bosque/extraccion.py, alimentado por trozos de 64 KB como
+llegan de la red. Usa páginas sintéticas o, con --fixtures, los .html de una
+carpeta (por ejemplo páginas guardadas de las FUENTES).
+
+Uso (desde backend/):
+    python benchmarks/bench_extraccion.py [--fixtures carpeta] [--repeticiones 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from agents.bosque.extraccion import ExtractorTexto
+
+LIMITE = 4000
+TROZO = 64 * 1024
+
+
+def extraer_referencia(datos: bytes) -> str:
+    """Implementación previa: árbol completo de BeautifulSoup y recorte"""
+    soup = BeautifulSoup(datos.decode("utf-8", errors="replace"), "html.parser")
+    return soup.get_text(separator="\n", strip=True)[:LIMITE]
+
+
+def extraer_incremental(datos: bytes):
+    extractor = ExtractorTexto(LIMITE)
+    for inicio in range(0, len(datos), TROZO):
+        extractor.alimentar(datos[inicio:inicio + TROZO])
+        if extractor.completo:
+            break
+    return extractor.texto(), extractor.bytes_leidos
+
+
+def paginas_sinteticas():
+    """Páginas con la forma típica de las fuentes: mucho script y menú antes del contenido"""
+    script = "<script>" + "window.dataLayer.push({evento: 'vista', id: 42});" * 4000 + "</script>"
+    estilo = "<style>" + ".clase-larga{margin:0 auto;padding:4px}" * 3000 + "</style>"
+    menu = "<nav><ul>" + "".join(f"<li><a href='/s/{i}'>Sección {i}</a></li>" for i in range(400)) + "</ul></nav>"
+    parrafo = ("<p>Las briófitas del bosque altoandino retienen agua y regulan la humedad del "
+               "suelo; los líquenes crecen sobre la corteza de los encenillos. </p>")
+    articulo = "<h2>Resultados</h2>" + parrafo * 3000
+    pie = "<footer>" + "<a href='#'>Enlace legal</a>" * 500 + "</footer>"
+
+    yield "artículo (main)", (
+        f"<html><head><title>Artículo</title>{estilo}{script}</head><body><header>{menu}</header>"
+        f"<main><article>{articulo}</article></main>{pie}{script}</body></html>"
+    ).encode("utf-8")
+    yield "página sin main", (
+        f"<html><head>{script}</head><body>{menu}<div class='contenido'>{articulo}</div>{pie}</body></html>"
+    ).encode("utf-8")
+    yield "página corta", (
+        f"<html><head><title>Ficha</title></head><body>{menu}<main>{parrafo * 10}</main></body></html>"
+    ).encode("utf-8")
+
+
+def paginas_fixtures(carpeta: Path):
+    for ruta in sorted(carpeta.glob("*.htm*")):
+        yield ruta.name, ruta.read_bytes()
+
+
+def medir(funcion, datos: bytes, repeticiones: int) -> float:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(datos)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extracción de texto HTML")
+    parser.add_argument("--fixtures", type=Path, help="Carpeta con páginas .html guardadas")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    paginas = paginas_fixtures(args.fixtures) if args.fixtures else paginas_sinteticas()
+    print(f"{'página':<24}{'tamaño':>10}{'leído':>10}{'BS4 (ms)':>11}{'lxml (ms)':>11}{'mejora':>9}")
+    for nombre, datos in paginas:
+        t_ref = medir(extraer_referencia, datos, args.repeticiones)
+        t_inc = medir(extraer_incremental, datos, args.repeticiones)
+        texto, leidos = extraer_incremental(datos)
+        print(f"{nombre[:23]:<24}{len(datos) / 1024:>8.0f}KB{leidos / 1024:>8.0f}KB"
+              f"{t_ref * 1000:>11.1f}{t_inc * 1000:>11.1f}{t_ref / t_inc:>8.1f}x")
+        referencia = extraer_referencia(datos)
+        print(f"{'':<24}caracteres: BS4 {len(referencia):,} · lxml {len(texto):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark del acceso a iNaturalist desde la API REST
+
+Lanza N peticiones concurrentes contra un servidor local que hace de
+iNaturalist (con latencia simulada y keep-alive) y compara tres formas de
+consultarlo desde un endpoint async:
+
+    requests.get bloqueante   la versión original: cada consulta detiene el bucle
+    requests.get en hilos     sin bloquear el bucle, pero una conexión nueva por consulta
+    httpx.AsyncClient         el cliente compartido de la API (pool y keep-alive)
+
+Además de las consultas por segundo, mide cuánto se retrasa el bucle de
+eventos (latencia de un latido de 10 ms) mientras las consultas están en curso.
+Cada caso se repite varias veces y se reporta la media, la desviación estándar
+y el rango: en una máquina compartida la variación entre corridas es grande.
+
+Uso (desde backend/):
+    python benchmarks/bench_inaturalist_cliente.py [--peticiones 200] [--concurrencia 20] [--latencia 0.05] [--repeticiones 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from api import inaturalist_api
+
+LUGAR = inaturalist_api.LUGARES.obtener("Humedal La Conejera")
+
+# Observaciones por respuesta (las que pedía la versión original)
+OBSERVACIONES = 20
+
+
+def servidor_inaturalist(latencia: float) -> ThreadingHTTPServer:
+    """Servidor local con la forma de /v1/observations y la latencia indicada"""
+    cuerpo = json.dumps({
+        "results": [
+            {
+                "id": i + 1,
+                "location": f"{LUGAR.centro[0]},{LUGAR.centro[1]}",
+                "taxon": {"name": f"Especie {i}", "preferred_common_name": f"Nombre {i}"},
+                "observed_on": "2024-05-01",
+                "user": {"name": "observadora"},
+            }
+            for i in range(OBSERVACIONES)
+        ]
+    }).encode("utf-8")
+
+    class Manejador(BaseHTTPRequestHandler):
+        # HTTP/1.1: las conexiones se mantienen abiertas entre peticiones
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latencia)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def _params() -> dict:
+    min_lat, min_lon, max_lat, max_lon = LUGAR.bbox
+    return {
+        "swlat": min_lat, "swlng": min_lon, "nelat": max_lat, "nelng": max_lon,
+        "quality_grade": "research", "per_page": OBSERVACIONES,
+        "order_by": "created_at", "order": "desc",
+    }
+
+
+async def consulta_bloqueante():
+    """Versión original: requests.get dentro de una función async"""
+    response = requests.get(inaturalist_api.URL_OBSERVACIONES, params=_params(), timeout=10)
+    response.raise_for_status()
+    return response.json()["results"]
+
+
+async def consulta_en_hilo():
+    def consultar():
+        response = requests.get(inaturalist_api.URL_OBSERVACIONES, params=_params(), timeout=10)
+        response.raise_for_status()
+        return response.json()["results"]
+    return await asyncio.to_thread(consultar)
+
+
+async def consulta_httpx():
+    return await inaturalist_api.consultar_inaturalist(LUGAR, por_pagina=OBSERVACIONES)
+
+
+async def medir(consulta, peticiones: int, concurrencia: int):
+    """Consultas por segundo y retraso máximo del bucle de eventos"""
+    retrasos = []
+    terminado = asyncio.Event()
+
+    async def latido():
+        while not terminado.is_set():
+            inicio = time.perf_counter()
+            await asyncio.sleep(0.01)
+            retrasos.append(time.perf_counter() - inicio - 0.01)
+
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def una():
+        async with semaforo:
+            await consulta()
+
+    pulso = asyncio.create_task(latido())
+    await asyncio.sleep(0)
+    inicio = time.perf_counter()
+    await asyncio.gather(*(una() for _ in range(peticiones)))
+    duracion = time.perf_counter() - inicio
+    terminado.set()
+    await pulso
+    return peticiones / duracion, 1000 * max(retrasos, default=0.0)
+
+
+async def principal(args):
+    servidor = servidor_inaturalist(args.latencia)
+    inaturalist_api.URL_OBSERVACIONES = f"http://127.0.0.1:{servidor.server_address[1]}/v1/observations"
+    casos = [
+        ("requests.get bloqueante", consulta_bloqueante, min(args.peticiones, 40)),
+        ("requests.get en hilos", consulta_en_hilo, args.peticiones),
+        ("httpx.AsyncClient", consulta_httpx, args.peticiones),
+    ]
+    print(f"{args.concurrencia} concurrentes, latencia de iNaturalist {args.latencia * 1000:.0f} ms, "
+          f"{args.repeticiones} repeticiones\n")
+    print(f"{'acceso':<26}{'consultas/s (media ± desv.)':>30}{'rango':>18}{'bucle bloqueado (máx.)':>26}")
+    try:
+        for nombre, consulta, peticiones in casos:
+            await consulta()  # calentamiento (y conexión inicial del pool)
+            mediciones = [await medir(consulta, peticiones, args.concurrencia) for _ in range(args.repeticiones)]
+            por_segundo = [m[0] for m in mediciones]
+            desviacion = statistics.stdev(por_segundo) if len(por_segundo) > 1 else 0.0
+            rango = f"{min(por_segundo):.0f}-{max(por_segundo):.0f}"
+            retraso = max(m[1] for m in mediciones)
+            print(f"{nombre:<26}{statistics.mean(por_segundo):>21.1f} ± {desviacion:>6.1f}{rango:>18}{retraso:>23.1f} ms")
+    finally:
+        await inaturalist_api.cerrar_cliente()
+        servidor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del acceso a iNaturalist")
+    parser.add_argument("--peticiones", type=int, default=200, help="Consultas por caso")
+    parser.add_argument("--concurrencia", type=int, default=20, help="Consultas simultáneas")
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latencia simulada de iNaturalist (s)")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Mediciones por caso")
+    asyncio.run(principal(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark de transportes del servidor MCP del Agente Bosque
+
+Mide llamadas por segundo a las herramientas del servidor en tres modos:
+
+    stdio (un proceso por llamada)   lo que hace un cliente que lanza el servidor cada vez
+    stdio (una sesión)               un proceso y un cliente: las llamadas van en serie
+    http (servidor persistente)      un proceso y varios clientes concurrentes
+
+Las herramientas medidas son inferir_especies (CPU, sin red) y leer_pagina
+contra un servidor web local con latencia simulada; con BOSQUE_CACHE_TTL=0
+cada lectura revalida la página, así que cada llamada espera a la red.
+
+Uso (desde backend/):
+    python benchmarks/bench_mcp_transporte.py [--llamadas 200] [--clientes 8] [--latencia 0.05]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from fastmcp import Client
+from fastmcp.client.transports import PythonStdioTransport
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVIDOR = os.path.join(BACKEND, "agents", "bosque", "mcp_server_bosque.py")
+
+DESCRIPCION = "Hace frío, pero hay mucha luz y el suelo está seco."
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def servidor_web(latencia: float) -> ThreadingHTTPServer:
+    """Servidor local que hace de fuente web con la latencia indicada"""
+    cuerpo = ("<html><body><main>" + "<p>Las briófitas retienen la humedad del bosque.</p>" * 50
+              + "</main></body></html>").encode("utf-8")
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latencia)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto_libre()), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def transporte_stdio(env: dict) -> PythonStdioTransport:
+    # Los registros del servidor (stderr) no se mezclan con los resultados
+    return PythonStdioTransport(SERVIDOR, env=env, keep_alive=False, log_file=Path(os.devnull))
+
+
+def entorno() -> dict:
+    carpeta = tempfile.mkdtemp(prefix="bench_mcp_")
+    return dict(
+        os.environ,
+        BOSQUE_CACHE_DIR=os.path.join(carpeta, "cache"),
+        BOSQUE_CACHE_TTL="0",
+        BOSQUE_INDICE=os.path.join(carpeta, "indice.sqlite3"),
+    )
+
+
+async def llamar(cliente: Client, herramienta: str, argumentos: dict):
+    resultado = await cliente.call_tool(herramienta, argumentos)
+    if resultado.is_error:
+        raise RuntimeError(f"{herramienta} falló: {resultado}")
+
+
+async def stdio_por_llamada(herramienta: str, argumentos: dict, llamadas: int, env: dict) -> float:
+    inicio = time.perf_counter()
+    for _ in range(llamadas):
+        async with Client(transporte_stdio(env)) as cliente:
+            await llamar(cliente, herramienta, argumentos)
+    return llamadas / (time.perf_counter() - inicio)
+
+
+async def stdio_sesion(herramienta: str, argumentos: dict, llamadas: int, env: dict) -> float:
+    async with Client(transporte_stdio(env)) as cliente:
+        inicio = time.perf_counter()
+        for _ in range(llamadas):
+            await llamar(cliente, herramienta, argumentos)
+        return llamadas / (time.perf_counter() - inicio)
+
+
+async def http_concurrente(url: str, herramienta: str, argumentos: dict, llamadas: int, clientes: int) -> float:
+    async def trabajador(n: int):
+        async with Client(url) as cliente:
+            for _ in range(n):
+                await llamar(cliente, herramienta, argumentos)
+
+    reparto = [llamadas // clientes + (1 if i < llamadas % clientes else 0) for i in range(clientes)]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador(n) for n in reparto))
+    return llamadas / (time.perf_counter() - inicio)
+
+
+async def esperar_servidor(url: str, proceso: subprocess.Popen, plazo: float = 30):
+    limite = time.monotonic() + plazo
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError("El servidor MCP terminó al arrancar")
+        try:
+            async with Client(url) as cliente:
+                await cliente.list_tools()
+                return
+        except Exception:
+            await asyncio.sleep(0.2)
+    raise TimeoutError("El servidor MCP no respondió")
+
+
+async def principal(args):
+    web = servidor_web(args.latencia)
+    url_pagina = f"http://127.0.0.1:{web.server_address[1]}/briofitas"
+    casos = [
+        ("inferir_especies", {"descripcion": DESCRIPCION}),
+        ("leer_pagina", {"url": url_pagina, "consulta": "humedad"}),
+    ]
+    env = entorno()
+
+    puerto = puerto_libre()
+    url_mcp = f"http://127.0.0.1:{puerto}/mcp"
+    proceso = subprocess.Popen(
+        [sys.executable, SERVIDOR, "--transporte", "http", "--puerto", str(puerto)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        await esperar_servidor(url_mcp, proceso)
+        print(f"{'herramienta':<18}{'stdio/proceso':>15}{'stdio/sesión':>15}{'http x' + str(args.clientes):>15}   (llamadas/s)")
+        for herramienta, argumentos in casos:
+            por_proceso = await stdio_por_llamada(herramienta, argumentos, args.spawns, env)
+            sesion = await stdio_sesion(herramienta, argumentos, args.llamadas, env)
+            http = await http_concurrente(url_mcp, herramienta, argumentos, args.llamadas, args.clientes)
+            print(f"{herramienta:<18}{por_proceso:>15.1f}{sesion:>15.1f}{http:>15.1f}")
+    finally:
+        proceso.terminate()
+        proceso.wait()
+        web.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de transportes del servidor MCP del Agente Bosque")
+    parser.add_argument("--llamadas", type=int, default=200, help="Llamadas por modo persistente")
+    parser.add_argument("--spawns", type=int, default=5, help="Llamadas en el modo de un proceso por llamada")
+    parser.add_argument("--clientes", type=int, default=8, help="Clientes HTTP concurrentes")
+    parser.add_argument("--latencia", type=float, default=0.05, help="Latencia simulada de la fuente web (s)")
+    asyncio.run(principal(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark de generar_rio_emocional
+
+Compara los motores actuales (Pillow por defecto y matplotlib con
+colecciones vectorizadas y los emojis en una sola imagen) con la versión
+original, que creaba un Line2D por cada par de puntos del río y un Text
+por cada emoji y etiqueta. También mide el tiempo de importación
+del módulo de visualización.
+
+Uso (desde backend/):
+    python benchmarks/bench_rio_emocional.py [--repeticiones 5]
+"""
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+from agents.diario_intuitivo.visualizacion import generar_rio_emocional, obtener_color_emoji, EMOJI_COLORES
+
+
+def generar_rio_emocional_referencia(emojis_texto: str) -> bytes:
+    """Implementación previa: un ax.plot por cada par de puntos del río"""
+    emojis = emojis_texto.split() or ['❓']
+    fig, ax = plt.subplots(figsize=(12, 8), facecolor='#F5F5F5')
+    ax.set_xlim(0, 10)
+    ax.set_ylim(0, 10)
+    ax.axis('off')
+    ax.text(5, 9.5, 'El Río de tu Pensamiento', fontsize=24, ha='center', va='top',
+            weight='bold', color='#2C3E50')
+
+    x_positions = np.linspace(1, 9, len(emojis))
+    x_river = np.linspace(0, 10, 200)
+    y_base = 5
+    for i in range(len(emojis) - 1):
+        mask = (x_river >= x_positions[i]) & (x_river <= x_positions[i + 1])
+        x_segment = x_river[mask]
+        y_wave = y_base + 0.3 * np.sin(2 * np.pi * x_segment / 2)
+        color = obtener_color_emoji(emojis[i])
+        for j in range(len(x_segment) - 1):
+            alpha = 0.6 + 0.4 * (j / len(x_segment))
+            ax.plot(x_segment[j:j+2], y_wave[j:j+2], color=color, linewidth=15,
+                    alpha=alpha, solid_capstyle='round')
+
+    for i, (emoji, x_pos) in enumerate(zip(emojis, x_positions)):
+        y_pos = y_base + 0.3 * np.sin(2 * np.pi * x_pos / 2)
+        ax.add_patch(plt.Circle((x_pos, y_pos), 0.4, color=obtener_color_emoji(emoji), alpha=0.7, zorder=10))
+        ax.text(x_pos, y_pos, emoji, fontsize=32, ha='center', va='center', zorder=11)
+        ax.text(x_pos, y_pos - 0.7, f'{i+1}', fontsize=12, ha='center', va='top', color='#555', weight='bold')
+
+    num_total = len(emojis)
+    ax.text(5, 1.5, f'Un camino de {num_total} {"paso" if num_total == 1 else "pasos"} emocionales',
+            fontsize=14, ha='center', va='center', style='italic', color='#555')
+    ax.axhline(y=10, color='#E0E0E0', linewidth=1, linestyle='--', alpha=0.5)
+    ax.axhline(y=0, color='#E0E0E0', linewidth=1, linestyle='--', alpha=0.5)
+
+    buf = io.BytesIO()
+    plt.tight_layout()
+    plt.savefig(buf, format='png', dpi=150, bbox_inches='tight', facecolor='#F5F5F5')
+    plt.close(fig)
+    buf.seek(0)
+    return buf.read()
+
+
+def medir(funcion, entrada: str, repeticiones: int) -> float:
+    """Retorna el tiempo medio (segundos) de varias ejecuciones, tras un calentamiento"""
+    funcion(entrada)
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(entrada)
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def medir_importacion() -> float:
+    """Tiempo (segundos) de importar el módulo de visualización en un proceso limpio"""
+    codigo = (
+        "import time; t = time.perf_counter(); "
+        "import agents.diario_intuitivo.visualizacion; "
+        "print(time.perf_counter() - t)"
+    )
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=backend, capture_output=True, text=True)
+    return float(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del río emocional")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Importación de visualizacion.py: {medir_importacion():.3f}s\n")
+
+    def con_matplotlib(entrada):
+        return generar_rio_emocional(entrada, motor="matplotlib")
+
+    def con_pillow(entrada):
+        return generar_rio_emocional(entrada, motor="pillow")
+
+    paleta = [e for e in EMOJI_COLORES if e != 'default']
+    print(f"{'emojis':>7} | {'original (s)':>13} | {'matplotlib (s)':>15} | {'pillow (s)':>11} | {'acel. mpl':>9} | {'acel. pillow':>12}")
+    print("-" * 84)
+    for cantidad in (5, 20, 50, 100):
+        entrada = " ".join(paleta[i % len(paleta)] for i in range(cantidad))
+        t_ref = medir(generar_rio_emocional_referencia, entrada, args.repeticiones)
+        t_mpl = medir(con_matplotlib, entrada, args.repeticiones)
+        t_pil = medir(con_pillow, entrada, args.repeticiones)
+        print(f"{cantidad:>7} | {t_ref:>13.3f} | {t_mpl:>15.3f} | {t_pil:>11.3f} | {t_ref / t_mpl:>8.1f}x | {t_ref / t_pil:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
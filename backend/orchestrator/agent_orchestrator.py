@@ -5,11 +5,13 @@ Coordina la interacción entre los diferentes agentes del sistema
 
 import sys
 import os
+import uuid
+from collections import OrderedDict
 
 # Agregar el directorio padre al path para importar los agentes
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from google.adk.agents.llm_agent import Agent
 from google.adk.runners import InMemoryRunner
 from google.genai.types import Part, Content
@@ -66,20 +68,41 @@ AGENTES = {
     }
 }
 
+# Clientes con estado a la vez (sesiones con los agentes, agente activo e
+# historial); al pasar el límite se borra el que lleva más tiempo sin usarse
+MAX_CLIENTES = int(os.getenv("DATAR_MAX_CLIENTES", 1000))
+
+# Intercambios que se guardan en el historial de cada cliente
+MAX_HISTORIAL = int(os.getenv("DATAR_MAX_HISTORIAL", 100))
+
+
 class OrchestrationAgent:
     """
     Agente orquestador que coordina la interacción entre múltiples agentes
+
+    Cada cliente (usuario_id que envía el frontend) tiene su propio agente
+    activo, su historial y su propia sesión de ADK con cada agente, así que
+    el estado que guardan las herramientas (p. ej. la última interpretación
+    del Diario Intuitivo) no se mezcla entre personas.
+
+    Las sesiones viven en el InMemorySessionService de cada runner, es
+    decir, en la memoria de este proceso. Con varios workers o réplicas
+    (uvicorn --workers N, varias instancias en Render) cada una tiene sus
+    propias sesiones y un cliente pierde su conversación si su siguiente
+    mensaje llega a otro proceso: ese despliegue necesita un servicio de
+    sesiones compartido (DatabaseSessionService o VertexAiSessionService de
+    ADK) en lugar del InMemoryRunner, o afinidad de sesión en el balanceador.
     """
 
     def __init__(self):
         """Inicializa el orquestador con los agentes disponibles"""
         self.agentes = AGENTES
-        self.agente_activo = None
-        self.historial_conversacion = []
 
         # Crear runners para cada agente
         self.runners = {}
-        self.sessions = {}  # sesiones por agente
+        # usuario_id -> {"agente_activo", "historial", "sesiones": {agente_id: sesión}},
+        # del cliente menos al más recientemente usado
+        self.clientes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
         for agente_id, agente_info in self.agentes.items():
             if agente_info["agente"] is not None:
                 try:
@@ -101,12 +124,14 @@ class OrchestrationAgent:
             for key, value in self.agentes.items()
         ]
 
-    def seleccionar_agente(self, agente_id: str) -> Dict[str, Any]:
+    async def seleccionar_agente(self, agente_id: str, usuario_id: Optional[str] = None) -> Dict[str, Any]:
         """
-        Selecciona un agente por su ID
+        Selecciona un agente por su ID para un cliente
 
         Args:
             agente_id: ID del agente a seleccionar
+            usuario_id: Identificador del cliente (opcional); si falta se
+                crea uno nuevo, que se devuelve en la respuesta
 
         Returns:
             Diccionario con información sobre el agente seleccionado
@@ -117,33 +142,101 @@ class OrchestrationAgent:
                 "error": f"Agente '{agente_id}' no encontrado"
             }
 
-        self.agente_activo = agente_id
+        usuario_id = usuario_id or uuid.uuid4().hex
+        cliente = await self._cliente(usuario_id)
+        cliente["agente_activo"] = agente_id
         agente_info = self.agentes[agente_id]
 
         return {
             "exitoso": True,
             "agente": agente_info["nombre"],
             "descripcion": agente_info["descripcion"],
-            "mensaje": f"Has seleccionado a {agente_info['nombre']}. ¿Qué quieres explorar?"
+            "mensaje": f"Has seleccionado a {agente_info['nombre']}. ¿Qué quieres explorar?",
+            "usuario_id": usuario_id
         }
 
-    async def procesar_mensaje(self, mensaje: str, agente_id: str = None) -> Dict[str, Any]:
+    async def _cliente(self, usuario_id: str) -> Dict[str, Any]:
+        """
+        Estado del cliente (creado la primera vez), marcado como el más reciente
+
+        Args:
+            usuario_id: Identificador del cliente
+
+        Returns:
+            Diccionario con agente_activo, historial y sesiones del cliente
+        """
+        if usuario_id in self.clientes:
+            self.clientes.move_to_end(usuario_id)
+            return self.clientes[usuario_id]
+
+        cliente = self.clientes[usuario_id] = {"agente_activo": None, "historial": [], "sesiones": {}}
+        while len(self.clientes) > MAX_CLIENTES:
+            _, antiguo = self.clientes.popitem(last=False)
+            await self._borrar_sesiones(antiguo)
+        return cliente
+
+    async def _sesion(self, cliente: Dict[str, Any], agente_id: str, usuario_id: str):
+        """
+        Sesión del cliente con el agente, creada en su primer mensaje
+
+        Args:
+            cliente: Estado del cliente (ver _cliente)
+            agente_id: ID del agente
+            usuario_id: Identificador del cliente
+
+        Returns:
+            Sesión de ADK del runner del agente
+        """
+        if agente_id not in cliente["sesiones"]:
+            runner = self.runners[agente_id]
+            cliente["sesiones"][agente_id] = await runner.session_service.create_session(
+                app_name=runner.app_name,
+                user_id=usuario_id
+            )
+        return cliente["sesiones"][agente_id]
+
+    async def _borrar_sesiones(self, cliente: Dict[str, Any]):
+        """Borra todas las sesiones de un cliente"""
+        for agente_id, session in cliente["sesiones"].items():
+            await self._borrar_sesion(agente_id, session)
+        cliente["sesiones"] = {}
+
+    async def _borrar_sesion(self, agente_id: str, session):
+        """Borra la sesión del servicio, y con ella el estado de las herramientas"""
+        runner = self.runners[agente_id]
+        try:
+            await runner.session_service.delete_session(
+                app_name=runner.app_name,
+                user_id=session.user_id,
+                session_id=session.id
+            )
+        except Exception as e:
+            print(f"⚠️ Error al borrar la sesión de {agente_id}: {e}")
+
+    async def procesar_mensaje(self, mensaje: str, agente_id: str = None,
+                               usuario_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Procesa un mensaje y lo enruta al agente apropiado
 
         Args:
             mensaje: Mensaje del usuario
             agente_id: ID del agente específico (opcional)
+            usuario_id: Identificador del cliente (opcional); si falta se
+                crea uno nuevo, que se devuelve en la respuesta para que el
+                cliente lo envíe en sus siguientes mensajes
 
         Returns:
             Respuesta del agente con metadata
         """
         try:
+            usuario_id = usuario_id or uuid.uuid4().hex
+            cliente = await self._cliente(usuario_id)
+
             # Determinar qué agente usar
             if agente_id:
                 target_agent = agente_id
-            elif self.agente_activo:
-                target_agent = self.agente_activo
+            elif cliente["agente_activo"]:
+                target_agent = cliente["agente_activo"]
             else:
                 return {
                     "exitoso": False,
@@ -167,21 +260,17 @@ class OrchestrationAgent:
             agente_info = self.agentes[target_agent]
             runner = self.runners[target_agent]
 
-            # Crear o recuperar sesión para este agente
-            if target_agent not in self.sessions:
-                self.sessions[target_agent] = await runner.session_service.create_session(
-                    app_name=runner.app_name,
-                    user_id="default_user"
-                )
-
-            session = self.sessions[target_agent]
+            # Crear o recuperar la sesión de este cliente con el agente
+            session = await self._sesion(cliente, target_agent, usuario_id)
 
             # Crear el contenido del mensaje
             content = Content(parts=[Part(text=mensaje)], role="user")
 
-            # Ejecutar el agente y recolectar la respuesta
+            # Ejecutar el agente y recolectar la respuesta (de forma asíncrona,
+            # para no bloquear el bucle de eventos del servidor mientras
+            # las herramientas pesadas trabajan en el pool de procesos)
             respuesta_texto = ""
-            for event in runner.run(
+            async for event in runner.run_async(
                 user_id=session.user_id,
                 session_id=session.id,
                 new_message=content
@@ -201,15 +290,18 @@ class OrchestrationAgent:
                 "agente": agente_info["nombre"],
                 "agente_id": target_agent,
                 "mensaje": respuesta_texto,
-                "color": agente_info["color"]
+                "color": agente_info["color"],
+                "usuario_id": usuario_id
             }
 
-            # Guardar en historial
-            self.historial_conversacion.append({
+            # Guardar en el historial del cliente (solo los últimos MAX_HISTORIAL)
+            historial = cliente["historial"]
+            historial.append({
                 "agente": target_agent,
                 "usuario": mensaje,
                 "respuesta": respuesta_texto
             })
+            del historial[:-MAX_HISTORIAL]
 
             return respuesta
 
@@ -222,16 +314,28 @@ class OrchestrationAgent:
                 "error": f"Error al procesar mensaje: {str(e)}"
             }
 
-    def obtener_historial(self) -> List[Dict[str, Any]]:
-        """Retorna el historial de conversaciones"""
-        return self.historial_conversacion
+    def obtener_historial(self, usuario_id: str) -> List[Dict[str, Any]]:
+        """
+        Retorna el historial de conversaciones de un cliente
+
+        Args:
+            usuario_id: Identificador del cliente
+        """
+        cliente = self.clientes.get(usuario_id)
+        return list(cliente["historial"]) if cliente else []
 
-    def limpiar_historial(self):
-        """Limpia el historial de conversaciones y sesiones"""
-        self.historial_conversacion = []
-        self.agente_activo = None
-        # Limpiar las sesiones para reiniciar las conversaciones
-        self.sessions = {}
+    async def limpiar_historial(self, usuario_id: str):
+        """
+        Limpia el historial, el agente activo y las sesiones de un cliente
+
+        Args:
+            usuario_id: Identificador del cliente
+        """
+        cliente = self.clientes.pop(usuario_id, None)
+        if cliente:
+            # Borrar las sesiones del servicio (y con ellas el estado que guardan
+            # las herramientas) para reiniciar las conversaciones sin acumularlas
+            await self._borrar_sesiones(cliente)
 
 # Crear instancia global del orquestador
 orchestrator = OrchestrationAgent()
@@ -3,11 +3,13 @@ Servidor Principal FastAPI para el Proyecto {DATAR}
 Laboratorio de experimentación con datos ambientales basados en la orquestación de agentes autónomos
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import os
 import sys
@@ -21,12 +23,26 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Importar el orquestador
 from orchestrator.agent_orchestrator import get_orchestrator
+from agents.comun.ejecutor import obtener_ejecutor
+from agents.comun import artefactos
+from agents.comun import memo_herramientas
+from agents.bosque.cliente_http import cerrar_cliente as cerrar_cliente_bosque
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranca el pool de herramientas pesadas al iniciar y lo detiene al apagar"""
+    ejecutor = obtener_ejecutor()
+    ejecutor.iniciar()
+    yield
+    ejecutor.cerrar()
+    await cerrar_cliente_bosque()
 
 # Crear aplicación FastAPI
 app = FastAPI(
     title="{DATAR} - Laboratorio de Experimentación con Datos Ambientales",
     description="Sistema de orquestación de agentes autónomos para exploración de datos ambientales de Bogotá",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configurar CORS para permitir peticiones desde el frontend
@@ -48,10 +64,16 @@ class MensajeRequest(BaseModel):
     """Modelo para enviar mensajes a los agentes"""
     mensaje: str
     agente_id: Optional[str] = None
+    usuario_id: Optional[str] = Field(
+        None, max_length=64, description="Identificador del cliente; cada uno tiene su propia sesión con cada agente"
+    )
 
 class AgenteSelecionRequest(BaseModel):
     """Modelo para seleccionar un agente"""
     agente_id: str
+    usuario_id: Optional[str] = Field(
+        None, max_length=64, description="Identificador del cliente; cada uno tiene su propio agente activo"
+    )
 
 class MensajeResponse(BaseModel):
     """Modelo de respuesta de un agente"""
@@ -61,6 +83,7 @@ class MensajeResponse(BaseModel):
     mensaje: Optional[str] = None
     color: Optional[str] = None
     error: Optional[str] = None
+    usuario_id: Optional[str] = None
 
 class AgenteInfo(BaseModel):
     """Información de un agente"""
@@ -93,6 +116,8 @@ async def api_info():
             "enviar_mensaje": "/api/mensaje",
             "historial": "/api/historial",
             "limpiar_historial": "/api/historial/limpiar",
+            "artefactos": "/api/artefactos/{artefacto_id}",
+            "metricas": "/api/metricas",
             "documentacion": "/docs",
         },
         "frontend": "/static/index.html"
@@ -121,12 +146,14 @@ async def seleccionar_agente(request: AgenteSelecionRequest):
     Selecciona un agente específico para interactuar con él
 
     - **agente_id**: ID del agente a seleccionar (ej: "pasto_bogotano", "susurro_paramo")
+    - **usuario_id** (opcional): Identificador del cliente. Si no se proporciona,
+      se crea uno y se devuelve en la respuesta.
 
     El agente seleccionado quedará activo para las siguientes conversaciones
-    hasta que se seleccione otro agente o se limpie el historial.
+    de ese cliente hasta que seleccione otro agente o limpie su historial.
     """
     try:
-        resultado = orchestrator.seleccionar_agente(request.agente_id)
+        resultado = await orchestrator.seleccionar_agente(request.agente_id, request.usuario_id)
         if not resultado.get("exitoso"):
             raise HTTPException(status_code=404, detail=resultado.get("error"))
         return resultado
@@ -143,6 +170,8 @@ async def enviar_mensaje(request: MensajeRequest):
     - **mensaje**: Texto del mensaje a enviar
     - **agente_id** (opcional): ID del agente específico. Si no se proporciona,
       se usará el agente actualmente seleccionado.
+    - **usuario_id** (opcional): Identificador del cliente. Si no se proporciona,
+      se crea uno y se devuelve en la respuesta para los siguientes mensajes.
 
     El agente procesará el mensaje según su especialidad y retornará una respuesta.
     """
@@ -152,7 +181,8 @@ async def enviar_mensaje(request: MensajeRequest):
 
         respuesta = await orchestrator.procesar_mensaje(
             mensaje=request.mensaje,
-            agente_id=request.agente_id
+            agente_id=request.agente_id,
+            usuario_id=request.usuario_id
         )
 
         if not respuesta.get("exitoso"):
@@ -165,33 +195,37 @@ async def enviar_mensaje(request: MensajeRequest):
         raise HTTPException(status_code=500, detail=f"Error al procesar mensaje: {str(e)}")
 
 @app.get("/api/historial", tags=["Interacción"])
-async def obtener_historial():
+async def obtener_historial(usuario_id: str = Query(..., max_length=64)):
     """
-    Obtiene el historial completo de conversaciones con los agentes
+    Obtiene el historial de conversaciones de un cliente con los agentes
 
-    Retorna una lista con todas las interacciones, incluyendo:
+    - **usuario_id**: Identificador del cliente
+
+    Retorna una lista con sus últimas interacciones, incluyendo:
     - Agente que participó
     - Mensaje del usuario
     - Respuesta del agente
     """
     try:
-        historial = orchestrator.obtener_historial()
+        historial = orchestrator.obtener_historial(usuario_id)
         return {"historial": historial}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener historial: {str(e)}")
 
 @app.delete("/api/historial/limpiar", tags=["Interacción"])
-async def limpiar_historial():
+async def limpiar_historial(usuario_id: str = Query(..., max_length=64)):
     """
-    Limpia el historial de conversaciones y reinicia el estado del sistema
+    Limpia el historial de conversaciones de un cliente y reinicia su estado
+
+    - **usuario_id**: Identificador del cliente
 
-    Esto resetea:
+    Esto resetea, solo para ese cliente:
     - El historial de mensajes
     - La selección del agente activo
     - Cualquier estado interno de las conversaciones
     """
     try:
-        orchestrator.limpiar_historial()
+        await orchestrator.limpiar_historial(usuario_id)
         return {"mensaje": "Historial limpiado exitosamente"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al limpiar historial: {str(e)}")
@@ -205,6 +239,80 @@ async def health_check():
         "agentes_disponibles": len(orchestrator.obtener_lista_agentes())
     }
 
+@app.get("/api/metricas", tags=["Info"])
+async def metricas():
+    """Contadores de las herramientas: pool de procesos y memoización (aciertos, fallos, latencias)"""
+    return {
+        "ejecutor": obtener_ejecutor().estadisticas(),
+        "memoizacion": memo_herramientas.estadisticas(),
+    }
+
+# ===== ARTEFACTOS =====
+
+@app.get("/api/artefactos/{artefacto_id}", tags=["Artefactos"])
+async def obtener_artefacto(
+    artefacto_id: str,
+    request: Request,
+    formato: Optional[str] = None,
+    ancho: Optional[int] = None,
+):
+    """
+    Sirve una imagen generada por los agentes
+
+    - **formato** (opcional): "avif", "webp" o "png". Si no se indica, se elige
+      según la cabecera Accept del navegador (AVIF > WebP > PNG optimizado).
+    - **ancho** (opcional): ancho en píxeles; se ajusta al tamaño disponible
+      más cercano por encima (160, 320, 640, 1000, 1600).
+
+    Los artefactos vectoriales (SVG) ignoran ambos parámetros y se envían
+    comprimidos con gzip si la cabecera Accept-Encoding lo permite.
+
+    Las variantes se generan una vez y se cachean en disco. Como el id depende
+    del contenido, las respuestas son inmutables y se cachean indefinidamente.
+    """
+    if ancho is not None and ancho <= 0:
+        raise HTTPException(status_code=400, detail="El ancho debe ser un entero positivo")
+    try:
+        formato = artefactos.negociar_formato(request.headers.get("accept"), formato)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    ancho = artefactos.ajustar_ancho(ancho)
+
+    if artefactos.ruta_original(artefacto_id) is None:
+        raise HTTPException(status_code=404, detail="Artefacto no encontrado")
+    vectorial = artefactos.es_vectorial(artefacto_id)
+    gzip_aceptado = vectorial and "gzip" in request.headers.get("accept-encoding", "").lower()
+    if vectorial:
+        # Los SVG se sirven tal cual, a cualquier tamaño
+        formato, ancho = "svg", None
+
+    etag = f'"{artefacto_id}-{ancho or "orig"}-{formato}{"-gz" if gzip_aceptado else ""}"'
+    cabeceras = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Vary": "Accept, Accept-Encoding" if vectorial else "Accept",
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=cabeceras)
+
+    if gzip_aceptado:
+        try:
+            ruta = await asyncio.to_thread(artefactos.obtener_svg_gzip, artefacto_id)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Artefacto no encontrado")
+        return FileResponse(ruta, media_type=artefactos.TIPO_SVG,
+                            headers={**cabeceras, "Content-Encoding": "gzip"})
+
+    try:
+        # La codificación (sobre todo AVIF) es costosa: fuera del bucle de eventos
+        ruta, tipo_mime = await asyncio.to_thread(artefactos.obtener_variante, artefacto_id, formato, ancho)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Artefacto no encontrado")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al generar la variante: {str(e)}")
+
+    return FileResponse(ruta, media_type=tipo_mime, headers=cabeceras)
+
 # ===== EXPERIENCIAS GUIADAS =====
 
 @app.get("/api/experiencias", tags=["Experiencias Guiadas"])
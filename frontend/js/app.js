@@ -12,6 +12,10 @@ let experiences = [];
 let currentExperience = null;
 let currentStage = 0;
 
+// Identificador de esta pestaña: el backend guarda una sesión por cliente y agente
+const USUARIO_ID = sessionStorage.getItem('datar_usuario_id') || crypto.randomUUID();
+sessionStorage.setItem('datar_usuario_id', USUARIO_ID);
+
 // ===== INICIALIZACIÓN =====
 document.addEventListener('DOMContentLoaded', async () => {
     console.log('🌿 Iniciando {DATAR}...');
@@ -167,7 +171,7 @@ async function selectAgent(agentId) {
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ agente_id: agentId })
+            body: JSON.stringify({ agente_id: agentId, usuario_id: USUARIO_ID })
         });
 
         if (!response.ok) throw new Error('Error al seleccionar agente');
@@ -264,7 +268,8 @@ async function sendMessage() {
             },
             body: JSON.stringify({
                 mensaje: message,
-                agente_id: selectedAgent.id
+                agente_id: selectedAgent.id,
+                usuario_id: USUARIO_ID
             })
         });
 